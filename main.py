@@ -1,5 +1,236 @@
-from src.main_crawler import MainCrawler
+import argparse
+import os
+import time
+
+# 무거운 의존성(selenium, pandas, numpy 등)은 각 명령을 실행할 때만 임포트합니다.
+# parse/export처럼 브라우저가 필요 없는 명령은 selenium과 pandas를 전혀 로드하지 않습니다.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EGAI 현대 인증중고차 엔진 사운드 크롤러")
+    parser.add_argument("command", nargs="?", default="crawl", choices=["crawl", "export", "features", "parse", "verify", "pack", "dedup", "similar", "query", "stats"],
+                        help="crawl: 크롤링 실행 (기본값), export: car_audio_metadata.csv를 Parquet 데이터셋으로 내보내기, "
+                             "features: 다운로드된 오디오의 특징(log-mel) 추출, "
+                             "parse: 저장된 상세 페이지 HTML 파일을 다시 파싱하여 JSON으로 출력, "
+                             "verify: 오디오 파일/메타데이터/goods_nos.csv 일치 여부 검사, "
+                             "pack: 오디오와 메타데이터를 학습용 tar 샤드(data/shards/)로 패키징 (새 차량만 추가), "
+                             "dedup: 음향 지문(LSH)으로 근접 중복 녹음을 찾아 duplicate_group 컬럼에 기록, "
+                             "similar: 주어진 goodsNo와 엔진음이 비슷한 차량 검색 (features 실행 후 사용), "
+                             "query: 메타데이터 필터 검색 (예: fuel_type=디젤 year=2021 overall_score__lt=70) 또는 --serve로 HTTP 엔드포인트 실행, "
+                             "stats: 점수 누적 통계(data/score_stats.json) 출력. 그룹 키(예: fuel_type=디젤)를 주면 해당 그룹만")
+    parser.add_argument("paths", nargs="*", help="parse 명령에서 파싱할 HTML 파일 경로 / similar 명령에서 검색할 goodsNo / "
+                             "query 명령의 필터 (컬럼=값 또는 컬럼__연산자=값, 연산자: eq ne in lt le gt ge)")
+    parser.add_argument("--top-k", type=int, default=10, help="similar 명령에서 goodsNo마다 보여줄 차량 수. 기본값 10")
+    parser.add_argument("--exact", action="store_true",
+                        help="similar와 함께 사용 시 IVF 파티션을 쓰지 않고 전체를 정확히 검색합니다.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="similar와 함께 사용 시 임베딩 인덱스를, stats와 함께 사용 시 점수 통계를 새로 만듭니다.")
+    parser.add_argument("--repair", action="store_true",
+                        help="verify와 함께 사용 시 깨진 파일을 지우고 해당 goodsNo만 재수집 대기열로 되돌립니다.")
+    parser.add_argument("--deep", action="store_true",
+                        help="verify와 함께 사용 시 ffmpeg로 모든 파일을 실제로 디코딩해 봅니다. (느림)")
+    parser.add_argument("--order-by", help="query 명령의 정렬 컬럼. 내림차순은 -overall_score처럼 앞에 '-'")
+    parser.add_argument("--page", type=int, default=1, help="query 명령의 페이지 번호. 기본값 1")
+    parser.add_argument("--page-size", type=int, default=20, help="query 명령의 페이지 크기. 기본값 20")
+    parser.add_argument("--serve", action="store_true",
+                        help="query와 함께 사용 시 로컬 HTTP 질의 엔드포인트(GET /vehicles?...)를 실행합니다.")
+    parser.add_argument("--profile", action="store_true",
+                        help="단계별 시간 측정과 스택 샘플링을 수행하고 결과를 data/profile/에 저장합니다.")
+    parser.add_argument("--profile-cprofile", action="store_true",
+                        help="--profile과 함께 사용 시 단계별 cProfile 통계(.prof)도 저장합니다.")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="스택 샘플링 간격(초). 기본값 0.005")
+    return parser.parse_args()
+
+
+def run_export():
+    from src.data_manager import DataManager
+
+    data_manager = DataManager()
+    exported = data_manager.export_metadata_csv_to_parquet()
+    print(f"{exported}개 행을 '{data_manager.metadata_parquet_dir}'에 Parquet으로 내보냈습니다.")
+
+
+def run_features():
+    from src.audio_features import AudioFeaturePipeline
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    AudioFeaturePipeline.from_config(config_loader, DataManager()).run()
+
+
+def run_parse(paths):
+    import json
+
+    from src.config_loader import ConfigLoader
+    from src.page_parser import PageParser
+
+    config_loader = ConfigLoader()
+    parser = PageParser(config_loader.load_config()['data_selectors'])
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = parser.parse_detail_page(f.read())
+        print(json.dumps({'file': path, **record.to_dict()}, ensure_ascii=False, default=str))
+
+
+def run_verify(args):
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+    from src.dataset_verifier import DatasetVerifier
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    verifier = DatasetVerifier.from_config(config_loader, DataManager(), deep=args.deep or None)
+    report = verifier.run(repair=args.repair)
+    print(DatasetVerifier.format_report(report))
+    print(f"상세 보고서: {verifier.report_path}")
+
+
+def run_pack():
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+    from src.shard_packager import ShardPackager
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    packager = ShardPackager.from_config(config_loader, DataManager())
+    packager.pack()
+    print(f"샤드 인덱스: {packager.index_path}")
+
+
+def run_dedup():
+    from src.audio_fingerprint import DuplicateDetector
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    detector = DuplicateDetector.from_config(config_loader, DataManager())
+    detector.run()
+    print(f"지문 인덱스: {detector.index_path}")
+
+
+def run_similar(args):
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+    from src.similarity_index import SimilaritySearch, format_results, load_metadata_rows
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    data_manager = DataManager()
+    search = SimilaritySearch.from_config(config_loader, data_manager)
+    index = search.index(rebuild=args.rebuild)
+    print(f"임베딩 인덱스: {len(index)}대, IVF 파티션 {index.partitions}개 ({search.index_path})")
+    missing = [goods_no for goods_no in args.paths if goods_no not in index]
+    if missing:
+        print(f"특징이 없는 goodsNo (features 명령을 먼저 실행하세요): {', '.join(missing)}")
+    results = search.similar_to(args.paths, k=args.top_k, exact=args.exact)
+    shown = set(results) | {other for neighbors in results.values() for other, _ in neighbors}
+    print(format_results(results, load_metadata_rows(data_manager.metadata_csv_path, shown)))
+
+
+def run_query(args):
+    import json
+
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+    from src.metadata_query import MetadataQueryService
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    service = MetadataQueryService.from_config(config_loader, DataManager())
+    if args.serve:
+        settings = config_loader.get('metadata_query', expected_type=dict, default={})
+        host, port = settings.get('host', '127.0.0.1'), settings.get('port', 8765)
+        server = service.make_server(host, port)
+        service.snapshot()  # 첫 요청 전에 미리 로드
+        print(f"메타데이터 질의 엔드포인트 시작: http://{host}:{port}/vehicles?fuel_type=디젤&page=1 (Ctrl+C로 종료)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    filters = {}
+    for expression in args.paths:
+        key, sep, value = expression.partition('=')
+        if not sep:
+            raise SystemExit(f"필터는 컬럼=값 형식이어야 합니다: {expression}")
+        filters[key] = value
+    try:
+        result = service.query(filters, order_by=args.order_by, page=args.page, page_size=args.page_size)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{result['total']}대 일치 (페이지 {result['page']}/{result['pages']})")
+    for item in result['items']:
+        print(json.dumps(item, ensure_ascii=False, default=str))
+
+
+def run_stats(args):
+    import json
+
+    from src.config_loader import ConfigLoader
+    from src.data_manager import DataManager
+    from src.score_statistics import ScoreStatistics
+
+    config_loader = ConfigLoader()
+    config_loader.load_config()
+    statistics = ScoreStatistics.from_config(config_loader, DataManager())
+    if args.rebuild:
+        statistics.rebuild()
+    else:
+        statistics.open()
+    groups = args.paths or ['all']
+    for group in groups:
+        print(json.dumps({'group': group, 'scores': statistics.summary(group)}, ensure_ascii=False, indent=2))
+    if not args.paths:
+        print(f"그룹: {', '.join(sorted(statistics.groups))}")
+
+
+def run_crawl(args):
+    from src.main_crawler import MainCrawler
+    from src.profiler import StageProfiler
+
+    profiler = StageProfiler(enabled=args.profile, use_cprofile=args.profile_cprofile,
+                             sample_interval_sec=args.profile_interval)
+    profiler.start()
+    try:
+        with profiler.stage('init'):
+            crawler = MainCrawler(profiler=profiler)
+        crawler.run()
+    finally:
+        profiler.finish()
+        if args.profile:
+            print(profiler.report())
+            from src.data_manager import DataManager
+            output_dir = os.path.join(DataManager().get_base_data_path(), 'profile', time.strftime('%Y%m%d_%H%M%S'))
+            print(f"프로파일 결과 저장: {profiler.write(output_dir)} "
+                  f"(collapsed_stacks.txt는 flamegraph.pl 또는 speedscope로 볼 수 있습니다)")
+
 
 if __name__ == "__main__":
-    crawler = MainCrawler()
-    crawler.run()
\ No newline at end of file
+    args = parse_args()
+    if args.command == "export":
+        run_export()
+    elif args.command == "features":
+        run_features()
+    elif args.command == "parse":
+        run_parse(args.paths)
+    elif args.command == "verify":
+        run_verify(args)
+    elif args.command == "pack":
+        run_pack()
+    elif args.command == "dedup":
+        run_dedup()
+    elif args.command == "similar":
+        run_similar(args)
+    elif args.command == "query":
+        run_query(args)
+    elif args.command == "stats":
+        run_stats(args)
+    else:
+        run_crawl(args)
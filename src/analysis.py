@@ -0,0 +1,83 @@
+# src/analysis.py
+
+import glob
+import hashlib
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Analizer 노트북에서 사용하는 메타데이터 정제/캐시 로직입니다.
+# 노트북에서는 다음과 같이 사용합니다.
+#   import sys; sys.path.append('..')
+#   from src.analysis import load_clean_metadata
+#   df_cleaned = load_clean_metadata('../data/car_audio_metadata.csv')
+
+CLEANING_VERSION = 1  # 정제 로직이 바뀌면 올려서 기존 캐시를 무효화합니다.
+
+_YEARS_PATTERN = r'(\d+)\s*년'
+_MONTHS_PATTERN = r'(\d+)\s*개월'
+
+
+def warranty_to_months(series: pd.Series) -> pd.Series:
+    """
+    '2년 6개월' 형태의 보증 기간 컬럼을 개월 수(float)로 변환합니다. (벡터화 str.extract)
+    문자열이 아닌 값(결측)은 NaN, 년/개월 표기가 없는 문자열은 0이 됩니다.
+    이미 숫자형으로 저장된 컬럼(파싱 시점 변환 이후 수집분)은 그대로 사용합니다.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = series.astype('string')
+    years = pd.to_numeric(text.str.extract(_YEARS_PATTERN, expand=False), errors='coerce').fillna(0)
+    months = pd.to_numeric(text.str.extract(_MONTHS_PATTERN, expand=False), errors='coerce').fillna(0)
+    total = years * 12 + months
+    # 숫자만 있는 문자열(예: '30')은 이미 개월 수로 저장된 값입니다.
+    numeric = pd.to_numeric(text, errors='coerce')
+    total = total.where(numeric.isna(), numeric)
+    return total.where(text.notna(), np.nan).astype(float)
+
+
+def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    """데이터프레임을 받아 주요 컬럼을 분석에 맞게 전처리합니다."""
+    df['current_mileage_km'] = pd.to_numeric(df['current_mileage_km'], errors='coerce')
+    df['displacement_cc'] = pd.to_numeric(df['displacement_cc'], errors='coerce')
+
+    if 'warranty_remaining_months' in df.columns:
+        df['warranty_total_months'] = warranty_to_months(df['warranty_remaining_months'])
+    return df
+
+
+def _cache_path(csv_path: str, cache_dir: str) -> str:
+    stat = os.stat(csv_path)
+    key = f"{os.path.abspath(csv_path)}|{stat.st_mtime_ns}|{stat.st_size}|v{CLEANING_VERSION}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{base}.clean.{digest}.pkl")
+
+
+def load_clean_metadata(csv_path: str, cache_dir: Optional[str] = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    메타데이터 CSV를 읽어 정제된 DataFrame을 반환합니다.
+    정제 결과는 원본 파일의 수정 시각(mtime)과 크기를 키로 디스크에 캐시되므로,
+    CSV가 바뀌지 않았다면 다음 실행부터는 캐시 파일만 읽습니다.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), 'cache')
+    cache_path = _cache_path(csv_path, cache_dir)
+    if use_cache and os.path.exists(cache_path):
+        logger.debug("캐시된 정제 데이터를 사용합니다: %s", cache_path)
+        return pd.read_pickle(cache_path)
+
+    df = clean_data(pd.read_csv(csv_path))
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        base = os.path.splitext(os.path.basename(csv_path))[0]
+        for stale in glob.glob(os.path.join(cache_dir, f"{base}.clean.*.pkl")):
+            os.remove(stale)  # 원본이 바뀌어 더 이상 쓰이지 않는 캐시 정리
+        tmp_path = cache_path + '.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    return df
@@ -1,10 +1,18 @@
 # src/audio_downloader.py
 
+import logging
 import os
 import requests
 import time
 from typing import Optional, Union, Tuple, Any
 
+from src.metrics import metrics, DEFAULT_SIZE_BUCKETS
+from src.proxy_pool import ProxyPool
+from src.rate_limiter import RateLimiter
+from src.retry_policy import PERMANENT_HTTP_STATUSES
+
+logger = logging.getLogger(__name__)
+
 
 # WebScraper에서 사용하는 설정들을 AudioDownloader도 사용할 수 있도록 ConfigLoader 임포트
 # 또는 AudioDownloader의 __init__에서 필요한 설정들을 직접 파라미터로 받을 수도 있음.
@@ -17,49 +25,118 @@ class AudioDownloader:
     """
 
     def __init__(self, request_delay: Union[int, float], timeout: int, max_retries: int, retry_delay: Union[int, float],
-                 user_agent: str):
+                 user_agent: str, rate_limiter: Optional[RateLimiter] = None,
+                 proxy_pool: Optional[ProxyPool] = None):
         self.request_delay = request_delay
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.headers = {'User-Agent': user_agent}
+        # WebScraper와 같은 RateLimiter를 공유하면 호스트별 속도 제한이 전체 요청에 일관되게 적용됩니다.
+        self.rate_limiter = rate_limiter or RateLimiter(
+            initial_rate=1.0 / request_delay if request_delay > 0 else 2.0, backoff_base_sec=retry_delay)
+        self.proxy_pool = proxy_pool
+        # 마지막 다운로드 실패의 HTTP 상태 코드 (네트워크/로컬 오류면 None). 실패 분류에 사용됩니다.
+        self.last_error_status = None
 
-    def download_audio_file(self, audio_url: str, save_path: str) -> bool:
+    def download_audio_file(self, audio_url: str, save_path: str, chunk_consumer: Optional[Any] = None) -> bool:
         """
         주어진 URL에서 오디오 파일(MP3)을 다운로드하여 지정된 경로에 저장합니다.
+        chunk_consumer(feed(bytes)/reset() 메서드를 가진 객체, 예: StreamingFeatureExtractor)가 주어지면
+        받은 청크를 디스크 저장과 동시에 전달합니다. 재시도 시에는 reset()으로 상태를 초기화합니다.
         """
+        self.last_error_status = None
         if not audio_url:
-            print("    [경고] 다운로드할 오디오 URL이 유효하지 않습니다.")
+            logger.warning("    [경고] 다운로드할 오디오 URL이 유효하지 않습니다.")
             return False
 
         for attempt in range(self.max_retries):
+            proxy = self.proxy_pool.acquire() if self.proxy_pool else None
             try:
-                print(f"    오디오 파일 다운로드 시도: {audio_url} (시도: {attempt + 1}/{self.max_retries})")
-                time.sleep(self.request_delay)  # 요청 간 지연
+                logger.debug("    오디오 파일 다운로드 시도: %s (시도: %d/%d)", audio_url, attempt + 1, self.max_retries)
+                self.rate_limiter.acquire(audio_url)  # 호스트별 적응형 요청 간격
+                started_at = time.monotonic()
 
-                response = requests.get(audio_url, headers=self.headers, timeout=self.timeout, stream=True)
+                response = requests.get(audio_url, headers=self.headers, timeout=self.timeout, stream=True,
+                                        proxies=ProxyPool.requests_proxies(proxy))
                 response.raise_for_status()  # HTTP 오류 발생 시 예외 throw (4xx, 5xx)
+                self.rate_limiter.record_success(audio_url, time.monotonic() - started_at)
 
                 # 파일 저장 경로의 디렉토리가 없으면 생성 (DataManager가 주로 하지만, 여기서도 방어적으로)
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
 
+                if chunk_consumer is not None and attempt > 0:
+                    try:
+                        chunk_consumer.reset()  # 이전 시도에서 받은 일부 데이터 폐기
+                    except Exception as e:
+                        chunk_consumer = self._disable_chunk_consumer(chunk_consumer, e)
+
+                downloaded_bytes = 0
                 with open(save_path, 'wb') as f:
                     for chunk in response.iter_content(chunk_size=8192):
                         f.write(chunk)
+                        if chunk_consumer is not None:
+                            try:
+                                chunk_consumer.feed(chunk)
+                            except Exception as e:
+                                chunk_consumer = self._disable_chunk_consumer(chunk_consumer, e)
+                        downloaded_bytes += len(chunk)
+
+                elapsed = time.monotonic() - started_at
+                metrics.inc('audio_downloads')
+                metrics.inc('download_bytes', downloaded_bytes)
+                metrics.observe('download_seconds', elapsed)
+                metrics.observe('download_size_bytes', downloaded_bytes, buckets=DEFAULT_SIZE_BUCKETS)
+                if elapsed > 0:
+                    metrics.observe('download_speed_bytes_per_sec', downloaded_bytes / elapsed,
+                                    buckets=DEFAULT_SIZE_BUCKETS)
+                if self.proxy_pool:
+                    self.proxy_pool.release(proxy, True, time.monotonic() - started_at)
                 return True  # 다운로드 성공
 
             except requests.exceptions.RequestException as e:
-                print(f"    오디오 파일 다운로드 실패 (시도 {attempt + 1}/{self.max_retries}) for {audio_url}: {e}")
+                logger.warning(f"    오디오 파일 다운로드 실패 (시도 {attempt + 1}/{self.max_retries}) for {audio_url}: {e}")
+                failed_response = getattr(e, 'response', None)
+                if self.proxy_pool:  # 404 같은 서버 응답은 프록시 탓이 아님
+                    self.proxy_pool.release(proxy, not ProxyPool.is_proxy_fault(
+                        failed_response.status_code if failed_response is not None else None))
+                backoff = self.rate_limiter.record_failure(
+                    audio_url,
+                    status_code=failed_response.status_code if failed_response is not None else None,
+                    retry_after=failed_response.headers.get('Retry-After') if failed_response is not None else None,
+                )
+                metrics.inc('download_errors')
+                self.last_error_status = failed_response.status_code if failed_response is not None else None
+                if self.last_error_status in PERMANENT_HTTP_STATUSES:
+                    logger.error(f"    {audio_url}: HTTP {self.last_error_status}. 재시도하지 않습니다.")
+                    return False
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)  # 재시도 대기
+                    metrics.inc('download_retries')
+                    time.sleep(backoff)  # 지터 포함 지수 백오프 (Retry-After 우선)
                 else:
-                    print(f"    최대 재시도 횟수 도달. {audio_url} 다운로드 최종 실패.")
+                    logger.error(f"    최대 재시도 횟수 도달. {audio_url} 다운로드 최종 실패.")
                     return False  # 다운로드 실패
             except Exception as e:
-                print(f"    오디오 파일 저장 중 예상치 못한 오류 발생: {e}")
+                logger.error(f"    오디오 파일 저장 중 예상치 못한 오류 발생: {e}")
+                if self.proxy_pool:
+                    self.proxy_pool.release(proxy, True)  # 네트워크가 아닌 로컬 오류이므로 프록시 탓이 아님
                 return False
         return False  # 이 부분에 도달해서는 안 되지만, 명시적으로 False 반환
 
+    @staticmethod
+    def _disable_chunk_consumer(chunk_consumer: Any, error: Exception) -> None:
+        """
+        청크 소비자(스트리밍 특징 추출 등)에서 난 오류는 다운로드를 실패시키지 않습니다.
+        소비자를 초기화하고 이 파일에 대해서는 더 이상 청크를 전달하지 않도록 None을 반환합니다.
+        """
+        logger.warning(f"    [경고] 다운로드 중 청크 처리 실패, 이 파일은 스트리밍 처리를 건너뜁니다: {error}")
+        metrics.inc('chunk_consumer_errors')
+        try:
+            chunk_consumer.reset()
+        except Exception:
+            pass
+        return None
+
     def extract_audio_url_from_vr_page(self, html_content: str, selector_info: dict) -> Optional[str]:
         """
         VR 페이지 (상세 페이지 내) HTML에서 오디오 URL을 추출합니다.
@@ -72,5 +149,5 @@ class AudioDownloader:
 
         # PageParser에서 이미 추출된 'audio_url_on_page' 값을 MainCrawler에서 전달받아 사용하는 것이 더 효율적입니다.
         # 이 메서드는 현재 크롤링 플로우에서 직접 호출되지 않습니다.
-        print("경고: AudioDownloader.extract_audio_url_from_vr_page는 현재 사용되지 않습니다. PageParser에서 URL이 추출됩니다.")
+        logger.warning("경고: AudioDownloader.extract_audio_url_from_vr_page는 현재 사용되지 않습니다. PageParser에서 URL이 추출됩니다.")
         return None
\ No newline at end of file
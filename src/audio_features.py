@@ -0,0 +1,461 @@
+# src/audio_features.py
+
+import functools
+import glob
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg')
+
+
+def decode_audio(path: str, sample_rate: int, max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    ffmpeg로 오디오 파일을 모노 float32 PCM(고정 샘플레이트)으로 디코딩합니다.
+    ffmpeg가 PATH에 없으면 RuntimeError를 발생시킵니다.
+    """
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("오디오 디코딩에 ffmpeg가 필요합니다. ffmpeg를 설치하고 PATH에 추가하세요.")
+    cmd = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', path, '-ac', '1', '-ar', str(sample_rate)]
+    if max_seconds:
+        cmd += ['-t', str(max_seconds)]
+    cmd += ['-f', 'f32le', '-']
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 디코딩 실패 ({path}): {result.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+@functools.lru_cache(maxsize=8)
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """(n_mels, n_fft // 2 + 1) 크기의 삼각형 mel 필터뱅크(HTK mel 스케일)를 생성합니다."""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    fft_freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    mel_points = np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    hz_points = mel_to_hz(mel_points)
+
+    lower = hz_points[:-2, None]
+    center = hz_points[1:-1, None]
+    upper = hz_points[2:, None]
+    up_slope = (fft_freqs[None, :] - lower) / (center - lower)
+    down_slope = (upper - fft_freqs[None, :]) / (upper - center)
+    filters = np.maximum(0.0, np.minimum(up_slope, down_slope))
+    # 각 필터의 면적을 정규화 (Slaney 방식)
+    filters *= (2.0 / (upper - lower))
+    return filters.astype(np.float32)
+
+
+def frame_signal(pcm: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """신호를 (n_frames, n_fft) 프레임으로 나눕니다. 복사 없이 stride view를 사용합니다."""
+    if len(pcm) < n_fft:
+        pcm = np.pad(pcm, (0, n_fft - len(pcm)))
+    n_frames = 1 + (len(pcm) - n_fft) // hop_length
+    return np.lib.stride_tricks.as_strided(
+        pcm, shape=(n_frames, n_fft), strides=(pcm.strides[0] * hop_length, pcm.strides[0]), writeable=False)
+
+
+def frame_log_mel(frames: np.ndarray, sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """(n_frames, n_fft) 프레임들의 log-mel 값을 계산합니다."""
+    window = np.hanning(n_fft).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+    mel = power.astype(np.float32) @ mel_filterbank(sample_rate, n_fft, n_mels).T
+    return np.log(mel + 1e-10).astype(np.float32)
+
+
+def frame_energy_stats(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """프레임별 RMS와 영교차율(ZCR)을 계산합니다."""
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    zcr = np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+    return rms, zcr
+
+
+def summarize(logmel: np.ndarray, rms: np.ndarray, zcr: np.ndarray, duration_sec: float) -> np.ndarray:
+    """
+    파일 단위 요약 특징 벡터를 만듭니다.
+    [mel 평균(n_mels), mel 표준편차(n_mels), RMS 평균/표준편차, 스펙트럴 중심 평균/표준편차, ZCR 평균, 길이(초)]
+    """
+    mel_power = np.exp(logmel)
+    mel_bins = np.arange(logmel.shape[1], dtype=np.float32)
+    centroid = (mel_power @ mel_bins) / np.maximum(mel_power.sum(axis=1), 1e-10)
+    return np.concatenate([
+        logmel.mean(axis=0), logmel.std(axis=0),
+        [rms.mean(), rms.std(), centroid.mean(), centroid.std(), zcr.mean(), duration_sec],
+    ]).astype(np.float32)
+
+
+def log_mel_spectrogram(pcm: np.ndarray, sample_rate: int, n_fft: int, hop_length: int, n_mels: int) -> np.ndarray:
+    """(n_frames, n_mels) 크기의 log-mel 스펙트로그램을 계산합니다."""
+    frames = frame_signal(np.ascontiguousarray(pcm, dtype=np.float32), n_fft, hop_length)
+    return frame_log_mel(frames, sample_rate, n_fft, n_mels)
+
+
+def summary_features(pcm: np.ndarray, logmel: np.ndarray, sample_rate: int, n_fft: int,
+                     hop_length: int) -> np.ndarray:
+    """PCM 전체와 log-mel로부터 파일 단위 요약 특징 벡터를 계산합니다. (summarize 참고)"""
+    frames = frame_signal(np.ascontiguousarray(pcm, dtype=np.float32), n_fft, hop_length)
+    rms, zcr = frame_energy_stats(frames)
+    return summarize(logmel, rms, zcr, len(pcm) / sample_rate)
+
+
+def summary_dim(n_mels: int) -> int:
+    return 2 * n_mels + 6
+
+
+def fit_frames(logmel: np.ndarray, n_frames: int) -> np.ndarray:
+    """log-mel을 고정 프레임 수로 자르거나 최솟값으로 패딩합니다."""
+    if logmel.shape[0] >= n_frames:
+        return logmel[:n_frames]
+    pad_value = logmel.min() if logmel.size else np.log(1e-10)
+    return np.pad(logmel, ((0, n_frames - logmel.shape[0]), (0, 0)), constant_values=pad_value)
+
+
+def _extract_worker(task: Tuple[str, str, dict]) -> Tuple[str, Optional[np.ndarray], Optional[np.ndarray], Optional[str]]:
+    """프로세스 풀 워커: 파일 하나를 디코딩하고 특징을 계산합니다. (피클 가능한 최상위 함수)"""
+    goods_no, path, params = task
+    try:
+        pcm = decode_audio(path, params['sample_rate'], params['max_seconds'])
+        logmel = log_mel_spectrogram(pcm, params['sample_rate'], params['n_fft'], params['hop_length'],
+                                     params['n_mels'])
+        summary = summary_features(pcm, logmel, params['sample_rate'], params['n_fft'], params['hop_length'])
+        return goods_no, fit_frames(logmel, params['n_frames']), summary, None
+    except Exception as e:
+        return goods_no, None, None, str(e)
+
+
+class StreamingFeatureExtractor:
+    """
+    다운로드 중인 오디오 바이트를 받아 즉시 디코딩하고 특징을 누적하는 추출기입니다.
+
+    AudioDownloader의 chunk_consumer로 전달하면 iter_content의 각 청크가 디스크 저장과 동시에
+    ffmpeg(stdin → f32le stdout)로 전달되고, 별도 스레드가 PCM을 읽어 hop 단위 프레임이 완성될 때마다
+    log-mel/RMS/ZCR을 계산합니다. 다운로드가 끝나면 finish()로 최종 특징을 바로 얻을 수 있어
+    파일을 다시 읽고 디코딩하는 과정이 필요 없습니다.
+    """
+
+    def __init__(self, params: dict):
+        self.params = params
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._reset_state()
+
+    def _reset_state(self):
+        self._carry = np.empty(0, dtype=np.float32)
+        self._byte_carry = b''
+        self._logmel_parts: List[np.ndarray] = []
+        self._rms_parts: List[np.ndarray] = []
+        self._zcr_parts: List[np.ndarray] = []
+        self._n_samples = 0
+        self._n_frames = 0
+        self._input_closed = False
+        self._error: Optional[str] = None
+
+    def _start(self):
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError("오디오 디코딩에 ffmpeg가 필요합니다. ffmpeg를 설치하고 PATH에 추가하세요.")
+        cmd = ['ffmpeg', '-loglevel', 'error', '-i', 'pipe:0', '-ac', '1',
+               '-ar', str(self.params['sample_rate'])]
+        if self.params.get('max_seconds'):
+            cmd += ['-t', str(self.params['max_seconds'])]
+        cmd += ['-f', 'f32le', 'pipe:1']
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        self._reader = threading.Thread(target=self._read_pcm, daemon=True)
+        self._reader.start()
+
+    def _read_pcm(self):
+        try:
+            while True:
+                data = self._process.stdout.read(65536)
+                if not data:
+                    break
+                data = self._byte_carry + data
+                usable = len(data) - len(data) % 4
+                self._byte_carry = data[usable:]
+                self._accumulate(np.frombuffer(data[:usable], dtype=np.float32))
+        except Exception as e:
+            self._error = str(e)
+
+    def _accumulate(self, pcm: np.ndarray):
+        n_fft, hop = self.params['n_fft'], self.params['hop_length']
+        self._n_samples += len(pcm)
+        buffer = np.concatenate([self._carry, pcm]) if len(self._carry) else pcm
+        if len(buffer) < n_fft:
+            self._carry = buffer.copy()
+            return
+        frames = frame_signal(buffer, n_fft, hop)
+        if self._n_frames < self.params['n_frames']:
+            self._logmel_parts.append(frame_log_mel(frames, self.params['sample_rate'], n_fft, self.params['n_mels']))
+        rms, zcr = frame_energy_stats(frames)
+        self._rms_parts.append(rms)
+        self._zcr_parts.append(zcr)
+        self._n_frames += len(frames)
+        # 다음 청크와 이어질 미완성 프레임 구간만 남깁니다.
+        self._carry = buffer[len(frames) * hop:].copy()
+
+    def feed(self, chunk: bytes):
+        """다운로드된 청크를 디코더에 전달합니다."""
+        if self._input_closed:
+            return
+        if self._process is None:
+            self._start()
+        try:
+            self._process.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            # max_seconds에 도달하면 ffmpeg가 먼저 종료하므로 이후 청크는 버립니다.
+            # 실제 디코딩 오류는 finish()에서 종료 코드로 판단합니다.
+            self._input_closed = True
+
+    def reset(self):
+        """진행 중인 디코딩을 중단하고 처음 상태로 되돌립니다. (다운로드 재시도 시 사용)"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            if self._reader:
+                self._reader.join(timeout=5)
+        self._process = None
+        self._reader = None
+        self._reset_state()
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray]:
+        """입력을 닫고 디코딩이 끝나길 기다린 뒤 (고정 길이 log-mel, 요약 특징)을 반환합니다."""
+        if self._process is None:
+            raise RuntimeError("디코더에 입력된 데이터가 없습니다.")
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass  # 이미 닫힌 파이프
+        returncode = self._process.wait()
+        self._reader.join()
+        if returncode != 0 or self._error:
+            raise RuntimeError(f"스트리밍 디코딩 실패 (code={returncode}): {self._error}")
+        if len(self._carry) and not self._rms_parts:
+            # 전체 길이가 n_fft보다 짧은 경우 배치 경로와 동일하게 패딩하여 한 프레임으로 처리합니다.
+            pad_length = self.params['n_fft'] - len(self._carry)
+            self._accumulate(np.zeros(pad_length, dtype=np.float32))
+            self._n_samples -= pad_length
+        if not self._rms_parts:
+            raise RuntimeError("디코딩된 오디오 샘플이 없습니다.")
+        logmel = np.concatenate(self._logmel_parts)
+        summary = summarize(logmel, np.concatenate(self._rms_parts), np.concatenate(self._zcr_parts),
+                            self._n_samples / self.params['sample_rate'])
+        return fit_frames(logmel, self.params['n_frames']), summary
+
+
+class AudioFeatureStore:
+    """
+    goodsNo별 오디오 특징을 메모리 맵 배열로 저장하는 저장소입니다.
+
+    data/audio_features/
+      ├── logmel.npy        (capacity, n_frames, n_mels) float32
+      ├── summary.npy       (capacity, summary_dim) float32
+      └── index.json        goodsNo → {row, source, mtime, size}
+
+    .npy 형식이므로 학습 코드에서 np.load(path, mmap_mode='r')로 복사 없이 읽을 수 있습니다.
+    용량이 부족하면 2배로 늘린 새 파일로 복사합니다.
+    """
+
+    def __init__(self, root_dir: str, params: dict):
+        self.root_dir = root_dir
+        self.params = params
+        self.index_path = os.path.join(root_dir, 'index.json')
+        self.logmel_path = os.path.join(root_dir, 'logmel.npy')
+        self.summary_path = os.path.join(root_dir, 'summary.npy')
+        self.index: Dict[str, dict] = {}
+        self.n_rows = 0
+        self._logmel = None
+        self._summary = None
+
+    def open(self, writable: bool = False):
+        """인덱스를 읽고 메모리 맵을 엽니다. 파라미터가 바뀌었다면 기존 데이터를 버리고 새로 만듭니다."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('params') == self.params:
+                self.index = stored.get('items', {})
+                self.n_rows = stored.get('n_rows', len(self.index))
+            else:
+                logger.info("  [특징] 추출 파라미터가 변경되어 특징 데이터셋을 새로 생성합니다.")
+        mode = 'r+' if writable else 'r'
+        if os.path.exists(self.logmel_path) and self.index:
+            self._logmel = np.load(self.logmel_path, mmap_mode=mode)
+            self._summary = np.load(self.summary_path, mmap_mode=mode)
+        return self
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._logmel is None else self._logmel.shape[0]
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity * 2, 256)
+        logmel_shape = (new_capacity, self.params['n_frames'], self.params['n_mels'])
+        summary_shape = (new_capacity, summary_dim(self.params['n_mels']))
+        for attr, path, shape in (('_logmel', self.logmel_path, logmel_shape),
+                                  ('_summary', self.summary_path, summary_shape)):
+            tmp_path = path + '.tmp'
+            grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+            old = getattr(self, attr)
+            if old is not None and self.n_rows:
+                grown[:self.n_rows] = old[:self.n_rows]
+            grown.flush()
+            del grown
+            setattr(self, attr, None)
+            del old
+            os.replace(tmp_path, path)
+        self._logmel = np.load(self.logmel_path, mmap_mode='r+')
+        self._summary = np.load(self.summary_path, mmap_mode='r+')
+
+    def is_current(self, goods_no: str, source: str) -> bool:
+        """이미 같은 파일(경로/크기/수정시각)로 특징이 계산되어 있는지 확인합니다."""
+        entry = self.index.get(goods_no)
+        if not entry or entry.get('source') != source:
+            return False
+        stat = os.stat(source)
+        return entry.get('size') == stat.st_size and entry.get('mtime') == int(stat.st_mtime)
+
+    def put(self, goods_no: str, source: str, logmel: np.ndarray, summary: np.ndarray):
+        """특징을 기록합니다. 같은 goodsNo가 이미 있으면 해당 행을 덮어씁니다."""
+        entry = self.index.get(goods_no)
+        row = entry['row'] if entry else self.n_rows
+        if entry is None:
+            self._ensure_capacity(row + 1)
+            self.n_rows += 1
+        self._logmel[row] = logmel
+        self._summary[row] = summary
+        stat = os.stat(source)
+        self.index[goods_no] = {'row': row, 'source': source, 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+    def commit(self):
+        """메모리 맵을 디스크에 반영하고 인덱스를 원자적으로 교체합니다."""
+        if self._logmel is not None:
+            self._logmel.flush()
+            self._summary.flush()
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'n_rows': self.n_rows, 'items': self.index}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, goods_no: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """goodsNo의 (log-mel, 요약 특징) 뷰를 반환합니다. (복사 없음)"""
+        entry = self.index.get(goods_no)
+        if entry is None or self._logmel is None:
+            return None
+        return self._logmel[entry['row']], self._summary[entry['row']]
+
+    def summary_matrix(self) -> np.ndarray:
+        """유효한 행까지의 요약 특징 행렬 뷰를 반환합니다."""
+        if self._summary is None:
+            return np.empty((0, summary_dim(self.params['n_mels'])), dtype=np.float32)
+        return self._summary[:self.n_rows]
+
+
+class AudioFeaturePipeline:
+    """
+    vehicle_assets/{goodsNo}/ 아래의 오디오를 프로세스 풀로 병렬 디코딩하여
+    AudioFeatureStore에 log-mel 스펙트로그램과 요약 특징을 기록하는 파이프라인 단계입니다.
+    새로 추가되었거나 변경된 파일만 처리합니다.
+    """
+
+    def __init__(self, vehicle_assets_dir: str, output_dir: str, sample_rate: int = 16000, n_fft: int = 1024,
+                 hop_length: int = 512, n_mels: int = 64, max_seconds: float = 10.0,
+                 workers: Optional[int] = None):
+        self.vehicle_assets_dir = vehicle_assets_dir
+        self.workers = workers
+        self.params = {
+            'sample_rate': sample_rate, 'n_fft': n_fft, 'hop_length': hop_length, 'n_mels': n_mels,
+            'max_seconds': max_seconds,
+            'n_frames': 1 + (max(int(sample_rate * max_seconds), n_fft) - n_fft) // hop_length,
+        }
+        self.store = AudioFeatureStore(output_dir, self.params)
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "AudioFeaturePipeline":
+        settings = config_loader.get('audio_features', expected_type=dict, default={})
+        return cls(
+            data_manager.vehicle_assets_dir,
+            os.path.join(data_manager.get_base_data_path(), 'audio_features'),
+            sample_rate=settings.get('sample_rate', 16000),
+            n_fft=settings.get('n_fft', 1024),
+            hop_length=settings.get('hop_length', 512),
+            n_mels=settings.get('n_mels', 64),
+            max_seconds=settings.get('max_seconds', 10.0),
+            workers=settings.get('workers'),
+        )
+
+    def streaming_extractor(self) -> StreamingFeatureExtractor:
+        """이 파이프라인과 같은 파라미터를 쓰는 스트리밍 추출기를 생성합니다."""
+        return StreamingFeatureExtractor(self.params)
+
+    def store_streamed(self, goods_no: str, source: str, extractor: StreamingFeatureExtractor) -> bool:
+        """
+        다운로드가 끝난 스트리밍 추출기의 결과를 저장소에 기록합니다.
+        실패 시 경고만 남기며, 해당 파일은 다음 배치 실행(run)에서 다시 처리됩니다.
+        """
+        try:
+            logmel, summary = extractor.finish()
+            self.store.put(goods_no, source, logmel, summary)
+        except Exception as e:
+            logger.warning(f"  [특징] goodsNo {goods_no} 스트리밍 특징 추출 실패: {e}")
+            return False
+        metrics.inc('audio_features_extracted', mode='streaming')
+        return True
+
+    def find_audio_files(self) -> Dict[str, str]:
+        """goodsNo → 오디오 파일 경로 매핑을 반환합니다. (폴더당 첫 번째 오디오 파일)"""
+        files = {}
+        for asset_dir in sorted(glob.glob(os.path.join(self.vehicle_assets_dir, '*'))):
+            if not os.path.isdir(asset_dir):
+                continue
+            candidates = sorted(p for p in os.listdir(asset_dir) if p.lower().endswith(AUDIO_EXTENSIONS))
+            if candidates:
+                files[os.path.basename(asset_dir)] = os.path.join(asset_dir, candidates[0])
+        return files
+
+    def run(self) -> Dict[str, int]:
+        """변경된 파일의 특징을 추출하고 처리 결과 통계를 반환합니다."""
+        started_at = time.monotonic()
+        self.store.open(writable=True)
+        audio_files = self.find_audio_files()
+        tasks = [(goods_no, path, self.params) for goods_no, path in audio_files.items()
+                 if not self.store.is_current(goods_no, path)]
+        stats = {'total': len(audio_files), 'skipped': len(audio_files) - len(tasks), 'extracted': 0, 'failed': 0}
+        print(f"  [특징] 오디오 {len(audio_files)}개 중 {len(tasks)}개 파일의 특징을 추출합니다.")
+        if not tasks:
+            return stats
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_extract_worker, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                goods_no, logmel, summary, error = future.result()
+                if error:
+                    logger.warning(f"  [특징] goodsNo {goods_no} 특징 추출 실패: {error}")
+                    stats['failed'] += 1
+                    continue
+                self.store.put(goods_no, audio_files[goods_no], logmel, summary)
+                stats['extracted'] += 1
+                metrics.inc('audio_features_extracted')
+                if done % 500 == 0:
+                    self.store.commit()  # 중단되어도 진행 상황이 남도록 주기적으로 반영
+        self.store.commit()
+        metrics.observe('audio_feature_pipeline_seconds', time.monotonic() - started_at)
+        print(f"  [특징] 추출 완료: {stats}")
+        return stats
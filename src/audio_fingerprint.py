@@ -0,0 +1,366 @@
+# src/audio_fingerprint.py
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.audio_features import AUDIO_EXTENSIONS, decode_audio, log_mel_spectrogram
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# MinHash 해시 함수: h_i(x) = (a_i * x + b_i) mod p. p = 2^31 - 1이면 a_i * x가 uint64 안에 들어갑니다.
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY_HASH = np.uint32(0xFFFFFFFF)
+
+# 피크 쌍 해시 비트 배치: [f1:7][f2:7][dt:6]
+_FREQ_BITS = 7
+_DT_BITS = 6
+
+
+def _box_smooth(logmel: np.ndarray, size: int) -> np.ndarray:
+    if size <= 1:
+        return logmel
+    padded = np.pad(logmel, size // 2, mode='edge')
+    return np.lib.stride_tricks.sliding_window_view(padded, (size, size)).mean(axis=(2, 3))
+
+
+def spectral_peaks(logmel: np.ndarray, neighborhood: Tuple[int, int] = (9, 5),
+                   peaks_per_frame: int = 3, smooth: int = 5) -> np.ndarray:
+    """
+    log-mel 스펙트로그램에서 국소 최대점(피크)을 찾아 (frame, mel_bin) 배열로 반환합니다.
+    주변 (시간, 주파수) 창에서 최대이면서 프레임 평균보다 큰 점 중, 프레임마다 가장 강한 peaks_per_frame개만 남깁니다.
+    엔진음은 정상(stationary) 성분이 많아 잡음 한 점에도 피크 위치가 흔들리므로, 먼저 smooth x smooth 평균 필터를 적용합니다.
+    """
+    if logmel.size == 0:
+        return np.empty((0, 2), dtype=np.int32)
+    logmel = _box_smooth(logmel, smooth)
+    dt, df = neighborhood
+    padded = np.pad(logmel, ((dt // 2, dt // 2), (df // 2, df // 2)), constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (dt, df))
+    local_max = windows.max(axis=(2, 3))
+    candidates = (logmel >= local_max) & (logmel > logmel.mean(axis=1, keepdims=True))
+
+    strength = np.where(candidates, logmel, -np.inf)
+    top = np.argsort(strength, axis=1)[:, ::-1][:, :peaks_per_frame]
+    frames = np.repeat(np.arange(logmel.shape[0]), top.shape[1])
+    bins = top.ravel()
+    keep = np.isfinite(strength[frames, bins])
+    return np.stack([frames[keep], bins[keep]], axis=1).astype(np.int32)
+
+
+def peak_pair_hashes(peaks: np.ndarray, fan_out: int = 5, max_dt: int = (1 << _DT_BITS) - 1,
+                     dt_step: int = 2) -> np.ndarray:
+    """
+    피크마다 뒤따르는 fan_out개의 피크와 쌍을 만들어 (f1, f2, Δt)를 32비트 정수로 묶은 해시 집합을 반환합니다.
+    절대 시간을 쓰지 않으므로 녹음 시작 위치가 달라도, 재인코딩으로 약간의 피크가 바뀌어도 대부분의 해시가 유지됩니다.
+    Δt는 dt_step 프레임 단위로 양자화하여 프레임 경계가 어긋난(시작 위치가 hop 단위가 아닌) 녹음도 같은 해시가 되게 합니다.
+    """
+    if len(peaks) < 2:
+        return np.empty(0, dtype=np.uint32)
+    freq_mask = (1 << _FREQ_BITS) - 1
+    hashes = []
+    for offset in range(1, fan_out + 1):
+        anchor, target = peaks[:-offset], peaks[offset:]
+        delta = target[:, 0] - anchor[:, 0]
+        valid = (delta > 0) & (delta <= max_dt)
+        packed = ((anchor[valid, 1].astype(np.uint32) & freq_mask) << (_FREQ_BITS + _DT_BITS)) \
+            | ((target[valid, 1].astype(np.uint32) & freq_mask) << _DT_BITS) \
+            | (delta[valid] // dt_step).astype(np.uint32)
+        hashes.append(packed)
+    return np.unique(np.concatenate(hashes))
+
+
+def minhash_signature(hashes: np.ndarray, params: np.ndarray) -> np.ndarray:
+    """해시 집합의 MinHash 서명 (num_perm,) uint32. 두 서명의 일치 비율이 두 집합의 Jaccard 유사도 추정값입니다."""
+    if hashes.size == 0:
+        return np.full(params.shape[1], _EMPTY_HASH, dtype=np.uint32)
+    a, b = params
+    x = hashes.astype(np.uint64)[:, None] % _MERSENNE_PRIME
+    return ((a[None, :] * x + b[None, :]) % _MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+
+
+def minhash_params(num_perm: int, seed: int = 1) -> np.ndarray:
+    """(2, num_perm) uint64 MinHash 계수. 같은 seed면 항상 같은 값이므로 저장된 서명과 호환됩니다."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+    b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+    return np.stack([a, b])
+
+
+def _fingerprint_worker(task: Tuple[str, str, dict]) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    """프로세스 풀 워커: 파일 하나를 디코딩하고 MinHash 서명을 계산합니다. (피클 가능한 최상위 함수)"""
+    goods_no, path, params = task
+    try:
+        pcm = decode_audio(path, params['sample_rate'], params['max_seconds'])
+        logmel = log_mel_spectrogram(pcm, params['sample_rate'], params['n_fft'], params['hop_length'],
+                                     params['n_mels'])
+        hashes = peak_pair_hashes(spectral_peaks(logmel), fan_out=params['fan_out'])
+        return goods_no, minhash_signature(hashes, minhash_params(params['num_perm'], params['seed'])), None
+    except Exception as e:
+        return goods_no, None, str(e)
+
+
+class LSHIndex:
+    """
+    MinHash 서명에 대한 밴딩(banding) LSH 인덱스입니다.
+
+    서명을 bands개의 구간으로 나누고, 구간 값이 같은 항목끼리 같은 버킷에 넣습니다.
+    질의는 같은 버킷에 들어 있는 후보만 서명으로 비교하므로 전체 쌍 비교(O(n²)) 없이 근접 중복을 찾습니다.
+    서명은 연속된 uint32 행렬(n, num_perm)로 보관하고, 버킷은 로드 시 다시 만듭니다.
+    params는 서명을 만든 지문 설정(STFT, fan_out, seed 등)이며, 함께 저장되어 설정이 바뀌면 인덱스를 새로 만듭니다.
+    """
+
+    def __init__(self, num_perm: int = 120, bands: int = 40, params: Optional[dict] = None):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})로 나누어떨어져야 합니다.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.params = dict(params or {})
+        self._clear()
+
+    def _clear(self):
+        self.keys: List[str] = []
+        self.sources: List[str] = []
+        self.mtimes: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._signatures = np.empty((0, self.num_perm), dtype=np.uint32)
+        self._size = 0
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def position_of(self, key: str) -> Optional[int]:
+        return self._positions.get(key)
+
+    @property
+    def signatures(self) -> np.ndarray:
+        return self._signatures[:self._size]
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def insert(self, key: str, signature: np.ndarray, source: str = '', mtime: int = 0):
+        """항목을 추가합니다. 이미 있는 key면 서명을 교체합니다. (교체 시 이전 버킷 항목은 질의 때 걸러집니다)"""
+        signature = np.ascontiguousarray(signature, dtype=np.uint32)
+        position = self._positions.get(key)
+        if position is None:
+            position = self._size
+            if position == len(self._signatures):  # 용량을 두 배로 늘림 (삽입 O(1) 분할 상환)
+                grown = np.empty((max(16, 2 * len(self._signatures)), self.num_perm), dtype=np.uint32)
+                grown[:position] = self._signatures[:position]
+                self._signatures = grown
+            self._positions[key] = position
+            self.keys.append(key)
+            self.sources.append(source)
+            self.mtimes.append(mtime)
+            self._size += 1
+        else:
+            self.sources[position] = source
+            self.mtimes[position] = mtime
+        self._signatures[position] = signature
+        if np.all(signature == _EMPTY_HASH):
+            return  # 피크가 없는 (무음 등) 파일은 버킷에 넣지 않음
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(position)
+
+    def retain(self, keys: Set[str]) -> int:
+        """keys에 없는 항목을 제거하고 버킷을 다시 만듭니다. 제거한 항목 수를 반환합니다."""
+        kept = [position for position, key in enumerate(self.keys) if key in keys]
+        removed = self._size - len(kept)
+        if removed == 0:
+            return 0
+        entries = [(self.keys[p], self._signatures[p].copy(), self.sources[p], self.mtimes[p]) for p in kept]
+        self._clear()
+        for key, signature, source, mtime in entries:
+            self.insert(key, signature, source, mtime)
+        return removed
+
+    def query(self, signature: np.ndarray, threshold: float,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """서명과 추정 Jaccard 유사도가 threshold 이상인 (key, 유사도) 목록을 유사도 내림차순으로 반환합니다."""
+        signature = np.asarray(signature, dtype=np.uint32)
+        if np.all(signature == _EMPTY_HASH):
+            return []
+        candidates: Set[int] = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        if exclude is not None and exclude in self._positions:
+            candidates.discard(self._positions[exclude])
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures[positions] == signature[None, :]).mean(axis=1)
+        order = np.argsort(-similarity)
+        return [(self.keys[positions[i]], float(similarity[i])) for i in order if similarity[i] >= threshold]
+
+    # --- 저장/로드 ---
+
+    def save(self, path: str):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, num_perm=self.num_perm, bands=self.bands,
+                     params=np.array(json.dumps(self.params, sort_keys=True)), signatures=self.signatures,
+                     keys=np.array(self.keys, dtype=str), sources=np.array(self.sources, dtype=str),
+                     mtimes=np.array(self.mtimes, dtype=np.int64))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, num_perm: int, bands: int, params: Optional[dict] = None) -> "LSHIndex":
+        """
+        저장된 인덱스를 읽습니다. 파일이 없거나 서명 설정(num_perm/bands) 또는 지문 설정(params)이
+        저장 당시와 다르면 빈 인덱스를 반환합니다. (이전 설정으로 만든 서명과는 비교할 수 없으므로)
+        """
+        index = cls(num_perm, bands, params)
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            saved_params = json.loads(str(data['params'])) if 'params' in data.files else None
+            if int(data['num_perm']) != num_perm or int(data['bands']) != bands or saved_params != index.params:
+                logger.info("  [중복] 서명 설정이 바뀌어 지문 인덱스를 새로 만듭니다.")
+                return index
+            for key, signature, source, mtime in zip(data['keys'], data['signatures'], data['sources'],
+                                                     data['mtimes']):
+                index.insert(str(key), signature, str(source), int(mtime))
+        return index
+
+
+class DuplicateDetector:
+    """
+    다운로드된 오디오마다 스펙트럴 피크 쌍 해시 → MinHash 서명(음향 지문)을 계산하여 LSH 인덱스에 넣고,
+    근접 중복(같은 녹음의 재사용, 재인코딩, 재등록 차량)을 묶어 메타데이터의 duplicate_group 컬럼에 기록합니다.
+
+    - 새로 추가되었거나 바뀐 파일만 지문을 계산합니다. (인덱스는 data/fingerprints/lsh_index.npz)
+    - 그룹은 추정 Jaccard 유사도가 threshold 이상인 쌍을 union-find로 묶은 것이며,
+      그룹 ID는 그룹에서 가장 작은 goodsNo입니다. 중복이 없는 차량은 빈 값입니다.
+    - 재인코딩/잡음이 섞인 같은 녹음도 피크 쌍 Jaccard는 0.3~0.5 정도에 그치므로, 밴드당 행 수를 3으로 작게 잡아
+      (120 = 40 x 3) 유사도 0.3인 쌍도 약 67% 확률로 후보가 되게 합니다. 유사도 0.1 이하 쌍의 후보 확률은 약 4%입니다.
+    """
+
+    def __init__(self, data_manager, output_dir: str, num_perm: int = 120, bands: int = 40, threshold: float = 0.25,
+                 sample_rate: int = 16000, n_fft: int = 1024, hop_length: int = 256, n_mels: int = 64,
+                 max_seconds: float = 30.0, fan_out: int = 5, seed: int = 1, workers: Optional[int] = None):
+        self.data_manager = data_manager
+        self.output_dir = output_dir
+        self.index_path = os.path.join(output_dir, 'lsh_index.npz')
+        self.threshold = threshold
+        self.workers = workers
+        self.num_perm = num_perm
+        self.bands = bands
+        self.params = {
+            'sample_rate': sample_rate, 'n_fft': n_fft, 'hop_length': hop_length, 'n_mels': n_mels,
+            'max_seconds': max_seconds, 'fan_out': fan_out, 'num_perm': num_perm, 'seed': seed,
+        }
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "DuplicateDetector":
+        settings = config_loader.get('dedup', expected_type=dict, default={})
+        return cls(
+            data_manager,
+            os.path.join(data_manager.get_base_data_path(), 'fingerprints'),
+            num_perm=settings.get('num_perm', 120),
+            bands=settings.get('bands', 40),
+            threshold=settings.get('threshold', 0.25),
+            max_seconds=settings.get('max_seconds', 30.0),
+            fan_out=settings.get('fan_out', 5),
+            workers=settings.get('workers'),
+        )
+
+    def find_audio_files(self) -> Dict[str, str]:
+        """goodsNo → 오디오 파일 경로 매핑을 반환합니다. (폴더당 첫 번째 오디오 파일)"""
+        files = {}
+        root = self.data_manager.vehicle_assets_dir
+        if not os.path.isdir(root):
+            return files
+        for goods_no in sorted(os.listdir(root)):
+            asset_dir = os.path.join(root, goods_no)
+            if not os.path.isdir(asset_dir):
+                continue
+            candidates = sorted(p for p in os.listdir(asset_dir) if p.lower().endswith(AUDIO_EXTENSIONS))
+            if candidates:
+                files[goods_no] = os.path.join(asset_dir, candidates[0])
+        return files
+
+    def update_index(self, index: LSHIndex) -> Dict[str, int]:
+        """새로 추가되었거나 바뀐 파일의 지문을 계산하여 인덱스에 넣고, 오디오가 사라진 항목은 제거합니다."""
+        audio_files = self.find_audio_files()
+        removed = index.retain(set(audio_files))
+        tasks = []
+        for goods_no, path in audio_files.items():
+            mtime = os.stat(path).st_mtime_ns
+            position = index.position_of(goods_no)
+            if position is None or index.sources[position] != path or index.mtimes[position] != mtime:
+                tasks.append((goods_no, path, self.params))
+        stats = {'total': len(audio_files), 'fingerprinted': 0, 'failed': 0, 'removed': removed}
+        print(f"  [중복] 오디오 {len(audio_files)}개 중 {len(tasks)}개 파일의 지문을 계산합니다. "
+              f"(사라진 항목 {removed}개 제거)")
+        if not tasks:
+            if removed:
+                index.save(self.index_path)
+            return stats
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_fingerprint_worker, task) for task in tasks]
+            for future in as_completed(futures):
+                goods_no, signature, error = future.result()
+                if error:
+                    logger.warning(f"  [중복] goodsNo {goods_no} 지문 계산 실패: {error}")
+                    stats['failed'] += 1
+                    continue
+                path = audio_files[goods_no]
+                index.insert(goods_no, signature, path, os.stat(path).st_mtime_ns)
+                stats['fingerprinted'] += 1
+                metrics.inc('audio_fingerprints')
+        index.save(self.index_path)
+        return stats
+
+    def find_groups(self, index: LSHIndex) -> Dict[str, str]:
+        """근접 중복 쌍을 union-find로 묶어 goodsNo → 그룹 ID(그룹 내 최소 goodsNo)를 반환합니다. (2개 이상인 그룹만)"""
+        parent = list(range(len(index)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for position, key in enumerate(index.keys):
+            for other_key, _ in index.query(index.signatures[position], self.threshold, exclude=key):
+                a, b = find(position), find(index.position_of(other_key))
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+        members: Dict[int, List[str]] = {}
+        for position, key in enumerate(index.keys):
+            members.setdefault(find(position), []).append(key)
+        groups = {}
+        for keys in members.values():
+            if len(keys) > 1:
+                group_id = min(keys)
+                groups.update((key, group_id) for key in keys)
+        return groups
+
+    def run(self) -> Dict[str, int]:
+        """지문 인덱스를 갱신하고 중복 그룹을 메타데이터에 기록한 뒤 통계를 반환합니다."""
+        started_at = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+        index = LSHIndex.load(self.index_path, self.num_perm, self.bands, self.params)
+        stats = self.update_index(index)
+        groups = self.find_groups(index)
+        self.data_manager.update_duplicate_groups(groups)
+        stats['duplicates'] = len(groups)
+        stats['groups'] = len(set(groups.values()))
+        metrics.set_gauge('duplicate_groups', stats['groups'])
+        metrics.observe('dedup_seconds', time.monotonic() - started_at)
+        print(f"  [중복] 완료: {stats}")
+        return stats
@@ -0,0 +1,244 @@
+# src/columnar_store.py
+
+import datetime
+import glob
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from src.metrics import metrics
+from src.value_converters import CONVERTERS
+
+logger = logging.getLogger(__name__)
+
+# 메타데이터 컬럼별 저장 타입
+# - category: 사전(dictionary) 인코딩 문자열
+# - int8/int16/int32, float32, bool, date, str
+METADATA_COLUMN_TYPES = {
+    "audio_file_path": "str", "data_label": "category", "goodsNo": "str", "vehicle_name": "str",
+    "first_registration_date": "date", "year": "int16", "current_mileage_km": "int32",
+    "vehicle_type": "category", "seating_capacity": "int8", "fuel_type": "category", "displacement_cc": "int32",
+    "drivetrain": "category", "transmission_type": "category", "exterior_color": "category",
+    "interior_color": "category", "vehicle_number": "str", "popular_package_applied": "bool",
+    "certified_inspection_passed": "bool", "inspection_date": "date", "oil_filter_changed": "bool",
+    "ac_filter_changed": "bool", "wiper_blades_changed": "bool", "washer_fluid_replenished": "bool",
+    "warranty_remaining_km": "int32", "warranty_remaining_months": "int16",
+    "my_car_damage_reported": "bool", "owner_changed": "bool", "liens_encumbrances_exist": "bool",
+    "overall_score": "float32", "mid_freq_score": "float32", "low_high_freq": "float32",
+    "audible_range_score": "float32", "regularity": "float32", "irregularity": "float32",
+    "specific_anomaly": "bool", "jessino": "str",
+}
+
+# 문자열 원본 값을 저장 타입으로 바꿀 때 사용할 변환 함수
+_CONVERTER_BY_STORAGE_TYPE = {
+    "str": CONVERTERS['str'], "category": CONVERTERS['str'],
+    "int8": CONVERTERS['int'], "int16": CONVERTERS['int'], "int32": CONVERTERS['int'],
+    "float32": CONVERTERS['float'], "bool": CONVERTERS['bool'], "date": CONVERTERS['date'],
+}
+_COLUMN_CONVERTER_OVERRIDES = {
+    "warranty_remaining_months": CONVERTERS['months_from_korean_duration'],
+}
+
+# 정수 저장 타입의 표현 범위 (범위를 벗어난 값은 결측으로 저장)
+_INT_RANGES = {"int8": (-2 ** 7, 2 ** 7 - 1), "int16": (-2 ** 15, 2 ** 15 - 1), "int32": (-2 ** 31, 2 ** 31 - 1)}
+
+PARTITION_COLUMN = "crawl_date"
+REJECTED_ROWS_FILE = "_rejected_rows.jsonl"  # '_'로 시작하는 파일은 pyarrow 데이터셋 탐색에서 제외됨
+TIMESTAMP_COLUMN = "crawled_at"
+
+
+def _import_pyarrow():
+    """pyarrow는 선택 의존성이므로 실제로 필요할 때만 임포트합니다."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet 저장소를 사용하려면 pyarrow가 필요합니다. (pip install pyarrow)") from e
+    return pa, pq
+
+
+def convert_value(column: str, value: Any) -> Any:
+    """
+    메타데이터 컬럼 하나의 값을 저장 타입에 맞는 파이썬 값으로 변환합니다. (이미 변환된 값은 그대로)
+    변환할 수 없거나 저장 타입의 범위를 벗어난 값(int8 컬럼의 '300' 등)은 예외 대신 None이 됩니다.
+    """
+    storage_type = METADATA_COLUMN_TYPES[column]
+    converter = _COLUMN_CONVERTER_OVERRIDES.get(column, _CONVERTER_BY_STORAGE_TYPE[storage_type])
+    try:
+        converted = converter(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    int_range = _INT_RANGES.get(storage_type)
+    if int_range is not None and converted is not None and not int_range[0] <= converted <= int_range[1]:
+        logger.debug("  [Parquet] %s 값 %r이(가) %s 범위를 벗어나 결측으로 저장합니다.", column, value, storage_type)
+        return None
+    return converted
+
+
+def convert_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """메타데이터 한 행을 METADATA_COLUMN_TYPES에 맞는 파이썬 값으로 변환합니다."""
+    return {column: convert_value(column, row.get(column)) for column in METADATA_COLUMN_TYPES}
+
+
+def _latest_rows(df):
+    """
+    goodsNo별로 가장 나중에 저장된 행만 남깁니다.
+    crawled_at은 초 단위이므로 같은 초에 두 번 저장된 경우를 위해 안정 정렬을 사용하여, 시각이 같으면
+    읽은 순서(part 파일 이름 = 기록 시각 순, 파일 안에서는 추가한 순서)가 뒤인 행을 최신으로 봅니다.
+    """
+    return (df.sort_values(TIMESTAMP_COLUMN, kind='stable')
+            .drop_duplicates(subset=['goodsNo'], keep='last'))
+
+
+class ColumnarMetadataStore:
+    """
+    car_audio_metadata를 타입이 지정된 Parquet 데이터셋으로 관리합니다.
+
+    data/metadata_parquet/crawl_date=YYYY-MM-DD/part-*.parquet 형태의 hive 파티션 구조를 사용하며,
+    저장된 행은 메모리에 버퍼링되었다가 flush_rows개마다 새 part 파일로 추가됩니다. (기존 파일은 다시 쓰지 않음)
+    같은 goodsNo가 여러 번 저장된 경우 읽을 때 crawled_at이 가장 최신인 행만 남깁니다.
+    """
+
+    def __init__(self, root_dir: str, flush_rows: int = 200):
+        self.root_dir = root_dir
+        self.flush_rows = max(1, flush_rows)
+        self._buffer: List[Dict[str, Any]] = []
+
+    def _schema(self):
+        pa, _ = _import_pyarrow()
+        arrow_types = {
+            "str": pa.string(), "category": pa.dictionary(pa.int32(), pa.string()),
+            "int8": pa.int8(), "int16": pa.int16(), "int32": pa.int32(),
+            "float32": pa.float32(), "bool": pa.bool_(), "date": pa.date32(),
+        }
+        fields = [pa.field(column, arrow_types[storage_type])
+                  for column, storage_type in METADATA_COLUMN_TYPES.items()]
+        fields.append(pa.field(TIMESTAMP_COLUMN, pa.timestamp('s')))
+        return pa.schema(fields)
+
+    @staticmethod
+    def _new_part_path(partition_dir: str) -> str:
+        return os.path.join(partition_dir, f"part-{time.strftime('%H%M%S')}-{time.time_ns() % 10 ** 9:09d}.parquet")
+
+    def append(self, row: Dict[str, Any], crawled_at: Optional[datetime.datetime] = None):
+        """한 행을 변환하여 버퍼에 추가하고, 버퍼가 가득 차면 파일로 기록합니다."""
+        converted = convert_row(row)
+        converted[TIMESTAMP_COLUMN] = (crawled_at or datetime.datetime.now()).replace(microsecond=0)
+        self._buffer.append(converted)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def _build_table(self, pa, schema, rows: List[Dict[str, Any]]):
+        arrays = []
+        for field in schema:
+            values = [row.get(field.name) for row in rows]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _quarantine(self, rows: List[Dict[str, Any]], error: Exception):
+        """Arrow 배열로 만들 수 없는 행을 _rejected_rows.jsonl에 따로 기록합니다. (데이터셋에는 포함되지 않음)"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        with open(os.path.join(self.root_dir, REJECTED_ROWS_FILE), 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({'error': str(error), 'row': row}, ensure_ascii=False, default=str) + '\n')
+        metrics.inc('parquet_rows_rejected', len(rows))
+        logger.warning(f"  [경고] Parquet로 변환할 수 없는 {len(rows)}개 행을 {REJECTED_ROWS_FILE}에 격리했습니다. ({error})")
+
+    def _table_for(self, pa, schema, rows: List[Dict[str, Any]]):
+        """
+        rows로 테이블을 만듭니다. 실패하면 행 단위로 다시 검사하여 변환되지 않는 행만 격리하고 나머지로 만듭니다.
+        남는 행이 없으면 None을 반환합니다.
+        """
+        try:
+            return self._build_table(pa, schema, rows)
+        except (pa.ArrowException, TypeError, ValueError, OverflowError):
+            pass
+        valid = []
+        for row in rows:
+            try:
+                self._build_table(pa, schema, [row])
+            except (pa.ArrowException, TypeError, ValueError, OverflowError) as e:
+                self._quarantine([row], e)
+            else:
+                valid.append(row)
+        return self._build_table(pa, schema, valid) if valid else None
+
+    def flush(self) -> int:
+        """
+        버퍼에 쌓인 행을 크롤링 날짜별 part 파일로 기록하고 기록한 행 수를 반환합니다.
+        버퍼는 기록 전에 비우므로, 변환되지 않는 행(격리됨)이나 쓰기 오류가 이후 저장을 계속 실패시키지 않습니다.
+        """
+        if not self._buffer:
+            return 0
+        pa, pq = _import_pyarrow()
+        schema = self._schema()
+        started_at = time.monotonic()
+
+        buffered, self._buffer = self._buffer, []
+        rows_by_date: Dict[datetime.date, List[Dict[str, Any]]] = {}
+        for row in buffered:
+            rows_by_date.setdefault(row[TIMESTAMP_COLUMN].date(), []).append(row)
+
+        written = 0
+        for crawl_date, rows in rows_by_date.items():
+            table = self._table_for(pa, schema, rows)
+            if table is None:
+                continue
+            partition_dir = os.path.join(self.root_dir, f"{PARTITION_COLUMN}={crawl_date.isoformat()}")
+            os.makedirs(partition_dir, exist_ok=True)
+            pq.write_table(table, self._new_part_path(partition_dir), compression='zstd')
+            written += table.num_rows
+
+        logger.debug("  [Parquet] %d개 행을 %s에 기록했습니다. (%.3fs)", written, self.root_dir,
+                     time.monotonic() - started_at)
+        return written
+
+    def load(self, columns: Optional[List[str]] = None, latest_only: bool = True):
+        """
+        전체 데이터셋을 pandas DataFrame으로 로드합니다. (버퍼에 남은 행은 먼저 flush됩니다)
+        latest_only=True이면 goodsNo별로 가장 최근에 저장된 행만 반환합니다.
+        """
+        self.flush()
+        _import_pyarrow()
+        import pyarrow.dataset as ds
+
+        if not glob.glob(os.path.join(self.root_dir, '*', '*.parquet')):
+            return None
+        dataset = ds.dataset(self.root_dir, format='parquet', partitioning='hive')
+        if columns is not None and latest_only:
+            columns = list(dict.fromkeys(list(columns) + ['goodsNo', TIMESTAMP_COLUMN]))
+        df = dataset.to_table(columns=columns).to_pandas()
+        if latest_only and not df.empty:
+            df = _latest_rows(df).reset_index(drop=True)
+        return df
+
+    def goods_nos(self) -> set:
+        """데이터셋에 이미 들어 있는 goodsNo 집합을 반환합니다. (버퍼 포함)"""
+        df = self.load(columns=['goodsNo'], latest_only=False)
+        return set() if df is None else set(df['goodsNo'].dropna().astype(str))
+
+    def compact(self) -> int:
+        """
+        파티션별로 작은 part 파일들을 하나로 합칩니다. (goodsNo별 최신 행만 유지)
+        flush마다 part 파일이 하나씩 늘어나므로 크롤링 종료 시와 export 후에 호출됩니다. 합친 파티션 수를 반환합니다.
+        """
+        self.flush()
+        pa, pq = _import_pyarrow()
+        compacted = 0
+        for partition_dir in sorted(glob.glob(os.path.join(self.root_dir, f"{PARTITION_COLUMN}=*"))):
+            parts = sorted(glob.glob(os.path.join(partition_dir, '*.parquet')))
+            if len(parts) <= 1:
+                continue
+            table = pa.concat_tables([pq.read_table(p, schema=self._schema()) for p in parts])
+            df = _latest_rows(table.to_pandas())
+            pq.write_table(pa.Table.from_pandas(df, schema=self._schema(), preserve_index=False),
+                           self._new_part_path(partition_dir), compression='zstd')
+            for p in parts:
+                os.remove(p)
+            compacted += 1
+        return compacted
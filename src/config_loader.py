@@ -1,7 +1,97 @@
 import json
 import os
 import copy
-from typing import Type, Union, Tuple, Any
+import threading
+from typing import Type, Union, Tuple, Any, Dict, Optional, Callable
+
+_MISSING = object()
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("설정 스냅샷은 읽기 전용입니다. 값을 바꾸려면 설정 파일을 수정한 뒤 다시 로드하세요.")
+
+
+class FrozenDict(dict):
+    """
+    수정할 수 없는 dict입니다. isinstance(value, dict) 검사와 json 직렬화는 그대로 동작하며,
+    pickle 시 원본 dict 하나만 전달되므로 워커 프로세스로 저렴하게 보낼 수 있습니다.
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class FrozenList(list):
+    """수정할 수 없는 list입니다. (FrozenDict와 같은 이유로 list를 상속합니다)"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(value: Any) -> Any:
+    """JSON에서 읽은 값을 재귀적으로 FrozenDict/FrozenList로 변환합니다."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+class ConfigSnapshot:
+    """
+    load_config 시점에 검증을 마친 설정의 불변 스냅샷입니다.
+    모든 점(.) 경로를 미리 평탄화한 인덱스를 가지고 있어 조회가 딕셔너리 조회 한 번(O(1))으로 끝나며,
+    pickle이 가능하므로 ProcessPoolExecutor 워커에 그대로 전달할 수 있습니다. (JSON 재파싱 없음)
+    """
+
+    __slots__ = ("data", "_index")
+
+    def __init__(self, data: dict):
+        self.data = freeze(data)
+        self._index: Dict[str, Any] = {}
+        self._build_index(self.data, "")
+
+    def _build_index(self, node: dict, prefix: str):
+        for key, value in node.items():
+            path = f"{prefix}{key}"
+            self._index[path] = value
+            if isinstance(value, dict):
+                self._build_index(value, path + ".")
+
+    def __getstate__(self):
+        return self.data  # 인덱스는 수신 측에서 다시 만듭니다.
+
+    def __setstate__(self, data):
+        self.data = data
+        self._index = {}
+        self._build_index(self.data, "")
+
+    def __contains__(self, key_path: str) -> bool:
+        return key_path in self._index
+
+    def __getitem__(self, key_path: str) -> Any:
+        return self._index[key_path]
+
+    def get(self, key_path: str, default: Any = None) -> Any:
+        return self._index.get(key_path, default)
 
 
 class ConfigLoader:
@@ -9,6 +99,25 @@ class ConfigLoader:
         self.config_path = config_path
         self.default_config_path = default_config_path
         self._config = None
+        # (스냅샷, get 캐시) 쌍. 핫 리로드 시 두 값을 한 번의 대입으로 함께 교체합니다.
+        # get 캐시: (key_path, expected_type) → ('ok', 값) 또는 ('error', 예외). 스냅샷이 불변이므로 결과를 계속 재사용합니다.
+        self._state: Tuple[Optional[ConfigSnapshot], Dict[Tuple[str, Any], Tuple[str, Any]]] = (None, {})
+        self._loaded_mtime_ns: Optional[int] = None
+        self._watch_stop: Optional[threading.Event] = None
+
+    @property
+    def snapshot(self) -> Optional[ConfigSnapshot]:
+        return self._state[0]
+
+    def _set_snapshot(self):
+        self._state = (ConfigSnapshot(self._config), {})
+        self._loaded_mtime_ns = self._config_mtime_ns()
+
+    def _config_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
 
     def load_config(self):
         if not os.path.exists(self.config_path):
@@ -19,6 +128,7 @@ class ConfigLoader:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 self._config = json.load(f)
             self._validate_config()
+            self._set_snapshot()
             print(f"'{self.config_path}' 설정 파일을 성공적으로 로드했습니다.")
             return copy.deepcopy(self._config)
         except (json.decoder.JSONDecodeError, ValueError) as e:
@@ -28,6 +138,7 @@ class ConfigLoader:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 self._config = json.load(f)
             self._validate_config()
+            self._set_snapshot()
             print(f"기본 설정으로 '{self.config_path}' 파일을 재생성하고 로드했습니다.")
             return copy.deepcopy(self._config)
 
@@ -36,68 +147,126 @@ class ConfigLoader:
         점(.)으로 구분된 키 경로를 사용하여 설정 값을 가져옵니다.
         키를 찾을 수 없거나 타입 캐스팅 실패 시, default 값이 주어지면 default를 반환합니다.
         default 값이 없고 유효하지 않으면 ValueError를 발생시킵니다.
+        조회/캐스팅 결과는 (경로, 타입)별로 캐시되므로 같은 키를 반복 조회해도 비용이 거의 없습니다.
+        반환되는 dict/list는 읽기 전용(FrozenDict/FrozenList)입니다.
         """
-        if self._config is None:
+        snapshot, get_cache = self._state
+        if snapshot is None:
             raise RuntimeError("오류: 설정 파일이 아직 로드되지 않았습니다. load_config()를 먼저 호출하세요.")
 
-        keys = key_path.split('.')
-        current_data_node = self._config
-
-        try:
-            for i, key in enumerate(keys):
-                if not isinstance(current_data_node, dict):
-                    raise ValueError(
-                        f"경로 '{key_path}' 탐색 중 오류: '{'.'.join(keys[:i])}'의 값 '{current_data_node}'이(가) 딕셔너리가 아닙니다. (타입: {type(current_data_node)})")
-
-                if key not in current_data_node:
-                    raise ValueError(f"필수 키 '{key}'이(가) '{'.'.join(keys[:i])}' 경로에 누락되었습니다. (전체 경로: {key_path})")
-
-                current_data_node = current_data_node[key]
-
-            final_value = current_data_node
-
-            if final_value is None:
-                if expected_type is not None and isinstance(expected_type, tuple) and type(None) in expected_type:
-                    return None
-                else:
-                    raise ValueError(f"경로 '{key_path}'의 값이 'null'(None)입니다. 'null' 값은 허용되지 않습니다.")
+        cache_key = (key_path, expected_type)
+        cached = get_cache.get(cache_key)
+        if cached is None:
+            try:
+                cached = ('ok', self._resolve(snapshot, key_path, expected_type))
+            except (ValueError, TypeError) as e:
+                cached = ('error', e)
+            get_cache[cache_key] = cached
+
+        status, result = cached
+        if status == 'ok':
+            return result
+        if default is not None:
+            print(f"경고(ConfigLoader.get): 설정 경로 '{key_path}' 접근/캐스팅 중 오류 발생: {result}. 기본값 '{default}' 반환.")
+            return default
+        raise ValueError(f"오류(ConfigLoader.get): 설정 경로 '{key_path}' 접근/캐스팅 중 치명적인 오류 발생: {result}")
+
+    @staticmethod
+    def _resolve(snapshot: ConfigSnapshot, key_path: str, expected_type: Union[Type, Tuple[Type, ...]] = None) -> Any:
+        """스냅샷 인덱스에서 값을 찾아 expected_type에 맞게 검사/캐스팅합니다. (get의 캐시 미스 시 호출)"""
+        final_value = snapshot.get(key_path, _MISSING)
+        if final_value is _MISSING:
+            raise ValueError(f"필수 키 경로 '{key_path}'을(를) 설정에서 찾을 수 없습니다.")
+
+        if final_value is None:
+            if expected_type is not None and isinstance(expected_type, tuple) and type(None) in expected_type:
+                return None
+            else:
+                raise ValueError(f"경로 '{key_path}'의 값이 'null'(None)입니다. 'null' 값은 허용되지 않습니다.")
 
-            if expected_type is not None:
-                if isinstance(expected_type, tuple):
-                    if not isinstance(final_value, expected_type):
-                        raise TypeError(
-                            f"'{key_path}' 값 '{final_value}' ({type(final_value)})이(가) 예상 타입 {expected_type} 중 하나가 아닙니다.")
-                else:
-                    if not isinstance(final_value, expected_type):
-                        if expected_type is int and isinstance(final_value, float):
-                            final_value = int(final_value)
-                        elif expected_type is bool and isinstance(final_value, str):
-                            if final_value.lower() == 'true':
-                                final_value = True
-                            elif final_value.lower() == 'false':
-                                final_value = False
-                            else:
-                                raise TypeError("Boolean 문자열 변환 실패")
+        if expected_type is not None:
+            if isinstance(expected_type, tuple):
+                if not isinstance(final_value, expected_type):
+                    raise TypeError(
+                        f"'{key_path}' 값 '{final_value}' ({type(final_value)})이(가) 예상 타입 {expected_type} 중 하나가 아닙니다.")
+            else:
+                if not isinstance(final_value, expected_type):
+                    if expected_type is int and isinstance(final_value, float):
+                        final_value = int(final_value)
+                    elif expected_type is bool and isinstance(final_value, str):
+                        if final_value.lower() == 'true':
+                            final_value = True
+                        elif final_value.lower() == 'false':
+                            final_value = False
                         else:
-                            raise TypeError(
-                                f"'{key_path}' 값 '{final_value}' ({type(final_value)})의 형식이 올바르지 않습니다. 예상: {expected_type}, 실제: {type(final_value)}")
+                            raise TypeError("Boolean 문자열 변환 실패")
+                    else:
+                        raise TypeError(
+                            f"'{key_path}' 값 '{final_value}' ({type(final_value)})의 형식이 올바르지 않습니다. 예상: {expected_type}, 실제: {type(final_value)}")
 
-                    if not isinstance(final_value, expected_type):
-                        final_value = expected_type(final_value)
+                if not isinstance(final_value, expected_type):
+                    final_value = expected_type(final_value)
 
-            return final_value
+        return final_value
 
-        except (ValueError, TypeError) as e:
-            if default is not None:
-                print(f"경고(ConfigLoader.get): 설정 경로 '{key_path}' 접근/캐스팅 중 오류 발생: {e}. 기본값 '{default}' 반환.")
-                return default
-            raise ValueError(f"오류(ConfigLoader.get): 설정 경로 '{key_path}' 접근/캐스팅 중 치명적인 오류 발생: {e}")
+    def reload_if_changed(self, on_change: Optional[Callable[[ConfigSnapshot], None]] = None) -> bool:
+        """
+        설정 파일의 수정 시각이 바뀌었으면 다시 읽고 검증한 뒤, data_selectors만 실행 중인 설정에 반영합니다.
+        그 외 설정(브라우저, 경로, 대기 시간 등)은 실행 중인 객체가 이미 사용하고 있으므로 기존 값을 유지하며,
+        재시작 후에 적용됩니다.
+        on_change(새 스냅샷)가 주어지면 교체 전에 호출되며, 여기서 예외가 발생하면 변경을 거부합니다.
+        (예: 새 data_selectors로 PageParser를 컴파일하다 실패한 경우)
+        load_config와 달리 유효하지 않은 파일을 기본 설정으로 덮어쓰지 않고, 기존 설정을 그대로 유지합니다.
+        변경이 적용되면 True를 반환합니다.
+        """
+        mtime_ns = self._config_mtime_ns()
+        if mtime_ns is None or mtime_ns == self._loaded_mtime_ns:
+            return False
+        self._loaded_mtime_ns = mtime_ns  # 같은 (잘못된) 파일을 반복해서 검사하지 않도록 먼저 기록
 
-    def _validate_config(self):
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                candidate = json.load(f)
+            self._validate_config(candidate)
+            merged = copy.deepcopy(self._config)
+            merged['data_selectors'] = candidate['data_selectors']
+            snapshot = ConfigSnapshot(merged)
+            if on_change is not None:
+                on_change(snapshot)
+        except Exception as e:  # 어떤 이유로든 적용할 수 없는 설정이면 기존 설정을 유지합니다.
+            print(f"경고: 변경된 '{self.config_path}' 설정을 적용하지 않습니다. 기존 설정을 유지합니다. ({e})")
+            return False
+
+        self._config = merged
+        self._state = (snapshot, {})
+        print(f"'{self.config_path}'의 data_selectors 변경을 적용했습니다. (그 외 설정은 재시작 후 적용됩니다)")
+        return True
+
+    def start_watching(self, on_change: Optional[Callable[[ConfigSnapshot], None]] = None, interval_sec: float = 2.0):
+        """백그라운드 스레드에서 interval_sec마다 설정 파일 변경을 확인합니다. (reload_if_changed 참고)"""
+        if self._watch_stop is not None:
+            return
+        stop = threading.Event()
+        self._watch_stop = stop
+
+        def _watch():
+            while not stop.wait(interval_sec):
+                self.reload_if_changed(on_change)
+
+        threading.Thread(target=_watch, name="config-watcher", daemon=True).start()
+
+    def stop_watching(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    def _validate_config(self, config: Optional[dict] = None):
         """
         로드된 설정의 필수 키 존재 여부 및 기본 구조를 검사합니다.
         누락된 필수 키가 있거나 형식이 올바르지 않거나 값이 None (JSON null)일 경우 ValueError를 발생시킵니다.
+        config가 주어지면 self._config 대신 해당 딕셔너리를 검사합니다. (핫 리로드 후보 설정)
         """
+        config = self._config if config is None else config
 
         def _check_value(config_dict: dict, key_path_full: str, expected_type: Union[Type, Tuple[Type, ...]]):
             keys = key_path_full.split('.')
@@ -146,7 +315,7 @@ class ConfigLoader:
                     raise ValueError(f"유효성 검사 오류: '{key_path_full}' 값 '{current_value}' ({type(current_value)})을(를) "
                                      f"예상 타입 {expected_type}으로 캐스팅 실패: {e}")
 
-        self._config['crawler_settings'] = _check_value(self._config, "crawler_settings", dict)
+        config['crawler_settings'] = _check_value(config, "crawler_settings", dict)
         required_crawler_settings = {
             "user_agent": str, "request_delay_sec": (int, float), "timeout_sec": int,
             "max_retries": int, "retry_delay_sec": (int, float), "proxy_enabled": bool, "proxy_list": list,
@@ -156,14 +325,14 @@ class ConfigLoader:
             "selenium_headless": bool, "scroll_load_limit": int
         }
         for key, expected_type in required_crawler_settings.items():
-            _check_value(self._config, f"crawler_settings.{key}", expected_type)
+            _check_value(config, f"crawler_settings.{key}", expected_type)
 
-        self._config['urls'] = _check_value(self._config, "urls", dict)
+        config['urls'] = _check_value(config, "urls", dict)
         required_url_patterns = [
             "base_url", "list_page_pattern", "detail_page_pattern", "vr_page_pattern"
         ]
         for key in required_url_patterns:
-            pattern_val = _check_value(self._config, f"urls.{key}", str)
+            pattern_val = _check_value(config, f"urls.{key}", str)
             # 'list_page_pattern'에 대한 플레이스홀더 경고를 제거합니다.
             # 이 사이트는 동적 로딩이므로 URL 패턴에 플레이스홀더가 없습니다.
             if key in ["detail_page_pattern", "vr_page_pattern"] and ('{' not in pattern_val or '}' not in pattern_val):
@@ -175,13 +344,13 @@ class ConfigLoader:
             "next_page_selector", "total_count_selector", "goods_no_selector"
         ]
         for key in required_url_selectors:
-            selector_config = _check_value(self._config, f"urls.{key}", dict)
+            selector_config = _check_value(config, f"urls.{key}", dict)
             _check_value(selector_config, "type", str)
             _check_value(selector_config, "selector", str)
             # item_check_selector는 next_page_selector에 선택적으로 포함되므로 여기서 필수로 검사하지 않음
 
         # item_check_selector가 next_page_selector 안에 있다면 그 값을 검사
-        next_page_sel = self._config['urls'].get('next_page_selector')
+        next_page_sel = config['urls'].get('next_page_selector')
         if isinstance(next_page_sel, dict) and 'item_check_selector' in next_page_sel:
             item_check_sel_info = next_page_sel.get('item_check_selector')
             if isinstance(item_check_sel_info, dict):
@@ -193,12 +362,12 @@ class ConfigLoader:
                 raise ValueError(f"유효성 검사 오류: 'urls.next_page_selector.item_check_selector'의 형식이 올바르지 않습니다.")
 
                 # 3. data_selectors 검사 (업데이트)
-                self._config['data_selectors'] = _check_value(self._config, "data_selectors", dict)
+                config['data_selectors'] = _check_value(config, "data_selectors", dict)
 
                 # 각 데이터 셀렉터 항목의 필수 필드 검사
-                for key, sel_info in self._config['data_selectors'].items():
+                for key, sel_info in config['data_selectors'].items():
                     # sel_info 자체가 dict 타입이어야 함
-                    _check_value(self._config['data_selectors'], key,
+                    _check_value(config['data_selectors'], key,
                                  dict)  # 예를 들어 config['data_selectors']['vehicle_name']
 
                     # 모든 셀렉터는 'type', 'selector', 'extract_method'를 가져야 함
@@ -1,8 +1,40 @@
 # src/data_manager.py
 
+import csv
+import datetime
+import logging
 import os
-import pandas as pd
-from typing import List, Dict, Union, Any
+import time
+from typing import List, Dict, Union, Any, Optional, Tuple, TYPE_CHECKING
+
+from src.columnar_store import ColumnarMetadataStore
+from src.metrics import metrics
+from src.retry_policy import RetryPolicy
+
+if TYPE_CHECKING:  # pandas는 실제로 DataFrame을 다루는 메서드에서만 임포트합니다. (export/parse 명령의 시작 시간 단축)
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# goods_nos.csv 상태 컬럼과 기본값 (파일에 없는 컬럼은 로드 시 기본값으로 추가됩니다)
+#  - delisted: 최근 탐색에서 목록에서 사라진 차량 (판매 완료 등). 상세 수집 대상에서 제외됩니다.
+#  - audio_url_on_page: 상세 페이지에서 찾은 오디오 URL. 오디오만 재시도할 때 페이지를 다시 렌더링하지 않습니다.
+#  - attempts/next_eligible_at/last_failure: 실패 횟수, 다음 시도 가능 시각(epoch 초), 마지막 실패 분류
+#  - dead_letter: 재시도 예산을 다 써서 더 이상 요청하지 않는 goodsNo (사유는 dead_letter.csv)
+#  - first_seen_at: 처음 발견된 시각(epoch 초, 0이면 모름), discovery_rank: 최근 탐색에서 목록 내 순서(-1이면 모름)
+GOODS_NO_STATE_DEFAULTS = {
+    'data_collected': False,
+    'mp3_downloaded': False,
+    'delisted': False,
+    'audio_url_on_page': None,
+    'attempts': 0,
+    'next_eligible_at': 0.0,
+    'last_failure': None,
+    'dead_letter': False,
+    'first_seen_at': 0.0,
+    'discovery_rank': -1,
+}
+DEAD_LETTER_COLUMNS = ['goodsNo', 'failure_class', 'reason', 'attempts', 'dead_at']
 
 
 class DataManager:
@@ -11,7 +43,7 @@ class DataManager:
     CSV 파일 저장, goodsNo 목록 관리, 디버깅 HTML 저장 등을 담당합니다.
     """
 
-    def __init__(self):
+    def __init__(self, parquet_enabled: bool = False, parquet_flush_rows: int = 200):
         # 현재 스크립트 파일의 디렉토리
         current_script_dir = os.path.dirname(os.path.abspath(__file__))
         # 프로젝트 루트 디렉토리 (src의 부모 디렉토리)
@@ -21,7 +53,15 @@ class DataManager:
         self.debug_html_dir = os.path.join(self.data_dir, 'debug_html')
         self.goods_nos_csv_path = os.path.join(self.data_dir, 'goods_nos.csv')
         self.metadata_csv_path = os.path.join(self.data_dir, 'car_audio_metadata.csv')
+        self.dead_letter_csv_path = os.path.join(self.data_dir, 'dead_letter.csv')
         self.vehicle_assets_dir = os.path.join(self.data_dir, 'vehicle_assets')  # MP3 저장 경로
+        self.metadata_parquet_dir = os.path.join(self.data_dir, 'metadata_parquet')  # 타입 지정 컬럼형 데이터셋
+
+        # CSV와 함께 유지되는 Parquet 데이터셋 (pyarrow 필요, 비활성화 시 None)
+        self.columnar_store = ColumnarMetadataStore(self.metadata_parquet_dir,
+                                                    flush_rows=parquet_flush_rows) if parquet_enabled else None
+        # 저장할 때마다 갱신되는 점수 누적 통계 (enable_score_statistics 호출 시 설정, 비활성화 시 None)
+        self.score_statistics = None
 
         # 필요한 디렉토리 생성
         os.makedirs(self.data_dir, exist_ok=True)
@@ -47,72 +87,145 @@ class DataManager:
         """데이터 저장 기본 경로를 반환합니다."""
         return self.data_dir
 
-    def load_goods_nos_with_status(self) -> pd.DataFrame:
+    def load_goods_nos_with_status(self) -> 'pd.DataFrame':
         """
         goods_nos.csv 파일에서 goodsNo와 처리 상태를 로드합니다.
         파일이 없으면 빈 DataFrame을 반환하고, 필요한 컬럼을 추가합니다.
         """
+        import pandas as pd
+
         if os.path.exists(self.goods_nos_csv_path):
-            df = pd.read_csv(self.goods_nos_csv_path)
             # 필요한 컬럼이 없으면 추가하고 기본값 설정
-            if 'data_collected' not in df.columns:
-                df['data_collected'] = False
-            if 'mp3_downloaded' not in df.columns:
-                df['mp3_downloaded'] = False
-            return df
+            return self._ensure_state_columns(pd.read_csv(self.goods_nos_csv_path))
         else:
-            # 파일이 없으면 goodsNo, data_collected, mp3_downloaded 컬럼을 가진 빈 DataFrame 생성
-            return pd.DataFrame(columns=['goodsNo', 'data_collected', 'mp3_downloaded'])
+            # 파일이 없으면 goodsNo와 상태 컬럼만 가진 빈 DataFrame 생성
+            return self._ensure_state_columns(pd.DataFrame(columns=['goodsNo', *GOODS_NO_STATE_DEFAULTS]))
 
-    def save_goods_nos_with_status(self, df: pd.DataFrame):
+    @staticmethod
+    def _ensure_state_columns(df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """GOODS_NO_STATE_DEFAULTS의 컬럼을 모두 갖추고, 결측값을 기본값으로 채워 타입을 맞춥니다."""
+        for column, default in GOODS_NO_STATE_DEFAULTS.items():
+            if column not in df.columns:
+                df[column] = default
+            elif default is None:
+                df[column] = df[column].astype(object)
+            else:
+                df[column] = df[column].fillna(default).astype(type(default))
+        return df
+
+    def save_goods_nos_with_status(self, df: 'pd.DataFrame'):
         """
         goodsNo DataFrame을 goods_nos.csv 파일에 저장합니다.
         """
+        started_at = time.monotonic()
         df.to_csv(self.goods_nos_csv_path, index=False)
+        metrics.observe('state_save_seconds', time.monotonic() - started_at)
 
-    def add_new_goods_nos_to_df(self, existing_df: pd.DataFrame,
-                                new_goods_nos_list: List[Dict[str, Any]]) -> pd.DataFrame:
+    def add_new_goods_nos_to_df(self, existing_df: 'pd.DataFrame',
+                                new_goods_nos_list: List[Dict[str, Any]]) -> 'pd.DataFrame':
         """
         새로 발견된 goodsNo 목록을 기존 DataFrame에 추가합니다.
-        data_collected와 mp3_downloaded는 False로 초기화됩니다.
+        data_collected와 mp3_downloaded는 False로 초기화되고, first_seen_at은 현재 시각으로 기록됩니다.
         """
+        import pandas as pd
+
         if not new_goods_nos_list:
             return existing_df
 
         new_df = pd.DataFrame(new_goods_nos_list)
+        if 'first_seen_at' not in new_df.columns:
+            new_df['first_seen_at'] = time.time()
 
         # 기존 DataFrame과 합치기 전에 중복 제거
         combined_df = pd.concat([existing_df, new_df]).drop_duplicates(subset=['goodsNo'], keep='first')
 
         # 필요한 컬럼이 없으면 추가 (방어적 코딩)
-        if 'data_collected' not in combined_df.columns:
-            combined_df['data_collected'] = False
-        if 'mp3_downloaded' not in combined_df.columns:
-            combined_df['mp3_downloaded'] = False
+        return self._ensure_state_columns(combined_df)
+
+    def apply_listing_diff(self, df: 'pd.DataFrame', added: List[str], removed: List[str]) -> 'pd.DataFrame':
+        """
+        탐색 스냅샷 비교 결과를 goods_nos 상태에 반영합니다.
+        목록에서 사라진 goodsNo는 delisted=True로 표시하고, 다시 나타난 goodsNo는 delisted=False로 되돌립니다.
+        """
+        if 'delisted' not in df.columns:
+            df['delisted'] = False
+        goods_nos = df['goodsNo'].astype(str)
+        if removed:
+            df.loc[goods_nos.isin(removed), 'delisted'] = True
+        if added:
+            df.loc[goods_nos.isin(added), 'delisted'] = False
+        return df
 
-        return combined_df
+    def update_discovery_ranks(self, df: 'pd.DataFrame', ranks: Dict[str, int]) -> 'pd.DataFrame':
+        """이번 탐색에서의 목록 내 순서를 discovery_rank에 기록합니다. 이번에 발견되지 않은 goodsNo는 -1이 됩니다."""
+        df['discovery_rank'] = df['goodsNo'].astype(str).map(ranks).fillna(-1).astype(int)
+        return df
 
-    def update_goods_no_status(self, df: pd.DataFrame, goods_no: str, column: str, status: bool) -> pd.DataFrame:
+    def update_goods_no_status(self, df: 'pd.DataFrame', goods_no: str, column: str,
+                               status: Union[bool, int, float, str, None]) -> 'pd.DataFrame':
         """
-        특정 goodsNo의 처리 상태 (data_collected 또는 mp3_downloaded)를 업데이트합니다.
+        특정 goodsNo의 상태 컬럼(data_collected, mp3_downloaded, audio_url_on_page, attempts 등)을 업데이트합니다.
         """
+        import pandas as pd
+
         if goods_no in df['goodsNo'].values:
             df.loc[df['goodsNo'] == goods_no, column] = status
         else:
             # goodsNo가 DataFrame에 없으면 새로 추가 (이 경우 data_collected, mp3_downloaded는 False로 시작)
-            new_row = pd.DataFrame([{'goodsNo': goods_no, 'data_collected': False, 'mp3_downloaded': False}])
+            new_row = pd.DataFrame([{'goodsNo': goods_no, **GOODS_NO_STATE_DEFAULTS}])
             new_row.loc[0, column] = status  # 새로 추가된 행의 특정 컬럼만 업데이트
             df = pd.concat([df, new_row], ignore_index=True)
-            print(f"  [정보] goodsNo {goods_no}가 goods_nos.csv에 새로 추가되었습니다.")
+            logger.info(f"  [정보] goodsNo {goods_no}가 goods_nos.csv에 새로 추가되었습니다.")
+        return df
+
+    def record_goods_no_failure(self, df: 'pd.DataFrame', goods_no: str, failure_class: str, reason: str,
+                                policy: RetryPolicy) -> Tuple['pd.DataFrame', bool]:
+        """
+        goodsNo의 실패를 기록합니다. attempts를 1 늘리고 다음 시도 가능 시각을 지수적으로 미룹니다.
+        재시도 예산을 다 쓰면 dead_letter=True로 표시하고 dead_letter.csv에 사유를 남깁니다.
+        (갱신된 DataFrame, dead-letter로 옮겨졌는지 여부)를 반환합니다.
+        """
+        mask = df['goodsNo'].astype(str) == str(goods_no)
+        attempts = int(df.loc[mask, 'attempts'].max()) + 1 if mask.any() else 1
+        df = self.update_goods_no_status(df, goods_no, 'attempts', attempts)
+        df = self.update_goods_no_status(df, goods_no, 'last_failure', failure_class)
+        if policy.is_exhausted(failure_class, attempts):
+            df = self.update_goods_no_status(df, goods_no, 'dead_letter', True)
+            self.append_dead_letter(goods_no, failure_class, reason, attempts)
+            metrics.inc('dead_lettered', failure_class=failure_class)
+            return df, True
+        df = self.update_goods_no_status(df, goods_no, 'next_eligible_at', policy.next_eligible_at(attempts))
+        return df, False
+
+    def clear_goods_no_failures(self, df: 'pd.DataFrame', goods_no: str) -> 'pd.DataFrame':
+        """처리에 성공한 goodsNo의 실패 기록(attempts, next_eligible_at, last_failure)을 초기화합니다."""
+        mask = df['goodsNo'].astype(str) == str(goods_no)
+        if mask.any() and (df.loc[mask, 'attempts'] > 0).any():
+            df.loc[mask, ['attempts', 'next_eligible_at', 'last_failure']] = [0, 0.0, None]
         return df
 
+    def append_dead_letter(self, goods_no: str, failure_class: str, reason: str, attempts: int):
+        """dead_letter.csv에 한 행을 추가합니다. 다시 시도하려면 이 파일의 행과 goods_nos.csv의 dead_letter 값을 지우면 됩니다."""
+        is_new_file = not os.path.exists(self.dead_letter_csv_path)
+        with open(self.dead_letter_csv_path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if is_new_file:
+                writer.writerow(DEAD_LETTER_COLUMNS)
+            writer.writerow([goods_no, failure_class, reason, attempts, time.strftime('%Y-%m-%dT%H:%M:%S')])
+        logger.warning(f"  [dead-letter] goodsNo {goods_no}: {failure_class} ({reason}) - {attempts}회 실패하여 "
+                       f"더 이상 시도하지 않습니다.")
+
     def save_metadata_to_csv(self, data: Dict[str, Any]):
         """
         추출된 상세 메타데이터를 car_audio_metadata.csv 파일에 저장합니다.
         초기 설계 컬럼 순서를 따르고, 누락된 값은 None으로 채웁니다.
         """
+        import pandas as pd
+
+        started_at = time.monotonic()
         # 데이터 정규화: 모든 컬럼을 포함하고 순서를 맞춤
         row_data = {col: data.get(col) for col in self.metadata_columns_order}
+        old_row = None  # 같은 goodsNo의 이전 행 (점수 통계에서 이전 값을 빼기 위함)
 
         # DataFrame으로 변환
         new_df = pd.DataFrame([row_data])
@@ -124,20 +237,148 @@ class DataManager:
 
             # goodsNo를 기준으로 중복 확인 및 업데이트
             if data['goodsNo'] in existing_df['goodsNo'].values:
-                # 기존 행 업데이트
-                existing_df.loc[existing_df['goodsNo'] == data['goodsNo']] = new_df.values
-                print(f"    [정보] goodsNo {data['goodsNo']}의 메타데이터가 업데이트되었습니다.")
+                old_row = existing_df.loc[existing_df['goodsNo'] == data['goodsNo']].iloc[-1].to_dict()
+                # 기존 행 업데이트 (컬럼 이름으로 대입하므로 duplicate_group 같은 파생 컬럼은 유지됨)
+                for column in new_df.columns:
+                    if column not in existing_df.columns:
+                        existing_df[column] = None
+                existing_df.loc[existing_df['goodsNo'] == data['goodsNo'], list(new_df.columns)] = new_df.values
+                logger.debug("    [정보] goodsNo %s의 메타데이터가 업데이트되었습니다.", data['goodsNo'])
             else:
                 # 새 행 추가
                 existing_df = pd.concat([existing_df, new_df], ignore_index=True)
-                print(f"    [정보] goodsNo {data['goodsNo']}의 메타데이터가 새로 추가되었습니다.")
+                logger.debug("    [정보] goodsNo %s의 메타데이터가 새로 추가되었습니다.", data['goodsNo'])
 
             # 저장
             existing_df.to_csv(self.metadata_csv_path, index=False)
         else:
             # 파일이 없으면 새로 생성
             new_df.to_csv(self.metadata_csv_path, index=False)
-            print(f"    [정보] car_audio_metadata.csv 파일이 새로 생성되었습니다.")
+            logger.info(f"    [정보] car_audio_metadata.csv 파일이 새로 생성되었습니다.")
+
+        self._append_to_columnar_store(row_data)
+        if self.score_statistics is not None:
+            self.score_statistics.record(row_data, old_row)
+        metrics.observe('metadata_save_seconds', time.monotonic() - started_at)
+        metrics.inc('metadata_rows_saved')
+
+    def _append_to_columnar_store(self, row: Dict[str, Any]):
+        """
+        Parquet 데이터셋에 행을 추가합니다. CSV가 원본이므로 Parquet 쪽 오류는 저장을 실패시키지 않습니다.
+        pyarrow가 없으면 Parquet 저장을 끄고, 그 밖의 오류(쓰기 실패 등)는 기록만 하고 계속합니다.
+        """
+        if self.columnar_store is None:
+            return
+        try:
+            self.columnar_store.append(row)
+        except ImportError as e:
+            logger.warning(f"    [경고] {e} Parquet 저장을 비활성화합니다.")
+            self.columnar_store = None
+        except Exception as e:
+            metrics.inc('parquet_write_errors')
+            logger.error(f"    [오류] Parquet 데이터셋 기록 실패 (CSV에는 저장됨): {e}")
+
+    def update_metadata_audio_path(self, goods_no: str, audio_file_path: str) -> bool:
+        """
+        이미 저장된 메타데이터 행의 audio_file_path만 갱신합니다. (오디오만 재시도하여 성공했을 때)
+        다른 컬럼은 건드리지 않으며, 해당 goodsNo의 행이 없으면 False를 반환합니다.
+        """
+        import pandas as pd
+
+        if not os.path.exists(self.metadata_csv_path):
+            return False
+        existing_df = pd.read_csv(self.metadata_csv_path)
+        mask = existing_df['goodsNo'].astype(str) == str(goods_no)
+        if not mask.any():
+            return False
+        existing_df['audio_file_path'] = existing_df['audio_file_path'].astype(object)
+        existing_df.loc[mask, 'audio_file_path'] = audio_file_path
+        existing_df.to_csv(self.metadata_csv_path, index=False)
+
+        if self.columnar_store is not None:
+            # Parquet 데이터셋은 goodsNo별 최신 행을 사용하므로 갱신된 전체 행을 다시 추가합니다.
+            row = existing_df.loc[mask].iloc[-1]
+            self._append_to_columnar_store({column: (None if pd.isna(value) else value)
+                                            for column, value in row.items()})
+        return True
+
+    def update_duplicate_groups(self, groups: Dict[str, str]) -> int:
+        """
+        car_audio_metadata.csv의 duplicate_group 컬럼을 갱신합니다. (goodsNo → 중복 그룹 ID, 없으면 빈 값)
+        지문 인덱스에서 매번 다시 계산되는 파생 컬럼이므로 Parquet 데이터셋에는 기록하지 않습니다.
+        중복 그룹에 속한 행 수를 반환합니다.
+        """
+        import pandas as pd
+
+        if not os.path.exists(self.metadata_csv_path):
+            return 0
+        existing_df = pd.read_csv(self.metadata_csv_path)
+        existing_df['duplicate_group'] = existing_df['goodsNo'].astype(str).map(groups)
+        existing_df.to_csv(self.metadata_csv_path, index=False)
+        return int(existing_df['duplicate_group'].notna().sum())
+
+    def enable_score_statistics(self, score_statistics):
+        """
+        점수 누적 통계(ScoreStatistics)를 연결합니다. 이후 save_metadata_to_csv가 행을 저장할 때마다 통계가 갱신됩니다.
+        저장된 통계가 CSV와 맞지 않으면 이때 CSV를 한 번 스캔하여 다시 만듭니다.
+        """
+        self.score_statistics = score_statistics.open()
+
+    def flush_score_statistics(self):
+        """점수 통계를 score_stats.json에 저장합니다. (크롤링 종료 시 호출)"""
+        if self.score_statistics is not None:
+            self.score_statistics.persist()
+
+    def flush_columnar_store(self, compact: bool = False):
+        """
+        Parquet 데이터셋 버퍼에 남아 있는 행을 파일로 기록합니다. (크롤링 종료 시 호출)
+        compact=True이면 이어서 파티션별 작은 part 파일들을 하나로 합칩니다.
+        """
+        if self.columnar_store is not None:
+            try:
+                written = self.columnar_store.flush()
+                compacted = self.columnar_store.compact() if compact else 0
+            except Exception as e:
+                metrics.inc('parquet_write_errors')
+                logger.error(f"  [오류] Parquet 데이터셋 기록 실패 (CSV에는 저장됨): {e}")
+                return
+            if written:
+                logger.info(f"  [정보] Parquet 데이터셋에 {written}개 행을 기록했습니다.")
+            if compacted:
+                logger.info(f"  [정보] Parquet 데이터셋 파티션 {compacted}개의 part 파일을 합쳤습니다.")
+
+    def export_metadata_csv_to_parquet(self) -> int:
+        """
+        기존 car_audio_metadata.csv를 Parquet 데이터셋으로 내보냅니다. (최초 1회 백필 용도)
+        CSV에는 수집 시각이 없으므로 CSV 파일의 수정 시각을 crawled_at으로 사용합니다.
+        이미 데이터셋에 있는 goodsNo는 건너뛰므로 여러 번 실행해도 행이 중복으로 쌓이지 않으며,
+        내보낸 뒤에는 part 파일을 합칩니다. 새로 내보낸 행 수를 반환합니다.
+        """
+        if not os.path.exists(self.metadata_csv_path):
+            logger.warning(f"  [경고] '{self.metadata_csv_path}' 파일이 없습니다.")
+            return 0
+        store = self.columnar_store or ColumnarMetadataStore(self.metadata_parquet_dir)
+        crawled_at = datetime.datetime.fromtimestamp(os.path.getmtime(self.metadata_csv_path))
+        # pandas 없이 csv 모듈로 읽습니다. 빈 문자열은 결측(None)으로 취급합니다.
+        existing = store.goods_nos()
+        exported = skipped = 0
+        with open(self.metadata_csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('goodsNo') in existing:
+                    skipped += 1
+                    continue
+                store.append({column: (value if value != '' else None) for column, value in row.items()},
+                             crawled_at=crawled_at)
+                exported += 1
+        store.compact()
+        if skipped:
+            logger.info(f"  [정보] 이미 Parquet 데이터셋에 있는 goodsNo {skipped}개는 건너뛰었습니다.")
+        return exported
+
+    def load_metadata_dataset(self, columns: Optional[List[str]] = None) -> Optional['pd.DataFrame']:
+        """Parquet 데이터셋을 타입이 지정된 DataFrame으로 로드합니다. (goodsNo별 최신 행)"""
+        store = self.columnar_store or ColumnarMetadataStore(self.metadata_parquet_dir)
+        return store.load(columns=columns)
 
     def save_debug_html(self, goods_no: str, html_content: str, filename_suffix: str = ""):
         """
@@ -147,7 +388,7 @@ class DataManager:
         filepath = os.path.join(self.debug_html_dir, filename)
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(html_content)
-        print(f"  [디버그] HTML을 '{filepath}'에 저장했습니다.")
+        logger.debug("  [디버그] HTML을 '%s'에 저장했습니다.", filepath)
 
     def create_vehicle_asset_dir(self, goods_no: str) -> str:
         """
@@ -0,0 +1,377 @@
+# src/dataset_verifier.py
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# audio_features.AUDIO_EXTENSIONS와 같은 값입니다. (numpy를 임포트하지 않기 위해 따로 둡니다)
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg')
+
+# 문제 유형
+ISSUE_CORRUPT_AUDIO = "corrupt_audio"        # 파일은 있지만 비어 있거나 잘렸거나 디코딩할 수 없음 (중단된 다운로드 등)
+ISSUE_MISSING_AUDIO = "missing_audio"        # 메타데이터/상태는 다운로드 완료인데 정상 파일이 없음
+ISSUE_ORPHAN_AUDIO = "orphan_audio"          # 메타데이터가 가리키지 않는 오디오 파일 (audio_file_path가 None인 실패 건 등)
+ISSUE_MISSING_METADATA = "missing_metadata"  # data_collected=True인데 car_audio_metadata.csv에 행이 없음
+ISSUE_UNKNOWN_GOODS_NO = "unknown_goods_no"  # 자산/메타데이터에는 있지만 goods_nos.csv에 없음
+
+# MPEG 오디오 프레임 헤더 테이블 (kbps)
+_MPEG_BITRATES = {
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),  # MPEG1 Layer I
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),     # MPEG1 Layer II
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),      # MPEG1 Layer III
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),     # MPEG2/2.5 Layer I
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),          # MPEG2/2.5 Layer II
+    (2, 1): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),          # MPEG2/2.5 Layer III
+}
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_TRAILING_TAGS = (b'TAG', b'APETAGEX', b'LYRICS')
+_MIN_MP3_FRAMES = 10
+
+
+def _normalize_path(path: str) -> str:
+    """경로 비교용 정규화. Windows에서 저장된 'vehicle_assets\\123\\a.mp3' 같은 값도 POSIX 경로와 맞춥니다."""
+    return os.path.normpath(path.replace('\\', '/'))
+
+
+def _mp3_frame_length(header: int) -> Optional[int]:
+    """4바이트 MPEG 프레임 헤더에서 프레임 길이(바이트)를 계산합니다. 유효하지 않으면 None."""
+    if (header >> 21) & 0x7FF != 0x7FF:
+        return None
+    version = (header >> 19) & 0x3
+    layer = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    sample_rate_index = (header >> 10) & 0x3
+    padding = (header >> 9) & 0x1
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = _MPEG_BITRATES[(3 if version == 3 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][sample_rate_index]
+    if layer == 3:  # Layer I
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 1 and version != 3:  # MPEG2/2.5 Layer III
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def check_mp3_structure(data: bytes) -> Optional[str]:
+    """
+    MP3 프레임 헤더를 처음부터 끝까지 따라가며 구조를 검사합니다. 문제가 없으면 None, 있으면 사유를 반환합니다.
+    마지막 프레임이 파일 끝을 넘어가면 다운로드가 중간에 끊긴 것으로 판단합니다.
+    """
+    offset = 0
+    if data[:3] == b'ID3' and len(data) >= 10:  # ID3v2 태그 건너뛰기 (synchsafe 정수 크기)
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    frames = 0
+    junk_bytes = 0
+    end = len(data)
+    while offset + 4 <= end:
+        frame_length = _mp3_frame_length(int.from_bytes(data[offset:offset + 4], 'big'))
+        if frame_length is None:
+            if frames and data[offset:offset + 8].startswith(_TRAILING_TAGS):
+                break  # 파일 끝의 ID3v1/APE 태그
+            next_sync = data.find(b'\xff', offset + 1)
+            if next_sync == -1:
+                junk_bytes += end - offset
+                break
+            junk_bytes += next_sync - offset
+            offset = next_sync
+            continue
+        if offset + frame_length > end:
+            return f"마지막 프레임이 잘렸습니다. (offset {offset}, 프레임 {frame_length}B, 파일 {end}B)"
+        frames += 1
+        offset += frame_length
+
+    if frames < _MIN_MP3_FRAMES:
+        return f"유효한 MP3 프레임이 {frames}개뿐입니다."
+    if junk_bytes > end * 0.1:
+        return f"프레임 동기화가 맞지 않는 구간이 {junk_bytes}B입니다."
+    return None
+
+
+def check_audio_bytes(path: str, data: bytes, min_bytes: int) -> Optional[str]:
+    """확장자별 빠른 구조 검사. 문제가 없으면 None, 있으면 사유를 반환합니다."""
+    if len(data) < min_bytes:
+        return f"파일 크기가 너무 작습니다. ({len(data)}B < {min_bytes}B)"
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.mp3':
+        return check_mp3_structure(data)
+    if extension == '.wav':
+        if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+            return "WAV(RIFF) 헤더가 아닙니다."
+        declared = int.from_bytes(data[4:8], 'little') + 8
+        if declared > len(data):
+            return f"WAV 헤더의 크기({declared}B)보다 파일이 작습니다. ({len(data)}B)"
+        return None
+    if extension == '.ogg':
+        return None if data[:4] == b'OggS' else "Ogg 헤더가 아닙니다."
+    return None
+
+
+def check_decodable(path: str) -> Optional[str]:
+    """ffmpeg로 파일 전체를 디코딩해 봅니다. (deep 모드) 문제가 없으면 None, 있으면 사유를 반환합니다."""
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("deep 검사에는 ffmpeg가 필요합니다. ffmpeg를 설치하고 PATH에 추가하세요.")
+    result = subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-i', path, '-f', 'null', '-'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+    errors = result.stderr.decode('utf-8', 'replace').strip()
+    if result.returncode != 0 or errors:
+        return f"ffmpeg 디코딩 오류: {errors.splitlines()[0] if errors else result.returncode}"
+    return None
+
+
+class DatasetVerifier:
+    """
+    vehicle_assets/ 아래 오디오 파일, car_audio_metadata.csv, goods_nos.csv가 서로 일치하는지 검사합니다.
+
+    - 파일 검사(크기, SHA-1 해시, 구조/디코딩 가능 여부)는 스레드 풀에서 병렬로 수행합니다.
+    - 검사 결과는 (크기, 수정 시각)을 키로 data/verify_manifest.json에 캐시되므로,
+      다음 실행부터는 바뀐 파일만 다시 읽습니다.
+    - repair=True이면 깨진 파일을 지우고 해당 goodsNo만 goods_nos.csv에서 미처리 상태로 되돌려
+      다음 크롤링에서 다시 수집되도록 합니다.
+    """
+
+    def __init__(self, data_manager, workers: Optional[int] = None, deep: bool = False, min_audio_bytes: int = 1024):
+        self.data_manager = data_manager
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)  # I/O 위주이므로 CPU 수보다 많이 사용
+        self.deep = deep
+        self.min_audio_bytes = min_audio_bytes
+        self.manifest_path = os.path.join(data_manager.get_base_data_path(), 'verify_manifest.json')
+        self.report_path = os.path.join(data_manager.get_base_data_path(), 'verify_report.json')
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager, deep: Optional[bool] = None) -> "DatasetVerifier":
+        settings = config_loader.get('verify', expected_type=dict, default={})
+        return cls(
+            data_manager,
+            workers=settings.get('workers'),
+            deep=settings.get('deep_decode', False) if deep is None else deep,
+            min_audio_bytes=settings.get('min_audio_bytes', 1024),
+        )
+
+    # --- 입력 수집 ---
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('deep') != self.deep or manifest.get('min_audio_bytes') != self.min_audio_bytes:
+            return {}  # 검사 기준이 바뀌면 캐시를 버립니다.
+        return manifest.get('files', {})
+
+    def _save_manifest(self, files: Dict[str, Dict[str, Any]]):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'deep': self.deep, 'min_audio_bytes': self.min_audio_bytes, 'files': files}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _scan_assets(self) -> Dict[str, List[str]]:
+        """goodsNo → 오디오 파일 상대 경로 목록 (data 디렉토리 기준, 예: vehicle_assets/123/a.mp3)"""
+        assets: Dict[str, List[str]] = {}
+        root = self.data_manager.vehicle_assets_dir
+        if not os.path.isdir(root):
+            return assets
+        with os.scandir(root) as goods_dirs:
+            for goods_dir in goods_dirs:
+                if not goods_dir.is_dir():
+                    continue
+                with os.scandir(goods_dir.path) as entries:
+                    assets[goods_dir.name] = sorted(
+                        os.path.join('vehicle_assets', goods_dir.name, entry.name) for entry in entries
+                        if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS))
+        return assets
+
+    @staticmethod
+    def _read_csv_rows(path: str) -> List[Dict[str, str]]:
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    # --- 파일 검사 ---
+
+    def _check_file(self, relative_path: str, cached: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """(검사 결과, 실제로 파일을 읽었는지)를 반환합니다."""
+        full_path = os.path.join(self.data_manager.get_base_data_path(), relative_path)
+        stat = os.stat(full_path)
+        if cached and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            return cached, False
+
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        problem = check_audio_bytes(full_path, data, self.min_audio_bytes)
+        if problem is None and self.deep:
+            problem = check_decodable(full_path)
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': hashlib.sha1(data).hexdigest(),
+            'problem': problem,
+        }, True
+
+    def _check_files(self, relative_paths: List[str]) -> Tuple[Dict[str, Dict[str, Any]], int, int]:
+        cache = self._load_manifest()
+        results: Dict[str, Dict[str, Any]] = {}
+        files_read = 0
+        bytes_read = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {path: executor.submit(self._check_file, path, cache.get(path)) for path in relative_paths}
+            for path, future in futures.items():
+                try:
+                    result, was_read = future.result()
+                except OSError as e:
+                    result, was_read = {'size': None, 'mtime_ns': None, 'sha1': None, 'problem': str(e)}, False
+                results[path] = result
+                if was_read:
+                    files_read += 1
+                    bytes_read += result['size'] or 0
+        self._save_manifest(results)
+        return results, files_read, bytes_read
+
+    # --- 교차 검사 ---
+
+    def run(self, repair: bool = False) -> Dict[str, Any]:
+        """전체 검사를 수행하고 보고서(dict)를 반환합니다. 보고서는 data/verify_report.json에도 저장됩니다."""
+        started_at = time.monotonic()
+        assets = self._scan_assets()
+        state_rows = {row['goodsNo']: row for row in self._read_csv_rows(self.data_manager.goods_nos_csv_path)}
+        metadata_rows = {row['goodsNo']: row for row in self._read_csv_rows(self.data_manager.metadata_csv_path)}
+
+        all_files = [path for paths in assets.values() for path in paths]
+        file_results, files_read, bytes_read = self._check_files(all_files)
+
+        issues: Dict[str, Dict[str, str]] = {}  # goodsNo → {문제 유형: 설명}
+        orphan_files: List[str] = []  # 메타데이터가 가리키지 않는 파일 (repair 시 삭제)
+
+        def add_issue(goods_no: str, code: str, detail: str):
+            issues.setdefault(goods_no, {})[code] = detail
+
+        for goods_no in sorted(set(assets) | set(state_rows) | set(metadata_rows)):
+            state = state_rows.get(goods_no)
+            metadata = metadata_rows.get(goods_no)
+            files = assets.get(goods_no, [])
+            referenced = (metadata or {}).get('audio_file_path') or None
+            if referenced:
+                referenced = _normalize_path(referenced)
+
+            if state is None:
+                add_issue(goods_no, ISSUE_UNKNOWN_GOODS_NO, "goods_nos.csv에 없는 goodsNo입니다.")
+            elif state.get('data_collected') == 'True' and metadata is None:
+                add_issue(goods_no, ISSUE_MISSING_METADATA, "data_collected=True이지만 메타데이터 행이 없습니다.")
+
+            healthy_files = []
+            for path in files:
+                problem = file_results[path]['problem']
+                if problem:
+                    add_issue(goods_no, ISSUE_CORRUPT_AUDIO, f"{path}: {problem}")
+                else:
+                    healthy_files.append(_normalize_path(path))
+                if _normalize_path(path) != referenced:
+                    add_issue(goods_no, ISSUE_ORPHAN_AUDIO, f"{path}: 메타데이터가 가리키지 않는 파일입니다.")
+                    orphan_files.append(path)
+
+            if referenced and referenced not in healthy_files:
+                add_issue(goods_no, ISSUE_MISSING_AUDIO, f"{referenced}: 메타데이터가 가리키는 정상 파일이 없습니다.")
+            elif state is not None and state.get('mp3_downloaded') == 'True' and not healthy_files:
+                add_issue(goods_no, ISSUE_MISSING_AUDIO, "mp3_downloaded=True이지만 정상 오디오 파일이 없습니다.")
+
+        duplicates: Dict[str, List[str]] = {}
+        for path, result in file_results.items():
+            if result['sha1'] and not result['problem']:
+                duplicates.setdefault(result['sha1'], []).append(path)
+
+        issue_counts: Dict[str, int] = {}
+        for goods_issues in issues.values():
+            for code in goods_issues:
+                issue_counts[code] = issue_counts.get(code, 0) + 1
+                metrics.inc('verify_issues', code=code)
+
+        report = {
+            'checked_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'goods_nos': len(set(assets) | set(state_rows) | set(metadata_rows)),
+            'files_checked': len(all_files),
+            'files_read': files_read,  # 캐시가 없거나 바뀌어서 실제로 읽은 파일 수
+            'bytes_read': bytes_read,
+            'deep': self.deep,
+            'issue_counts': issue_counts,
+            'issues': issues,
+            'duplicate_files': [paths for paths in duplicates.values() if len(paths) > 1],
+            'requeued': [],
+            'removed_files': [],
+        }
+        if repair and issues:
+            report['requeued'], report['removed_files'] = self._repair(issues, file_results, orphan_files)
+        report['elapsed_sec'] = round(time.monotonic() - started_at, 3)
+
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def _repair(self, issues: Dict[str, Dict[str, str]], file_results: Dict[str, Dict[str, Any]],
+                orphan_files: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        깨진 파일과 메타데이터가 가리키지 않는(orphan) 파일을 지우고, 다시 받아야 하는 goodsNo만
+        goods_nos.csv에서 미처리 상태로 되돌립니다. 재수집 대상은 메타데이터 행이 없거나, 메타데이터가 가리키는
+        파일이 없거나 깨진 경우(missing_audio)뿐이며, 정상 파일 외에 남는 파일이 있을 뿐이면 그 파일만 지웁니다.
+        """
+        removed_files = []
+        for path in sorted({path for path, result in file_results.items() if result['problem']} | set(orphan_files)):
+            full_path = os.path.join(self.data_manager.get_base_data_path(), path)
+            try:
+                os.remove(full_path)
+                removed_files.append(path)
+            except OSError as e:
+                logger.warning(f"  [경고] 파일을 삭제하지 못했습니다: {full_path} ({e})")
+
+        goods_nos_df = self.data_manager.load_goods_nos_with_status()
+        requeued = []
+        for goods_no, goods_issues in sorted(issues.items()):
+            audio_broken = ISSUE_MISSING_AUDIO in goods_issues
+            metadata_broken = bool({ISSUE_MISSING_METADATA, ISSUE_UNKNOWN_GOODS_NO} & set(goods_issues))
+            if not (audio_broken or metadata_broken):
+                continue
+            if audio_broken:
+                goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, 'mp3_downloaded', False)
+            # 오디오 경로는 메타데이터 행에 함께 저장되므로, 오디오를 다시 받을 때 메타데이터도 다시 저장합니다.
+            goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, 'data_collected', False)
+            # dead-letter/재시도 대기 상태도 풀어야 다음 크롤링에서 실제로 다시 수집됩니다.
+            for column, value in (('dead_letter', False), ('attempts', 0), ('next_eligible_at', 0.0),
+                                  ('last_failure', None)):
+                goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, column, value)
+            requeued.append(goods_no)
+        self.data_manager.save_goods_nos_with_status(goods_nos_df)
+        metrics.inc('verify_requeued', len(requeued))
+        return requeued, removed_files
+
+    @staticmethod
+    def format_report(report: Dict[str, Any]) -> str:
+        lines = [
+            "=== 데이터셋 검사 결과 ===",
+            f"  goodsNo: {report['goods_nos']}개, 오디오 파일: {report['files_checked']}개 "
+            f"(새로 읽은 파일 {report['files_read']}개, {report['bytes_read'] / 1024 / 1024:.1f}MB), "
+            f"소요 시간 {report['elapsed_sec']:.2f}s",
+        ]
+        if not report['issue_counts']:
+            lines.append("  문제 없음")
+        for code, count in sorted(report['issue_counts'].items()):
+            lines.append(f"  {code}: {count}건")
+        if report['duplicate_files']:
+            lines.append(f"  내용이 같은 파일 묶음: {len(report['duplicate_files'])}개")
+        if report['requeued'] or report['removed_files']:
+            lines.append(f"  재수집 대기열로 되돌린 goodsNo: {len(report['requeued'])}개, "
+                         f"삭제한 깨진/orphan 파일: {len(report['removed_files'])}개")
+        return "\n".join(lines)
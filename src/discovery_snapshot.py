@@ -0,0 +1,133 @@
+# src/discovery_snapshot.py
+
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def merge_diff(previous: List[str], current: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    정렬된 두 goodsNo 목록을 한 번씩만 훑는 병합 조인(merge-join)으로 (추가된 목록, 사라진 목록)을 구합니다.
+    두 목록 모두 오름차순으로 정렬되어 있고 중복이 없어야 합니다. O(n + m)
+    """
+    added, removed = [], []
+    i = j = 0
+    while i < len(previous) and j < len(current):
+        if previous[i] == current[j]:
+            i += 1
+            j += 1
+        elif previous[i] < current[j]:
+            removed.append(previous[i])
+            i += 1
+        else:
+            added.append(current[j])
+            j += 1
+    removed.extend(previous[i:])
+    added.extend(current[j:])
+    return added, removed
+
+
+class DiscoverySnapshot:
+    """한 번의 목록 탐색 결과. goods_nos는 정렬된 고유 goodsNo 목록입니다."""
+
+    __slots__ = ("discovered_at", "goods_nos", "total_count", "complete", "path")
+
+    def __init__(self, discovered_at: str, goods_nos: List[str], total_count: Optional[int] = None,
+                 complete: bool = True, path: Optional[str] = None):
+        self.discovered_at = discovered_at
+        self.goods_nos = goods_nos
+        self.total_count = total_count
+        self.complete = complete
+        self.path = path
+
+
+class DiscoverySnapshotStore:
+    """
+    목록 탐색(discovery) 결과를 실행마다 data/discovery/snapshot-*.json.gz로 저장하고,
+    직전의 완전한 스냅샷과 비교하여 새로 등록되거나 사라진(판매 완료/삭제) 차량을 찾습니다.
+
+    발견한 개수가 사이트의 총 대수에 비해 너무 적으면(min_coverage 미만) 탐색이 중간에 끊긴 것으로 보고
+    complete=False로 저장하며, 이런 스냅샷은 비교 기준으로도, 사라진 차량 판정에도 사용하지 않습니다.
+    """
+
+    def __init__(self, root_dir: str, keep: int = 30, min_coverage: float = 0.95):
+        self.root_dir = root_dir
+        self.keep = keep
+        self.min_coverage = min_coverage
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _snapshot_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.root_dir, 'snapshot-*.json.gz')))
+
+    @staticmethod
+    def _read(path: str) -> DiscoverySnapshot:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        return DiscoverySnapshot(payload['discovered_at'], payload['goods_nos'], payload.get('total_count'),
+                                 payload.get('complete', True), path)
+
+    def latest_complete(self) -> Optional[DiscoverySnapshot]:
+        """가장 최근의 완전한 스냅샷을 반환합니다. (없으면 None)"""
+        for path in reversed(self._snapshot_paths()):
+            try:
+                snapshot = self._read(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"  [경고] 탐색 스냅샷을 읽을 수 없습니다: {path} ({e})")
+                continue
+            if snapshot.complete:
+                return snapshot
+        return None
+
+    def is_complete(self, found_count: int, total_count: Optional[int]) -> bool:
+        if found_count == 0:
+            return False
+        if total_count is None:
+            return True  # 총 대수를 모르면 판정할 수 없으므로 완전한 것으로 간주
+        return found_count >= total_count * self.min_coverage
+
+    def record(self, goods_nos: Iterable[str], total_count: Optional[int] = None, partial: bool = False
+               ) -> Tuple[DiscoverySnapshot, List[str], List[str]]:
+        """
+        이번 탐색 결과를 저장하고 (스냅샷, 추가된 goodsNo, 사라진 goodsNo)를 반환합니다.
+        비교할 이전 스냅샷이 없거나 이번 탐색이 불완전하면 사라진 목록은 비어 있습니다.
+        partial=True(일부 탐색 파티션 실패 등)이면 개수와 관계없이 불완전한 스냅샷으로 저장합니다.
+        """
+        current = sorted(set(str(goods_no) for goods_no in goods_nos))
+        complete = not partial and self.is_complete(len(current), total_count)
+        previous = self.latest_complete()
+
+        now_ns = time.time_ns()
+        now = time.localtime(now_ns // 10 ** 9)
+        discovered_at = time.strftime('%Y-%m-%dT%H:%M:%S', now)
+        # 파일명 순서 = 생성 순서가 되도록 초 단위 아래(ns)까지 붙입니다.
+        path = os.path.join(self.root_dir,
+                            f"snapshot-{time.strftime('%Y%m%d_%H%M%S', now)}-{now_ns % 10 ** 9:09d}.json.gz")
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'discovered_at': discovered_at, 'total_count': total_count, 'complete': complete,
+                       'count': len(current), 'goods_nos': current}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        snapshot = DiscoverySnapshot(discovered_at, current, total_count, complete, path)
+        self._prune(keep_path=path if complete else (previous.path if previous else None))
+
+        if previous is None:
+            return snapshot, current, []
+        added, removed = merge_diff(previous.goods_nos, current)
+        if not complete:
+            logger.warning(f"  [경고] 이번 탐색은 {len(current)}개만 발견하여 불완전합니다. (총 {total_count}대) "
+                           f"사라진 차량 판정을 건너뜁니다.")
+            removed = []
+        return snapshot, added, removed
+
+    def _prune(self, keep_path: Optional[str] = None):
+        """오래된 스냅샷을 keep개만 남기고 지웁니다. 비교 기준이 되는 최신 완전 스냅샷(keep_path)은 항상 남깁니다."""
+        paths = self._snapshot_paths()
+        for path in paths[:max(0, len(paths) - self.keep)]:
+            if path != keep_path:
+                os.remove(path)
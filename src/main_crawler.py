@@ -5,15 +5,34 @@ from src.web_scraper import WebScraper
 from src.page_parser import PageParser
 from src.data_manager import DataManager
 from src.audio_downloader import AudioDownloader
-
-
+from src.rate_limiter import RateLimiter
+from src.proxy_pool import ProxyPool
+from src.metrics import metrics
+from src.profiler import StageProfiler
+from src.discovery_snapshot import DiscoverySnapshotStore
+from src.work_scheduler import DetailPriority
+from src.retry_policy import (RetryPolicy, FAILURE_PERMANENT, FAILURE_PARSE_MISS, classify_exception,
+                              classify_status)
+
+
+import json
+import logging
+import queue
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from typing import Set, List, Dict, Union, Any, Optional  # Added Optional for clarity in type hints
+from typing import Set, List, Dict, Union, Any, Optional, Tuple  # Added Optional for clarity in type hints
+
+logger = logging.getLogger(__name__)
+
+
+class _ParseMiss(Exception):
+    """상세 페이지는 받았지만 필요한 정보를 추출하지 못했을 때 (실패 분류: parse_miss)"""
 
 
 class MainCrawler:
@@ -21,12 +40,74 @@ class MainCrawler:
     크롤링 프로세스의 전체 흐름을 제어하고 각 모듈을 오케스트레이션하는 메인 크롤러 클래스입니다.
     """
 
-    def __init__(self):
+    def __init__(self, profiler: Optional[StageProfiler] = None):
+        # 단계별 프로파일러 (main.py --profile). 기본값은 비활성화된 프로파일러로, 계측 비용이 없습니다.
+        self.profiler = profiler or StageProfiler(enabled=False)
+
         self.config_loader = ConfigLoader()  # ConfigLoader 인스턴스 생성
         self.config = self.config_loader.load_config()  # config 로드 (딕셔너리)
 
-        # WebScraper 초기화
-        self.scraper = WebScraper(
+        # 로그 레벨 설정: 반복 루프의 상세 출력은 DEBUG 레벨이므로 기본(INFO)에서는 콘솔 I/O 비용이 없습니다.
+        log_level = self.config_loader.get('logging.level', expected_type=str, default='INFO')
+        logging.basicConfig(level=getattr(logging, log_level.upper(), logging.INFO), format="%(message)s")
+
+        # 메트릭 설정 (JSON-lines 내보내기, Prometheus 엔드포인트)
+        self.metrics_settings = self.config_loader.get('metrics', expected_type=dict, default={})
+
+        # 모든 요청 경로가 공유하는 호스트별 적응형 속도 제한기
+        self.rate_limiter = RateLimiter.from_config(self.config_loader)
+        # proxy_enabled/proxy_list 기반 프록시 풀 (비활성화 시 None)
+        self.proxy_pool = ProxyPool.from_config(self.config_loader)
+
+        # WebScraper 초기화 (목록 탐색 파티션 워커도 같은 설정으로 추가 생성합니다)
+        self.scraper = self._create_scraper()
+
+        # PageParser 초기화
+        self.parser = PageParser(self.config_loader.get('data_selectors', expected_type=dict))
+        storage_settings = self.config_loader.get('storage', expected_type=dict, default={})
+        self.data_manager = DataManager(  # DataManager 인스턴스 생성
+            parquet_enabled=storage_settings.get('parquet_enabled', False),
+            parquet_flush_rows=storage_settings.get('parquet_flush_rows', 200)
+        )
+        if self.config_loader.get('score_stats', expected_type=dict, default={}).get('enabled', True):
+            from src.score_statistics import ScoreStatistics
+            self.data_manager.enable_score_statistics(
+                ScoreStatistics.from_config(self.config_loader, self.data_manager))
+
+        # 실행마다 목록 탐색 결과를 저장하고 이전 실행과 비교 (신규/사라진 차량)
+        discovery_settings = self.config_loader.get('discovery', expected_type=dict, default={})
+        self.discovery_snapshots = DiscoverySnapshotStore(
+            os.path.join(self.data_manager.get_base_data_path(), 'discovery'),
+            keep=discovery_settings.get('snapshot_keep', 30),
+            min_coverage=discovery_settings.get('min_coverage', 0.95),
+        )
+
+        # 다운로드와 동시에 오디오 특징을 계산하는 스트리밍 모드 (audio_features.streaming)
+        self.feature_pipeline = None
+        if self.config_loader.get('audio_features', expected_type=dict, default={}).get('streaming', False):
+            from src.audio_features import AudioFeaturePipeline
+            self.feature_pipeline = AudioFeaturePipeline.from_config(self.config_loader, self.data_manager)
+            self.feature_pipeline.store.open(writable=True)
+
+        # 실패 분류별 재시도 예산과 지수적 재시도 간격 (예산을 다 쓰면 dead-letter)
+        self.retry_policy = RetryPolicy.from_config(self.config_loader)
+        # 상세 수집 순서를 정하는 우선순위 (목록 순서, 신규 여부, 오디오 누락, 실패 횟수, aging)
+        self.detail_priority = DetailPriority.from_config(self.config_loader)
+
+        # AudioDownloader 초기화 (WebScraper와 동일한 설정 사용)
+        self.audio_downloader = AudioDownloader(
+            request_delay=self.config_loader.get('crawler_settings.request_delay_sec', expected_type=(int, float)),
+            timeout=self.config_loader.get('crawler_settings.timeout_sec', expected_type=int),
+            max_retries=self.config_loader.get('crawler_settings.max_retries', expected_type=int),
+            retry_delay=self.config_loader.get('crawler_settings.retry_delay_sec', expected_type=(int, float)),
+            user_agent=self.config_loader.get('crawler_settings.user_agent', expected_type=str),
+            rate_limiter=self.rate_limiter,
+            proxy_pool=self.proxy_pool
+        )
+
+    def _create_scraper(self) -> WebScraper:
+        """설정에 따라 WebScraper를 생성합니다. (속도 제한기와 프록시 풀은 모든 인스턴스가 공유)"""
+        return WebScraper(
             user_agent=self.config_loader.get('crawler_settings.user_agent', expected_type=str),
             request_delay=self.config_loader.get('crawler_settings.request_delay_sec', expected_type=(int, float)),
             timeout=self.config_loader.get('crawler_settings.timeout_sec', expected_type=int),
@@ -37,21 +118,370 @@ class MainCrawler:
                                                         expected_type=(str, type(None)), default=None),
             use_auto_driver_download=self.config_loader.get('crawler_settings.use_auto_driver_download',
                                                             expected_type=bool),
-            selenium_headless=self.config_loader.get('crawler_settings.selenium_headless', expected_type=bool)
+            selenium_headless=self.config_loader.get('crawler_settings.selenium_headless', expected_type=bool),
+            rate_limiter=self.rate_limiter,
+            proxy_pool=self.proxy_pool,
+            tabs_per_browser=self.config_loader.get('crawler_settings.tabs_per_browser', expected_type=int,
+                                                    default=1),
         )
 
-        # PageParser 초기화
-        self.parser = PageParser(self.config_loader.get('data_selectors', expected_type=dict))
-        self.data_manager = DataManager()  # DataManager 인스턴스 생성
+    def _on_config_change(self, snapshot):
+        """
+        설정 파일이 바뀌었을 때 ConfigLoader 감시 스레드에서 호출됩니다.
+        data_selectors가 달라졌으면 새 PageParser를 컴파일해 교체합니다. (이후 파싱하는 페이지부터 적용)
+        브라우저 세션, 대기열 등 나머지 상태는 그대로 유지되며, 컴파일에 실패하면 예외가 전파되어 변경이 거부됩니다.
+        """
+        new_selectors = snapshot['data_selectors']
+        if new_selectors == self.parser.selectors:
+            logger.info("설정 파일이 변경되었지만 data_selectors는 그대로입니다. (그 외 설정은 재시작 후 적용됩니다)")
+            return
+        new_parser = PageParser(new_selectors)
+        self.parser = new_parser  # 참조 교체는 원자적이므로 진행 중인 파싱은 이전 셀렉터로 끝납니다.
+        metrics.inc('selector_reloads')
+        logger.info(f"data_selectors 변경을 적용했습니다. ({len(new_selectors)}개 셀렉터)")
+
+    def _record_listing_diff(self, found_goods_nos: Set[str], total_cars: Optional[int], partial: bool = False):
+        """이번 탐색 스냅샷을 저장하고, 이전 스냅샷 대비 사라진/다시 나타난 goodsNo를 goods_nos.csv에 반영합니다."""
+        self.profiler.mark('listing_diff')
+        snapshot, added, removed = self.discovery_snapshots.record(found_goods_nos, total_cars, partial=partial)
+        print(f"  [탐색 비교] 이전 탐색 대비 신규 {len(added)}개, 사라짐 {len(removed)}개 "
+              f"(스냅샷: {os.path.basename(snapshot.path)}{'' if snapshot.complete else ', 불완전'})")
+        metrics.set_gauge('listings_found', len(snapshot.goods_nos))
+        metrics.set_gauge('listings_added', len(added))
+        metrics.set_gauge('listings_removed', len(removed))
+        if added or removed:
+            goods_nos_df = self.data_manager.load_goods_nos_with_status()
+            goods_nos_df = self.data_manager.apply_listing_diff(goods_nos_df, added, removed)
+            self.data_manager.save_goods_nos_with_status(goods_nos_df)
 
-        # AudioDownloader 초기화 (WebScraper와 동일한 설정 사용)
-        self.audio_downloader = AudioDownloader(
-            request_delay=self.config_loader.get('crawler_settings.request_delay_sec', expected_type=(int, float)),
-            timeout=self.config_loader.get('crawler_settings.timeout_sec', expected_type=int),
-            max_retries=self.config_loader.get('crawler_settings.max_retries', expected_type=int),
-            retry_delay=self.config_loader.get('crawler_settings.retry_delay_sec', expected_type=(int, float)),
-            user_agent=self.config_loader.get('crawler_settings.user_agent', expected_type=str)
-        )
+    def _discovery_partitions(self) -> List[Dict[str, Any]]:
+        """
+        config의 discovery.partitions 목록을 반환합니다. 각 파티션은 한 브라우저에서 독립적으로 탐색됩니다.
+          {"name": "gasoline", "filters": ["fuel_type_filter_gasoline"], "applied_words": ["applied_filter_gasoline_word"]}
+        filters/applied_words는 data_selectors의 키입니다. 파티션끼리 겹치지 않아야 총 대수 합계가 정확합니다.
+        설정이 없으면 이전과 같이 가솔린+디젤 필터를 한 번에 적용하는 단일 파티션을 사용합니다.
+        """
+        partitions = self.config_loader.get('discovery', expected_type=dict, default={}).get('partitions')
+        if not partitions:
+            return [{'name': 'gasoline+diesel',
+                     'filters': ['fuel_type_filter_gasoline', 'fuel_type_filter_diesel'],
+                     'applied_words': ['applied_filter_gasoline_word', 'applied_filter_diesel_word']}]
+        return list(partitions)
+
+    def _run_discovery_partitions(self, partitions: List[Dict[str, Any]],
+                                  list_url: str) -> Tuple[Set[str], Optional[int], int, Dict[str, int]]:
+        """
+        파티션들을 브라우저 풀에서 병렬로 탐색하고
+        (합친 goodsNo 집합, 총 대수 합계, 실패한 파티션 수, goodsNo별 목록 내 순서)를 반환합니다.
+        목록 내 순서는 파티션 안에서의 위치이며, 여러 파티션에 나타나면 가장 앞선 위치를 사용합니다.
+        풀의 첫 브라우저는 self.scraper이며, 나머지(discovery.workers - 1개)는 필요할 때 만들어 탐색 후 닫습니다.
+        """
+        workers = self.config_loader.get('discovery', expected_type=dict, default={}).get('workers', 2)
+        workers = max(1, min(len(partitions), workers or 1))
+        idle_scrapers: "queue.Queue[WebScraper]" = queue.Queue()
+        idle_scrapers.put(self.scraper)
+        extra_scrapers: List[WebScraper] = []
+        pool_lock = threading.Lock()
+
+        def borrow_scraper() -> WebScraper:
+            try:
+                return idle_scrapers.get_nowait()
+            except queue.Empty:
+                pass
+            with pool_lock:
+                can_create = len(extra_scrapers) < workers - 1
+                if can_create:
+                    extra_scrapers.append(None)  # 자리 예약 (드라이버 생성은 락 밖에서)
+            if can_create:
+                try:
+                    scraper = self._create_scraper()
+                except Exception as e:  # webdriver_manager 다운로드 오류 등
+                    logger.warning(f"  [경고] 탐색용 추가 브라우저 생성 중 오류: {e}")
+                    scraper = None
+                if scraper is not None and scraper.driver is not None:
+                    with pool_lock:
+                        extra_scrapers[extra_scrapers.index(None)] = scraper
+                    return scraper
+                if scraper is not None:
+                    scraper.close()  # 드라이버 없이 점유한 프록시 반납
+                logger.warning("  [경고] 탐색용 추가 브라우저를 시작하지 못했습니다. 기존 브라우저를 기다립니다.")
+            return idle_scrapers.get()
+
+        def discover(partition: Dict[str, Any]) -> Tuple[Optional[List[str]], Optional[int]]:
+            scraper = None
+            try:
+                scraper = borrow_scraper()
+                return self._discover_partition(scraper, partition, list_url)
+            except Exception as e:  # 한 파티션의 오류가 다른 파티션에 영향을 주지 않도록 격리
+                logger.error(f"  [{partition['name']}] [치명적 오류] 탐색 중 예상치 못한 오류 발생: {e}")
+                return None, None
+            finally:
+                if scraper is not None:
+                    idle_scrapers.put(scraper)
+
+        found_goods_nos: Set[str] = set()
+        ranks: Dict[str, int] = {}
+        total_cars: Optional[int] = 0
+        failed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='discovery') as executor:
+                for partition, (goods_nos, partition_total) in zip(partitions, executor.map(discover, partitions)):
+                    if goods_nos is None:
+                        failed += 1
+                        metrics.inc('discovery_partition_failures', partition=partition['name'])
+                        continue
+                    found_goods_nos.update(goods_nos)
+                    for rank, goods_no in enumerate(goods_nos):
+                        ranks[goods_no] = min(rank, ranks.get(goods_no, rank))
+                    metrics.set_gauge('discovery_partition_listings', len(goods_nos), partition=partition['name'])
+                    total_cars = None if total_cars is None or partition_total is None else total_cars + partition_total
+        finally:
+            for scraper in extra_scrapers:
+                if scraper is not None:
+                    scraper.close()
+        return found_goods_nos, total_cars, failed, ranks
+
+    def _discover_partition(self, scraper: WebScraper, partition: Dict[str, Any],
+                            list_url: str) -> Tuple[Optional[List[str]], Optional[int]]:
+        """
+        한 브라우저에서 파티션 하나를 탐색합니다: 목록 로드 → 필터 클릭 → 적용 확인 → 총 대수 → '더보기' 반복 → goodsNo 수집.
+        (목록 순서대로의 goodsNo 목록, 총 대수)를 반환하며, 실패하면 (None, None)을 반환합니다.
+        """
+        name = partition['name']
+
+        scraper.navigate(list_url)
+        # navigate()가 프록시 교체로 드라이버를 재시작할 수 있으므로 드라이버는 이동한 뒤에 가져옵니다.
+        driver = scraper.driver
+        WebDriverWait(driver, scraper.timeout).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        logger.info(f"  [{name}] 페이지 초기 로드 완료.")
+
+        # --- 필터 클릭 (JavaScript Executor 사용) ---
+        for filter_key in partition.get('filters', []):
+            filter_selector_info = self.config_loader.get(f'data_selectors.{filter_key}', expected_type=dict)
+            input_id = filter_selector_info.get('id_value')
+            if not input_id:
+                logger.error(f"  [{name}] [오류] '{filter_key}' 필터의 'id_value'가 config에 누락되었습니다. 클릭 불가.")
+                return None, None
+            try:
+                self.rate_limiter.acquire(list_url)  # 필터 클릭은 목록 재조회 요청을 발생시킴
+                driver.execute_script(f"document.getElementById('{input_id}').click();")
+                logger.info(f"  [{name}] '{filter_key}' 필터 체크박스 JS 클릭 완료. (ID: {input_id})")
+            except Exception as e:
+                logger.error(f"  [{name}] [오류] '{filter_key}' 필터 JS 클릭 실패: {e}.")
+                return None, None
+
+        # --- 필터 적용 확인 ---
+        for word_key in partition.get('applied_words', []):
+            word_selector_info = self.config_loader.get(f'data_selectors.{word_key}', expected_type=dict)
+            try:
+                WebDriverWait(driver, scraper.timeout).until(
+                    EC.presence_of_element_located((getattr(By, word_selector_info['type'].upper()),
+                                                    word_selector_info['selector']))
+                )
+            except TimeoutException:
+                logger.warning(f"  [{name}] [경고] '{word_key}' 필터 적용을 확인하지 못했습니다. "
+                               f"(셀렉터: {word_selector_info['selector']})")
+                return None, None
+
+        # --- 2. 총 대수 정보 수집 ---
+        total_count_selector = self.config_loader.get('urls.total_count_selector', expected_type=dict)
+        try:
+            WebDriverWait(driver, scraper.timeout).until(
+                EC.visibility_of_element_located(
+                    (getattr(By, total_count_selector['type'].upper()), total_count_selector['selector']))
+            )
+            time.sleep(scraper.request_delay)
+        except TimeoutException:
+            logger.warning(f"  [{name}] [경고] 총 차량 대수 요소를 찾거나 업데이트를 확인하지 못했습니다. "
+                           f"(셀렉터: {total_count_selector['selector']})")
+            return None, None
+
+        total_cars = self.parser.get_total_count(driver.page_source, total_count_selector)
+        if total_cars is None:
+            logger.warning(f"  [{name}] [경고] 총 차량 대수를 찾을 수 없습니다. 셀렉터가 유효한지 확인하세요: "
+                           f"{total_count_selector['selector']}")
+            return None, None
+        logger.info(f"  [{name}] 총 차량 대수: {total_cars} 대")
+
+        # --- 3. '더보기' 버튼 클릭을 통한 동적 로딩 ---
+        more_button_selector_info = self.config_loader.get('urls.next_page_selector', expected_type=dict)
+        click_by_type = getattr(By, more_button_selector_info['type'].upper())
+
+        item_check_selector_for_count_info = more_button_selector_info.get('item_check_selector')
+        if not item_check_selector_for_count_info:
+            logger.error(f"  [{name}] [오류] 'next_page_selector'에 'item_check_selector'가 누락되었습니다. 리스트 아이템 개수 확인 불가.")
+            return None, None
+        if not isinstance(item_check_selector_for_count_info, dict):  # 문자열이면 '더보기' 버튼과 같은 셀렉터 타입
+            item_check_selector_for_count_info = {'type': more_button_selector_info['type'],
+                                                  'selector': item_check_selector_for_count_info}
+        goods_no_selector = self.config_loader.get('urls.goods_no_selector', expected_type=dict)
+        container_css = more_button_selector_info.get('observe_container')
+
+        # 아이템 수와 goodsNo 링크는 MutationObserver 대기 스크립트가 매 호출마다 함께 돌려줍니다.
+        # 새로 추가된 링크만 받으므로 마지막에 전체 page_source를 다시 가져와 파싱할 필요가 없습니다.
+        hrefs: List[Optional[str]] = []
+
+        def wait_for_growth(known_count: int) -> dict:
+            state = scraper.wait_for_list_growth(item_check_selector_for_count_info, goods_no_selector,
+                                                 known_count, len(hrefs), container_css)
+            hrefs.extend(state['hrefs'])
+            return state
+
+        # 초기 리스트 아이템 개수 확인 (known_count=-1: 기다리지 않음)
+        initial_item_count = wait_for_growth(-1)['count']
+        logger.info(f"  [{name}] 초기 리스트 아이템 개수: {initial_item_count}개")
+
+        if initial_item_count == 0:
+            logger.warning(f"  [{name}] [경고] 초기 리스트 아이템 개수가 0개입니다. '더보기' 클릭을 건너뜁니다.")
+            self.data_manager.save_debug_html(name, driver.page_source, filename_suffix="empty_initial_list_page")
+
+        # '더보기' 1회 클릭 후 증가하는 아이템 개수 측정 (initial_item_count가 0이 아닐 때만)
+        items_per_load = 0
+        if initial_item_count > 0:
+            try:
+                first_more_button = WebDriverWait(driver, scraper.timeout).until(
+                    EC.element_to_be_clickable((click_by_type, more_button_selector_info['selector']))
+                )
+                self.rate_limiter.acquire(list_url)
+                first_more_button.click()
+
+                state = wait_for_growth(initial_item_count)
+                if state['timed_out']:
+                    logger.info(f"  [{name}] '더보기' 클릭 후 아이템 증가 없음. 현재 로드된 아이템만 수집합니다.")
+                else:
+                    items_per_load = state['count'] - initial_item_count
+                    logger.info(f"  [{name}] '더보기' 1회 클릭 시 {items_per_load}개 아이템 증가 확인.")
+            except (TimeoutException, NoSuchElementException) as e:
+                logger.info(f"  [{name}] '더보기' 버튼이 없거나 아이템 증가 없음. 현재 로드된 아이템만 수집합니다. ({e})")
+                items_per_load = 0
+            except Exception as e:
+                logger.error(f"  [{name}] [오류] '더보기' 버튼 측정 클릭 중 오류 발생: {e}. 현재 로드된 아이템만 수집합니다.")
+                items_per_load = 0
+
+        # 총 클릭 횟수 계산
+        clicks_needed = 0
+        if items_per_load > 0 and total_cars > initial_item_count:
+            clicks_needed = max(0, (total_cars - initial_item_count) // items_per_load)  # ceiling division
+        elif total_cars > initial_item_count:
+            clicks_needed = self.config_loader.get('crawler_settings.scroll_load_limit', expected_type=int, default=5)
+            logger.info(f"  [{name}] 증가량 파악 불가. config의 scroll_load_limit({clicks_needed}회)만큼 클릭 시도.")
+
+        # 실제 '더보기' 버튼 반복 클릭 (initial_item_count가 0이 아닐 때만)
+        if initial_item_count > 0:
+            current_item_count = initial_item_count + items_per_load if items_per_load > 0 else initial_item_count
+            for i in range(clicks_needed):
+                try:
+                    more_button = WebDriverWait(driver, scraper.timeout).until(
+                        EC.element_to_be_clickable((click_by_type, more_button_selector_info['selector']))
+                    )
+                    logger.debug("  [%s] '더보기' 버튼 클릭 (시도 %d/%d)...", name, i + 1, clicks_needed)
+                    self.rate_limiter.acquire(list_url)
+                    more_button.click()
+
+                    state = wait_for_growth(current_item_count)
+                    logger.debug("  [%s] 현재 리스트 아이템 개수: %s개", name, state['count'])
+
+                    if state['timed_out'] or state['count'] <= current_item_count:
+                        logger.info(f"  [{name}] 리스트 아이템 개수가 증가하지 않았습니다. 스크롤 종료.")
+                        break
+
+                    current_item_count = state['count']
+
+                except (TimeoutException, NoSuchElementException) as e:
+                    logger.info(f"  [{name}] '더보기' 버튼을 더 이상 찾을 수 없거나 클릭할 수 없습니다. 스크롤 종료. ({e})")
+                    break
+                except Exception as e:
+                    logger.error(f"  [{name}] [오류] '더보기' 버튼 클릭 또는 아이템 개수 확인 중 오류 발생: {e}. 스크롤 종료.")
+                    break
+
+        # --- goodsNo 정보 수집 ---
+        found_goods_nos_on_page = self.parser.goods_nos_from_hrefs(hrefs)
+        if not found_goods_nos_on_page:
+            # 스크립트로 링크를 받지 못했으면 최종 HTML을 직접 파싱해 보고, 그래도 없으면 디버그용으로 저장합니다.
+            final_html_content = driver.page_source
+            found_goods_nos_on_page = list(self.parser.parse_list_page_goods_nos(final_html_content,
+                                                                                 goods_no_selector))
+            if not found_goods_nos_on_page:
+                logger.warning(f"  [{name}] [경고] 최종 페이지에서 goodsNo를 찾을 수 없습니다. 셀렉터 오류일 수 있습니다.")
+                self.data_manager.save_debug_html(name, final_html_content, filename_suffix="final_list_page")
+                return None, None
+        logger.info(f"  [{name}] [성공] {len(found_goods_nos_on_page)}개의 goodsNo 발견. (총 {total_cars}대)")
+        return found_goods_nos_on_page, total_cars
+
+    def _split_work_queues(self, goods_nos_df) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        상태 파일을 두 개의 독립된 작업 대기열로 나눕니다.
+          - metadata_queue: 상세 페이지를 렌더링해야 하는 goodsNo (메타데이터 미수집, 또는 오디오 URL을 모르는 경우)
+          - audio_queue: 메타데이터는 수집되었고 오디오 URL도 알고 있어 HTTP GET만 다시 하면 되는 (goodsNo, audio_url)
+        목록에서 사라진(delisted) 차량, dead-letter 차량, 다음 시도 가능 시각(next_eligible_at)이 지나지 않은 차량은
+        어느 쪽에도 넣지 않습니다.
+        """
+        not_yet_eligible = goods_nos_df['next_eligible_at'] > time.time()
+        listed = (goods_nos_df['delisted'] == False) & (goods_nos_df['dead_letter'] == False) & ~not_yet_eligible
+        audio_urls = goods_nos_df['audio_url_on_page']
+        has_audio_url = audio_urls.notna() & (audio_urls.astype(str) != '')
+        mp3_missing = goods_nos_df['mp3_downloaded'] == False
+        needs_detail = (goods_nos_df['data_collected'] == False) | (mp3_missing & ~has_audio_url)
+        needs_audio_only = ~needs_detail & mp3_missing & has_audio_url
+
+        metadata_queue = goods_nos_df.loc[listed & needs_detail, 'goodsNo'].tolist()
+        audio_rows = goods_nos_df.loc[listed & needs_audio_only]
+        audio_queue = list(zip(audio_rows['goodsNo'].astype(str), audio_rows['audio_url_on_page'].astype(str)))
+
+        deferred = int((not_yet_eligible & (needs_detail | needs_audio_only)).sum())
+        dead = int(goods_nos_df['dead_letter'].sum())
+        if deferred or dead:
+            logger.info(f"  [정보] 재시도 대기 중 {deferred}개, dead-letter {dead}개는 이번 실행에서 건너뜁니다.")
+        metrics.set_gauge('retry_deferred', deferred)
+        metrics.set_gauge('dead_letter_total', dead)
+        return metadata_queue, audio_queue
+
+    def _audio_failure(self) -> Tuple[str, str]:
+        """직전 오디오 다운로드 실패의 (분류, 사유)."""
+        status = self.audio_downloader.last_error_status
+        return classify_status(status), f"오디오 다운로드 실패{f' (HTTP {status})' if status else ''}"
+
+    def _download_audio(self, goods_no: str, audio_url: str) -> Optional[str]:
+        """
+        오디오 파일을 vehicle_assets/{goodsNo}/에 내려받고 (설정 시 스트리밍 특징 추출 포함),
+        성공하면 메타데이터에 기록할 상대 경로를, 실패하면 None을 반환합니다.
+        """
+        assets_dir = self.data_manager.create_vehicle_asset_dir(goods_no)  # 폴더 생성 및 경로 반환
+
+        # URL에서 파일명 추출 (쿼리스트링 제거 및 확장자 확인)
+        audio_filename = os.path.basename(audio_url.split('?')[0])
+        if not audio_filename.lower().endswith(('.mp3', '.wav', '.ogg')):  # 확장자가 없으면 mp3 추가
+            audio_filename += ".mp3"
+
+        audio_file_path_full = os.path.join(assets_dir, audio_filename)
+
+        logger.debug("    MP3 파일 다운로드 시도: %s -> %s", audio_url, audio_file_path_full)
+        feature_extractor = self.feature_pipeline.streaming_extractor() \
+            if self.feature_pipeline is not None else None
+        with self.profiler.stage('audio_download'):
+            audio_downloaded = self.audio_downloader.download_audio_file(
+                audio_url, audio_file_path_full, chunk_consumer=feature_extractor)
+        if audio_downloaded and feature_extractor is not None:
+            with self.profiler.stage('audio_features'):
+                self.feature_pipeline.store_streamed(goods_no, audio_file_path_full, feature_extractor)
+        elif feature_extractor is not None:
+            feature_extractor.reset()
+        if not audio_downloaded:
+            logger.warning(f"    [오류] MP3 파일 다운로드 실패: {audio_url}")
+            return None
+        logger.debug("    [성공] MP3 파일 다운로드 완료: %s", audio_file_path_full)
+        # CSV에 저장될 상대 경로
+        return os.path.join('vehicle_assets', goods_no, audio_filename)
+
+    def _profiled(self, stage: str, iterable):
+        """iterable에서 다음 항목을 꺼내는 시간을 stage 단계로 측정하며 항목을 그대로 넘겨줍니다."""
+        iterator = iter(iterable)
+        while True:
+            with self.profiler.stage(stage):
+                item = next(iterator, None)
+            if item is None:
+                return
+            yield item
 
     def _get_list_page_url(self) -> str:
         """리스트 페이지 URL을 생성합니다."""
@@ -59,277 +489,109 @@ class MainCrawler:
         list_pattern = self.config_loader.get('urls.list_page_pattern', expected_type=str)
         return f"{base_url}{list_pattern}"
 
+    def _start_metrics(self):
+        """실행 단위 메트릭을 초기화하고, 설정된 경우 Prometheus 엔드포인트를 시작합니다."""
+        metrics.reset()
+        metrics.enabled = bool(self.metrics_settings.get('enabled', True))  # false이면 기록 자체를 생략
+        prometheus_port = self.metrics_settings.get('prometheus_port')
+        if self.metrics_settings.get('enabled', True) and prometheus_port:
+            try:
+                metrics.start_prometheus_server(int(prometheus_port))
+            except OSError as e:
+                logger.warning(f"  [경고] Prometheus 엔드포인트를 시작하지 못했습니다: {e}")
+
+    def _flush_metrics(self):
+        """현재 메트릭 스냅샷을 JSON-lines 파일에 추가합니다."""
+        if not self.metrics_settings.get('enabled', True):
+            return
+        jsonl_path = os.path.join(self.data_manager.get_base_data_path(),
+                                  self.metrics_settings.get('jsonl_file', 'metrics.jsonl'))
+        try:
+            metrics.export_jsonl(jsonl_path)
+        except OSError as e:
+            logger.warning(f"  [경고] 메트릭 파일 저장 실패: {e}")
+
+    def _finish_metrics(self):
+        """마지막 스냅샷을 저장하고 실행 요약 리포트를 출력/저장합니다."""
+        if not self.metrics_settings.get('enabled', True):
+            return
+        self._flush_metrics()
+        print(metrics.format_summary())
+        summary_path = os.path.join(self.data_manager.get_base_data_path(), 'run_summary.json')
+        try:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(metrics.summary(), f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"  [경고] 실행 요약 저장 실패: {e}")
+        metrics.stop_prometheus_server()
+
     def run(self):
         """
         크롤링 프로세스의 전체 흐름을 제어하고 각 모듈을 오케스트레이션하는 메인 크롤러 클래스입니다.
         고객 요구사항에 맞춰 연료 필터 선택, 총 대수 수집, '더보기' 클릭, goodsNo 수집 순서로 진행합니다.
         이후 수집된 goodsNo를 바탕으로 상세 페이지를 크롤링하고 데이터를 저장합니다.
         """
+        self._start_metrics()
+        watch_settings = self.config_loader.get('config_watch', expected_type=dict, default={'enabled': False})
+        if watch_settings.get('enabled', False):
+            # 실행 중 crawler_config.json을 수정하면 브라우저를 재시작하지 않고 셀렉터를 교체합니다.
+            self.config_loader.start_watching(self._on_config_change, watch_settings.get('interval_sec', 2.0))
+        try:
+            self._crawl()
+        finally:
+            self.config_loader.stop_watching()
+            self.profiler.mark('shutdown')
+            self.data_manager.flush_columnar_store(compact=True)
+            self.data_manager.flush_score_statistics()
+            if self.feature_pipeline is not None:
+                self.feature_pipeline.store.commit()
+            self._finish_metrics()
+
+    def _crawl(self):
+        """리스트 페이지 조회부터 상세 페이지 수집까지의 실제 크롤링 단계를 수행합니다."""
         print("--- 크롤러 시작: 리스트 페이지 조회 ---")
+        self.profiler.mark('load_state')
 
         all_found_goods_nos_set = set()  # 리스트 페이지에서 발견된 모든 goodsNo를 저장할 집합
+        total_cars = None  # 사이트가 표시하는 총 대수 (탐색 완전성 판정에 사용)
         list_url = self._get_list_page_url()
 
         # 기존에 수집된 goodsNo (상태 포함) 로드
         goods_nos_df = self.data_manager.load_goods_nos_with_status()
-        existing_goods_nos_set = set(goods_nos_df['goodsNo'].tolist())
+        existing_goods_nos_set = set(goods_nos_df['goodsNo'].astype(str))
         print(f"  [정보] 기존에 수집된 goodsNo {len(existing_goods_nos_set)}개 로드 완료.")
 
-        print(f"\n[단계 1/5] 현재 페이지 로드 및 연료 필터 선택 시도: {list_url}")
+        print(f"\n[단계 1/5] 목록 탐색 시작: {list_url}")
+        self.profiler.mark('list_discovery')
+        discovery_partial = False  # 일부 파티션이 실패하면 사라진 차량 판정을 하지 않습니다.
 
         if self.scraper.use_selenium and self.scraper.driver:
-            try:
-                self.scraper.driver.get(list_url)
-                WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                print("  [성공] 페이지 초기 로드 완료.")
-
-                fuel_filter_gasoline_selector_info = self.config_loader.get('data_selectors.fuel_type_filter_gasoline',
-                                                                            expected_type=dict)
-                fuel_filter_diesel_selector_info = self.config_loader.get('data_selectors.fuel_type_filter_diesel',
-                                                                          expected_type=dict)
-
-                # --- '가솔린' 필터 클릭 (JavaScript Executor 사용) ---
-                gasoline_input_id = fuel_filter_gasoline_selector_info.get('id_value')
-                if not gasoline_input_id:
-                    print(f"  [오류] '가솔린' 필터의 'id_value'가 config에 누락되었습니다. 클릭 불가.")
-                    self.scraper.close()
-                    return
-
-                print(f"  '가솔린' 필터 클릭 시도 (JS Executor 사용, ID: {gasoline_input_id})...")
-                try:
-                    self.scraper.driver.execute_script(f"document.getElementById('{gasoline_input_id}').click();")
-                    print("  [성공] '가솔린' 필터 체크박스 JS 클릭 완료.")
-                    time.sleep(self.scraper.request_delay)
-                except Exception as e:
-                    print(f"  [오류] '가솔린' 필터 JS 클릭 실패: {e}. 다음 필터로 진행.")
-                    self.scraper.close()
-                    return
-
-                # --- '디젤' 필터 클릭 (JavaScript Executor 사용) ---
-                diesel_input_id = fuel_filter_diesel_selector_info.get('id_value')
-                if not diesel_input_id:
-                    print(f"  [오류] '디젤' 필터의 'id_value'가 config에 누락되었습니다. 클릭 불가.")
-                    self.scraper.close()
-                    return
-
-                print(f"  '디젤' 필터 클릭 시도 (JS Executor 사용, ID: {diesel_input_id})...")
-                try:
-                    self.scraper.driver.execute_script(f"document.getElementById('{diesel_input_id}').click();")
-                    print("  [성공] '디젤' 필터 체크박스 JS 클릭 완료.")
-                    time.sleep(self.scraper.request_delay)
-                except Exception as e:
-                    print(f"  [오류] '디젤' 필터 JS 클릭 실패: {e}. 다음 단계로 진행.")
-                    self.scraper.close()
-                    return
-
-                # 필터 적용 후 데이터 로딩 대기 및 확인
-                print("  필터 적용 후 데이터 업데이트 대기 중 (확인 중)...")
-
-                filter_word_gasoline_selector_info = self.config_loader.get(
-                    'data_selectors.applied_filter_gasoline_word', expected_type=dict)
-                filter_word_diesel_selector_info = self.config_loader.get('data_selectors.applied_filter_diesel_word',
-                                                                          expected_type=dict)
-
-                try:
-                    WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                        EC.presence_of_element_located((getattr(By, filter_word_gasoline_selector_info['type'].upper()),
-                                                        filter_word_gasoline_selector_info['selector']))
-                    )
-                    print("  [성공] '가솔린' 필터 적용 확인 완료.")
-                except TimeoutException:
-                    print(f"  [경고] '가솔린' 필터 적용을 확인하지 못했습니다. (셀렉터: {filter_word_gasoline_selector_info['selector']})")
-                    print("  필터 적용 셀렉터가 정확한지, 필터 적용 후 HTML이 즉시 업데이트되는지 확인 필요.")
-                    self.scraper.close()
-                    return
-
-                try:
-                    WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                        EC.presence_of_element_located((getattr(By, filter_word_diesel_selector_info['type'].upper()),
-                                                        filter_word_diesel_selector_info['selector']))
-                    )
-                    print("  [성공] '디젤' 필터 적용 확인 완료.")
-                except TimeoutException:
-                    print(f"  [경고] '디젤' 필터 적용을 확인하지 못했습니다. (셀렉터: {filter_word_diesel_selector_info['selector']})")
-                    print("  필터 적용 셀렉터가 정확한지, 필터 적용 후 HTML이 즉시 업데이트되는지 확인 필요.")
-                    self.scraper.close()
-                    return
-
-                # 두 필터가 모두 적용된 것을 확인한 후, 총 대수 요소가 업데이트될 때까지 대기
-                print("  두 필터 모두 적용 확인. 총 차량 대수 업데이트 대기...")
-                total_count_selector = self.config_loader.get('urls.total_count_selector', expected_type=dict)
-                try:
-                    WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                        EC.visibility_of_element_located(
-                            (getattr(By, total_count_selector['type'].upper()), total_count_selector['selector']))
-                    )
-                    print("  [성공] 총 차량 대수 요소가 나타남을 확인.")
-                    time.sleep(self.scraper.request_delay)
-                except TimeoutException:
-                    print(f"  [경고] 총 차량 대수 요소를 찾거나 업데이트를 확인하지 못했습니다. (셀렉터: {total_count_selector['selector']})")
-                    self.scraper.close()
-                    return
-
-                # 필터링된 페이지의 HTML 콘텐츠 가져오기
-                html_content_after_filter = self.scraper.driver.page_source
-                print("  [성공] 필터링된 페이지의 HTML 콘텐츠 가져오기 완료.")
-
-                # 2. 총 대수 정보 수집
-                print("\n[단계 2/5] 총 차량 대수 정보 수집 시도...")
-                total_cars = self.parser.get_total_count(html_content_after_filter, total_count_selector)
-                if total_cars is not None:
-                    print(f"  [성공] 총 차량 대수: {total_cars} 대")
-                else:
-                    print(f"  [경고] 총 차량 대수를 찾을 수 없습니다. 셀렉터가 유효한지 확인하세요: {total_count_selector['selector']}")
-                    self.scraper.close()
-                    return
-
-                # 3. '더보기' 버튼 클릭을 통한 동적 로딩
-                print("\n[단계 3/5] '더보기' 버튼 클릭 시도 (동적 로딩)...")
-
-                # 더보기 버튼 및 아이템 체크 셀렉터 정보 가져오기
-                more_button_selector_info = self.config_loader.get('urls.next_page_selector', expected_type=dict)
-                click_by_type = getattr(By, more_button_selector_info['type'].upper())
-
-                item_check_selector_for_count_info = more_button_selector_info.get('item_check_selector')
-                if not item_check_selector_for_count_info:
-                    print(f"  [오류] 'next_page_selector'에 'item_check_selector'가 누락되었습니다. 리스트 아이템 개수 확인 불가.")
-                    self.scraper.close()
-                    return
-
-                item_check_selector_for_count_type = getattr(By, item_check_selector_for_count_info[
-                    'type'].upper()) if isinstance(item_check_selector_for_count_info,
-                                                   dict) and 'type' in item_check_selector_for_count_info else click_by_type
-                item_check_selector_for_count_value = item_check_selector_for_count_info['selector'] if isinstance(
-                    item_check_selector_for_count_info,
-                    dict) and 'selector' in item_check_selector_for_count_info else item_check_selector_for_count_info
-
-                # 초기 리스트 아이템 개수 확인
-                initial_item_count = len(self.scraper.driver.find_elements(item_check_selector_for_count_type,
-                                                                           item_check_selector_for_count_value))
-                print(f"  초기 리스트 아이템 개수: {initial_item_count}개")
-
-                if initial_item_count == 0:
-                    print("  [경고] 초기 리스트 아이템 개수가 0개입니다. 필터링 결과가 없거나, 리스트 로딩에 문제가 있습니다. '더보기' 클릭을 건너뜁니다.")
-                    final_html_content = self.scraper.driver.page_source
-
-                    self.data_manager.save_debug_html("empty_initial_list_page", final_html_content,
-                                                      filename_suffix="empty_initial_list_page")
-                    print("  디버깅을 위해 'data/debug_html/debug_empty_initial_list_page.html'에 최종 HTML을 저장했습니다.")
-
-                # '더보기' 1회 클릭 후 증가하는 아이템 개수 측정 (initial_item_count가 0이 아닐 때만)
-                items_per_load = 0
-                if initial_item_count > 0:
-                    try:
-                        first_more_button = WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                            EC.element_to_be_clickable((click_by_type, more_button_selector_info['selector']))
-                        )
-                        print(f"  '더보기' 버튼 (최초 1회) 클릭하여 증가량 측정 시도...")
-                        first_more_button.click()
-
-                        WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                            lambda driver: len(driver.find_elements(item_check_selector_for_count_type,
-                                                                    item_check_selector_for_count_value)) > initial_item_count
-                        )
-                        current_item_after_first_click = len(
-                            self.scraper.driver.find_elements(item_check_selector_for_count_type,
-                                                              item_check_selector_for_count_value))
-                        items_per_load = current_item_after_first_click - initial_item_count
-                        print(f"  [측정 성공] '더보기' 1회 클릭 시 {items_per_load}개 아이템 증가 확인.")
-
-                    except (TimeoutException, NoSuchElementException) as e:
-                        print(f"  [경고] '더보기' 버튼 (최초 1회)을 찾을 수 없거나 클릭할 수 없습니다. 또는 아이템 증가 없음. 오류: {e}")
-                        print("  모든 아이템이 이미 로드되었거나 '더보기' 버튼이 없습니다. 현재 로드된 아이템만 수집합니다.")
-                        items_per_load = 0
-                    except Exception as e:
-                        print(f"  [오류] '더보기' 버튼 측정 클릭 중 치명적 오류 발생: {e}. 현재 로드된 아이템만 수집합니다.")
-                        items_per_load = 0
-
-                # 총 클릭 횟수 계산
-                clicks_needed = 0
-                if total_cars is not None and items_per_load > 0 and total_cars > initial_item_count:
-                    clicks_needed = (
-                                                total_cars - initial_item_count - items_per_load + items_per_load) // items_per_load  # ceiling division
-                    clicks_needed = max(0, clicks_needed)  # 음수가 되지 않도록
-                    print(
-                        f"  총 {total_cars}대 중 {initial_item_count + items_per_load}대가 로드됨. 추가로 {clicks_needed}번 더 클릭 필요.")
-                elif total_cars is not None and total_cars <= initial_item_count:
-                    print(f"  총 {total_cars}대 중 초기 {initial_item_count}대가 이미 로드됨. '더보기' 클릭 불필요.")
-                else:
-                    clicks_needed = self.config_loader.get('crawler_settings.scroll_load_limit', expected_type=int,
-                                                           default=5)
-                    print(f"  총 대수 또는 증가량 파악 불가. config의 scroll_load_limit({clicks_needed}회)만큼 클릭 시도.")
-
-                # 실제 '더보기' 버튼 반복 클릭 (initial_item_count가 0이 아닐 때만)
-                if initial_item_count > 0:
-                    current_item_count = initial_item_count + items_per_load if items_per_load > 0 else initial_item_count
-                    for i in range(clicks_needed):
-                        try:
-                            more_button = WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                                EC.element_to_be_clickable((click_by_type, more_button_selector_info['selector']))
-                            )
-                            print(f"  '더보기' 버튼 클릭 (시도 {i + 1}/{clicks_needed})...")
-                            more_button.click()
-
-                            WebDriverWait(self.scraper.driver, self.scraper.timeout).until(
-                                lambda driver: len(driver.find_elements(item_check_selector_for_count_type,
-                                                                        item_check_selector_for_count_value)) > current_item_count
-                            )
-
-                            new_item_count = len(self.scraper.driver.find_elements(item_check_selector_for_count_type,
-                                                                                   item_check_selector_for_count_value))
-                            print(f"  현재 리스트 아이템 개수: {new_item_count}개")
-
-                            if new_item_count <= current_item_count:
-                                print(f"  [정보] 리스트 아이템 개수가 증가하지 않았습니다. 더 이상 로드할 내용이 없거나 오류입니다. 스크롤 종료.")
-                                break
-
-                            current_item_count = new_item_count
-
-                        except (TimeoutException, NoSuchElementException) as e:
-                            print(f"  [정보] '더보기' 버튼을 더 이상 찾을 수 없거나 클릭할 수 없습니다. 스크롤 종료. 오류: {e}")
-                            break
-                        except Exception as e:
-                            print(f"  [오류] '더보기' 버튼 클릭 또는 아이템 개수 확인 중 치명적 오류 발생: {e}. 스크롤 종료.")
-                            break
-
-                # '더보기' 클릭 루프가 완료되었거나 건너뛴 경우 최종 HTML 가져오기
-                final_html_content = self.scraper.driver.page_source
-                print("  [성공] 모든 '더보기' 클릭 후 최종 HTML 콘텐츠 가져오기 완료.")
-
-                # 4. 가솔린/디젤 제품 번호 정보 수집
-                print("\n[단계 4/5] 최종 HTML에서 goodsNo 정보 수집 시도...")
-                goods_no_selector = self.config_loader.get('urls.goods_no_selector', expected_type=dict)
-                found_goods_nos_on_page = self.parser.parse_list_page_goods_nos(final_html_content, goods_no_selector)
-
-                if found_goods_nos_on_page:
-                    print(f"  [성공] 최종적으로 {len(found_goods_nos_on_page)}개의 goodsNo 발견.")
-                    # 새로 발견된 goodsNo만 추가 (기존 목록과 비교)
-                    newly_discovered_goods_nos = found_goods_nos_on_page - existing_goods_nos_set
-                    all_found_goods_nos_set.update(found_goods_nos_on_page)  # 전체 목록 업데이트
-
-                    # goods_nos.csv에 저장 (중복 방지 및 상태 초기화)
-                    if newly_discovered_goods_nos:
-                        # 기존 DataFrame에 새로 발견된 goodsNo 추가 (data_collected=False, mp3_downloaded=False)
-                        new_goods_nos_list = [{'goodsNo': gn, 'data_collected': False, 'mp3_downloaded': False} for gn
-                                              in newly_discovered_goods_nos]
-                        goods_nos_df = self.data_manager.add_new_goods_nos_to_df(goods_nos_df, new_goods_nos_list)
-                        self.data_manager.save_goods_nos_with_status(goods_nos_df)  # 전체 DataFrame 저장
-                        print(f"  [성공] 새로 발견된 goodsNo {len(newly_discovered_goods_nos)}개를 포함하여 goods_nos.csv에 저장 완료.")
-                    else:
-                        print("  [정보] 새로 발견된 goodsNo가 없습니다. goods_nos.csv 업데이트 건너뜁니다.")
-
-                else:
-                    print(f"  [경고] 최종 페이지에서 goodsNo를 찾을 수 없습니다. 셀렉터 오류일 수 있습니다.")
-                    self.data_manager.save_debug_html("final_list_page", final_html_content,
-                                                      filename_suffix="final_list_page")  # 디버그 저장
-                    print("  디버깅을 위해 'data/debug_html/debug_final_list_page.html'에 최종 HTML을 저장했습니다.")
-
-            except Exception as e:  # Selenium 관련 최상위 오류 처리
-                print(f"  [치명적 오류] Selenium 크롤링 과정에서 예상치 못한 오류 발생: {e}")
+            partitions = self._discovery_partitions()
+            print(f"  탐색 파티션 {len(partitions)}개: {', '.join(p['name'] for p in partitions)}")
+            found_goods_nos, total_cars, failed_partitions, discovery_ranks = \
+                self._run_discovery_partitions(partitions, list_url)
+            if failed_partitions == len(partitions):
+                print("  [치명적 오류] 모든 탐색 파티션이 실패했습니다. 크롤링을 중단합니다.")
                 self.scraper.close()
                 return
+            discovery_partial = failed_partitions > 0
+
+            # 4. 파티션별 결과를 합쳐 새로 발견된 goodsNo만 goods_nos.csv에 추가 (중복 제거)
+            print(f"\n[단계 4/5] 파티션 결과 병합: {len(found_goods_nos)}개의 고유 goodsNo "
+                  f"(실패한 파티션 {failed_partitions}개)")
+            all_found_goods_nos_set.update(found_goods_nos)
+            newly_discovered_goods_nos = found_goods_nos - existing_goods_nos_set
+            if newly_discovered_goods_nos:
+                # 기존 DataFrame에 새로 발견된 goodsNo 추가 (data_collected=False, mp3_downloaded=False)
+                new_goods_nos_list = [{'goodsNo': gn, 'data_collected': False, 'mp3_downloaded': False} for gn
+                                      in newly_discovered_goods_nos]
+                goods_nos_df = self.data_manager.add_new_goods_nos_to_df(goods_nos_df, new_goods_nos_list)
+                print(f"  [성공] 새로 발견된 goodsNo {len(newly_discovered_goods_nos)}개를 포함하여 goods_nos.csv에 저장합니다.")
+            else:
+                print("  [정보] 새로 발견된 goodsNo가 없습니다.")
+            # 목록 내 순서는 상세 수집 우선순위에 사용됩니다.
+            goods_nos_df = self.data_manager.update_discovery_ranks(goods_nos_df, discovery_ranks)
+            self.data_manager.save_goods_nos_with_status(goods_nos_df)  # 전체 DataFrame 저장
 
         else:  # Selenium 비활성화 시 로직 (정적 크롤링)
             print("  [정보] Selenium이 비활성화되어 동적 필터링 및 '더보기' 기능을 건너뛰고 정적 크롤링을 시도합니다.")
@@ -360,95 +622,166 @@ class MainCrawler:
         print(f"총 발견된 고유 goodsNo 개수: {len(all_found_goods_nos_set)}")
         if len(all_found_goods_nos_set) > 0:
             print("발견된 goodsNo (일부):", list(all_found_goods_nos_set)[:10])
+            self._record_listing_diff(all_found_goods_nos_set, total_cars, partial=discovery_partial)
         else:
             print("발견된 goodsNo가 없습니다.")
 
         # --- 상세 페이지 크롤링 루프 시작 ---
+        self.profiler.mark('detail_loop')
         print("\n--- 상세 페이지 크롤링 및 데이터 수집 시작 ---")
 
-        # goods_nos.csv에서 처리되지 않은 goodsNo만 가져오기
-        goods_nos_to_process_df = self.data_manager.load_goods_nos_with_status()
-        unprocessed_goods_nos = goods_nos_to_process_df[
-            (goods_nos_to_process_df['data_collected'] == False) |
-            (goods_nos_to_process_df['mp3_downloaded'] == False)
-            ]['goodsNo'].tolist()
+        # goods_nos.csv에서 처리되지 않은 goodsNo만 가져오기 (탐색 비교 결과가 반영된 최신 상태)
+        goods_nos_df = self.data_manager.load_goods_nos_with_status()
+        metadata_queue, audio_queue = self._split_work_queues(goods_nos_df)
 
-        if not unprocessed_goods_nos:
+        if not metadata_queue and not audio_queue:
             print("  [정보] 처리할 새로운 goodsNo가 없습니다. 상세 페이지 크롤링을 건너뜁니다.")
             self.scraper.close()  # Selenium 드라이버 종료
             print("Crawler finished.")
             return
 
-        print(f"  총 {len(unprocessed_goods_nos)}개의 goodsNo에 대해 상세 페이지 크롤링을 진행합니다.")
+        print(f"  총 {len(metadata_queue)}개의 goodsNo에 대해 상세 페이지 크롤링을 진행합니다. "
+              f"(오디오만 재시도: {len(audio_queue)}개)")
+        # 상세 수집은 CSV 순서가 아니라 우선순위 순서로 진행합니다. (실행이 중간에 끊겨도 유용한 레코드부터 수집)
+        detail_queue = self.detail_priority.build_queue(
+            goods_nos_df[goods_nos_df['goodsNo'].isin(metadata_queue)])
+        logger.info("  우선순위 상위: " + ", ".join(f"{goods_no}({score:.2f})"
+                                               for goods_no, score in detail_queue.peek(5)))
 
         detail_page_pattern = self.config_loader.get('urls.detail_page_pattern', expected_type=str)
         base_url = self.config_loader.get('urls.base_url', expected_type=str)
 
-        for i, goods_no in enumerate(unprocessed_goods_nos):
-            print(f"\n  [진행 {i + 1}/{len(unprocessed_goods_nos)}] goodsNo: {goods_no} 상세 데이터 수집 중...")
-            detail_url = f"{base_url}{detail_page_pattern.format(goods_no=goods_no)}"
+        flush_every = self.metrics_settings.get('flush_every', 20)
+        # 상세 페이지 HTML 가져오기 (Selenium 사용). crawler_settings.tabs_per_browser가 2 이상이면
+        # 한 브라우저의 여러 탭에서 동시에 로드하며, 결과는 로드가 끝난 순서대로 나옵니다.
+        detail_pages = self.scraper.fetch_many(
+            (goods_no, f"{base_url}{detail_page_pattern.format(goods_no=goods_no)}")
+            for goods_no in iter(detail_queue.pop, None))
+        for i, (goods_no, detail_html_content) in enumerate(self._profiled('detail_fetch', detail_pages)):
+            metrics.set_gauge('queue_depth', len(metadata_queue) - i - 1)
+            logger.info(f"\n  [진행 {i + 1}/{len(metadata_queue)}] goodsNo: {goods_no} 상세 데이터 처리 중...")
+            failure: Optional[Tuple[str, str]] = None  # (실패 분류, 사유)
 
             try:
-                # 상세 페이지 HTML 가져오기 (Selenium 사용)
-                detail_html_content = self.scraper.get_html(detail_url)
-
-                if detail_html_content:
+                if detail_html_content and self.retry_policy.is_removed_page(detail_html_content):
+                    logger.warning(f"  [경고] goodsNo {goods_no}는 삭제되었거나 판매 완료된 차량 페이지입니다.")
+                    failure = (FAILURE_PERMANENT, '삭제/판매 완료 안내 페이지')
+                elif detail_html_content:
                     # 1. 상세 페이지 데이터 추출
-                    extracted_data = self.parser.parse_detail_page(detail_html_content)
+                    with self.profiler.stage('detail_parse'):
+                        extracted_data = self.parser.parse_detail_page(detail_html_content)
                     extracted_data['goodsNo'] = goods_no  # goodsNo 추가
+                    if not extracted_data.get('vehicle_name'):
+                        raise _ParseMiss('상세 페이지에서 차량 정보를 찾을 수 없음')
 
                     # 2. MP3 파일 다운로드
                     audio_url = extracted_data.get('audio_url_on_page')
-                    audio_file_path = None  # 초기화
                     if audio_url:
-                        assets_dir = self.data_manager.create_vehicle_asset_dir(goods_no)  # 폴더 생성 및 경로 반환
-
-                        # URL에서 파일명 추출 (쿼리스트링 제거 및 확장자 확인)
-                        audio_filename = os.path.basename(audio_url.split('?')[0])
-                        if not audio_filename.lower().endswith(('.mp3', '.wav', '.ogg')):  # 확장자가 없으면 mp3 추가
-                            audio_filename += ".mp3"
-
-                        audio_file_path_full = os.path.join(assets_dir, audio_filename)
-
-                        # CSV에 저장될 상대 경로
-                        audio_file_path_relative = os.path.join('vehicle_assets', goods_no, audio_filename)
-                        extracted_data['audio_file_path'] = audio_file_path_relative  # 메타데이터에 파일 경로 추가
-
-                        print(f"    MP3 파일 다운로드 시도: {audio_url} -> {audio_file_path_full}")
-                        if self.audio_downloader.download_audio_file(audio_url,
-                                                                     audio_file_path_full):  # AudioDownloader 사용
-                            print(f"    [성공] MP3 파일 다운로드 완료: {audio_file_path_full}")
+                        # 오디오 URL을 상태 파일에 남겨두면 다운로드가 실패해도 다음 실행에서 HTTP GET만으로 재시도합니다.
+                        goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no,
+                                                                                'audio_url_on_page', audio_url)
+                        extracted_data['audio_file_path'] = self._download_audio(goods_no, audio_url)
+                        if extracted_data['audio_file_path']:
                             # goods_nos.csv의 mp3_downloaded 상태 업데이트
                             goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no,
                                                                                     'mp3_downloaded', True)
                         else:
-                            print(f"    [오류] MP3 파일 다운로드 실패: {audio_url}")
-                            extracted_data['audio_file_path'] = None  # 실패 시 경로 제거
+                            failure = self._audio_failure()
                     else:
-                        print("    [정보] 오디오 URL을 찾을 수 없습니다. MP3 다운로드 건너뜁니다.")
+                        logger.info("    [정보] 오디오 URL을 찾을 수 없습니다. MP3 다운로드 건너뜁니다.")
                         extracted_data['audio_file_path'] = None  # 오디오 URL 없으면 경로도 없음
+                        failure = (FAILURE_PARSE_MISS, '오디오 섹션 없음')
 
                     # 3. 메타데이터 CSV에 저장
-                    self.data_manager.save_metadata_to_csv(extracted_data)
-                    print(f"    [성공] goodsNo {goods_no}의 메타데이터 car_audio_metadata.csv에 저장 완료.")
+                    with self.profiler.stage('metadata_save'):
+                        self.data_manager.save_metadata_to_csv(extracted_data)
+                    logger.debug("    [성공] goodsNo %s의 메타데이터 car_audio_metadata.csv에 저장 완료.", goods_no)
 
                     # 4. goods_nos.csv에 데이터 수집 완료 상태 변경
                     goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, 'data_collected',
                                                                             True)
+                    metrics.inc('details_processed')
 
                 else:
-                    print(f"  [오류] goodsNo {goods_no}의 상세 페이지 HTML을 가져오는 데 실패했습니다.")
-                    # 실패 시에도 상태 업데이트 (재시도 방지 또는 로그)
-                    # goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, 'data_collected', False) # 실패했으니 False 유지
-                    # goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no, 'mp3_downloaded', False) # 실패했으니 False 유지
-
+                    logger.error(f"  [오류] goodsNo {goods_no}의 상세 페이지 HTML을 가져오는 데 실패했습니다.")
+                    status = self.scraper.last_error_status
+                    failure = (classify_status(status),
+                               f"상세 페이지 요청 실패{f' (HTTP {status})' if status else ''}")
+
+            except _ParseMiss as e:
+                logger.warning(f"  [경고] goodsNo {goods_no}: {e}")
+                failure = (FAILURE_PARSE_MISS, str(e))
             except Exception as e:
-                print(f"  [치명적 오류] goodsNo {goods_no} 상세 페이지 처리 중 오류 발생: {e}")
+                logger.error(f"  [치명적 오류] goodsNo {goods_no} 상세 페이지 처리 중 오류 발생: {e}")
+                failure = (classify_exception(e), f"{type(e).__name__}: {e}")
 
-            # 각 상세 페이지 처리 후 goods_nos_df를 저장하여 진행 상황을 보존
-            self.data_manager.save_goods_nos_with_status(goods_nos_df)
+            # 실패는 분류별 예산에 따라 다음 시도 시각을 미루거나 dead-letter로 옮기고, 성공하면 실패 기록을 지웁니다.
+            if failure:
+                goods_nos_df, _ = self.data_manager.record_goods_no_failure(goods_nos_df, goods_no, *failure,
+                                                                            policy=self.retry_policy)
+            else:
+                goods_nos_df = self.data_manager.clear_goods_no_failures(goods_nos_df, goods_no)
 
+            # 각 상세 페이지 처리 후 goods_nos_df를 저장하여 진행 상황을 보존
+            with self.profiler.stage('state_save'):
+                self.data_manager.save_goods_nos_with_status(goods_nos_df)
+            if flush_every and (i + 1) % flush_every == 0:
+                self._flush_metrics()
+                if self.feature_pipeline is not None:
+                    self.feature_pipeline.store.commit()
+
+        metrics.set_gauge('queue_depth', 0)
         print("\n--- 상세 페이지 크롤링 및 데이터 수집 완료 ---")
 
+        # --- 오디오만 재시도 (브라우저 없이 HTTP GET 한 번) ---
+        if audio_queue:
+            self.profiler.mark('audio_retry')
+            print(f"\n--- 오디오 재시도 시작: {len(audio_queue)}개 (상세 페이지 렌더링 없음) ---")
+            for i, (goods_no, audio_url) in enumerate(audio_queue):
+                metrics.set_gauge('audio_queue_depth', len(audio_queue) - i)
+                logger.info(f"\n  [오디오 {i + 1}/{len(audio_queue)}] goodsNo: {goods_no} 오디오 재다운로드 중...")
+                failure = None
+                try:
+                    audio_file_path = self._download_audio(goods_no, audio_url)
+                    if audio_file_path:
+                        if not self.data_manager.update_metadata_audio_path(goods_no, audio_file_path):
+                            logger.warning(f"    [경고] goodsNo {goods_no}의 메타데이터 행이 없어 "
+                                           f"audio_file_path를 기록하지 못했습니다.")
+                        goods_nos_df = self.data_manager.update_goods_no_status(goods_nos_df, goods_no,
+                                                                                'mp3_downloaded', True)
+                        metrics.inc('audio_retries_succeeded')
+                    else:
+                        failure = self._audio_failure()
+                except Exception as e:
+                    logger.error(f"  [치명적 오류] goodsNo {goods_no} 오디오 재시도 중 오류 발생: {e}")
+                    failure = (classify_exception(e), f"{type(e).__name__}: {e}")
+
+                if failure:
+                    goods_nos_df, _ = self.data_manager.record_goods_no_failure(goods_nos_df, goods_no, *failure,
+                                                                                policy=self.retry_policy)
+                else:
+                    goods_nos_df = self.data_manager.clear_goods_no_failures(goods_nos_df, goods_no)
+
+                with self.profiler.stage('state_save'):
+                    self.data_manager.save_goods_nos_with_status(goods_nos_df)
+            metrics.set_gauge('audio_queue_depth', 0)
+            print("\n--- 오디오 재시도 완료 ---")
+
+        if self.config_loader.get('audio_features', expected_type=dict, default={}).get('run_after_crawl', False):
+            self.profiler.mark('audio_features')
+            if self.feature_pipeline is not None:
+                # 스트리밍 저장소를 그대로 사용합니다. (같은 인덱스/메모리 맵을 두 저장소가 따로 열면
+                # 종료 시 스트리밍 쪽의 오래된 인덱스가 배치 결과를 덮어씀) run()이 인덱스를 다시 읽으므로 먼저 반영합니다.
+                self.feature_pipeline.store.commit()
+                self.feature_pipeline.run()
+            else:
+                from src.audio_features import AudioFeaturePipeline
+                AudioFeaturePipeline.from_config(self.config_loader, self.data_manager).run()
+
+        if self.config_loader.get('dedup', expected_type=dict, default={}).get('run_after_crawl', False):
+            self.profiler.mark('dedup')
+            from src.audio_fingerprint import DuplicateDetector
+            DuplicateDetector.from_config(self.config_loader, self.data_manager).run()
+
         self.scraper.close()  # Selenium 드라이버 종료
         print("Crawler finished.")
\ No newline at end of file
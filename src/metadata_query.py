@@ -0,0 +1,308 @@
+# src/metadata_query.py
+
+import bisect
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.columnar_store import METADATA_COLUMN_TYPES, convert_row, convert_value
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 값이 같은 행을 바로 찾는 해시 인덱스 (eq/in)
+HASH_INDEX_COLUMNS = ('fuel_type', 'year', 'vehicle_type', 'drivetrain', 'transmission_type', 'specific_anomaly')
+# 값 순으로 정렬해 두고 이분 탐색하는 범위 인덱스 (eq/lt/le/gt/ge)
+RANGE_INDEX_COLUMNS = ('year', 'current_mileage_km', 'displacement_cc', 'warranty_remaining_km',
+                       'warranty_remaining_months', 'overall_score', 'mid_freq_score', 'low_high_freq',
+                       'audible_range_score', 'regularity', 'irregularity')
+
+OPERATORS = ('eq', 'ne', 'in', 'lt', 'le', 'gt', 'ge')
+RESERVED_PARAMS = ('order_by', 'page', 'page_size')
+
+Predicate = Tuple[str, str, Any]
+
+_COMPARATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda a, b: a == b, 'ne': lambda a, b: a != b, 'in': lambda a, b: a in b,
+    'lt': lambda a, b: a < b, 'le': lambda a, b: a <= b, 'gt': lambda a, b: a > b, 'ge': lambda a, b: a >= b,
+}
+
+
+def parse_filters(params: Mapping[str, Any]) -> List[Predicate]:
+    """
+    {'fuel_type': '디젤', 'year': 2021, 'overall_score__lt': 70, 'warranty_remaining_km__gt': 0} 형태의 필터를
+    (컬럼, 연산자, 값) 목록으로 바꿉니다. 연산자를 생략하면 eq이며, in의 값은 리스트나 쉼표로 구분한 문자열입니다.
+    값은 컬럼 타입으로 변환되므로 HTTP 쿼리 문자열('70')과 파이썬 값(70)을 똑같이 받습니다.
+    """
+    predicates = []
+    for key, raw_value in params.items():
+        if key in RESERVED_PARAMS:
+            continue
+        column, _, op = key.partition('__')
+        op = op or 'eq'
+        if column not in METADATA_COLUMN_TYPES:
+            raise ValueError(f"알 수 없는 컬럼입니다: {column}")
+        if op not in OPERATORS:
+            raise ValueError(f"알 수 없는 연산자입니다: {op} (허용: {', '.join(OPERATORS)})")
+        if op == 'in':
+            raw_values = raw_value.split(',') if isinstance(raw_value, str) else list(raw_value)
+            value = frozenset(_convert_filter_value(column, v) for v in raw_values)
+        else:
+            value = _convert_filter_value(column, raw_value)
+        predicates.append((column, op, value))
+    return sorted(predicates, key=lambda p: (p[0], p[1], repr(p[2])))
+
+
+def _convert_filter_value(column: str, raw_value: Any) -> Any:
+    value = convert_value(column, raw_value)
+    if value is None or value == '':
+        raise ValueError(f"{column} 컬럼의 값으로 변환할 수 없습니다: {raw_value!r}")
+    return value
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or value == ''
+
+
+class _Snapshot:
+    """한 시점의 메타데이터 행과 인덱스, 결과 캐시. 파일이 바뀌면 통째로 새로 만들어 교체합니다."""
+
+    def __init__(self, rows: List[Dict[str, Any]], stamp: Tuple[int, int], cache_size: int):
+        self.rows = rows
+        self.stamp = stamp
+        self.positions = {row['goodsNo']: i for i, row in enumerate(rows)}
+        self.hash_index: Dict[str, Dict[Any, List[int]]] = {}
+        for column in HASH_INDEX_COLUMNS:
+            buckets: Dict[Any, List[int]] = {}
+            for i, row in enumerate(rows):
+                if not _is_null(row[column]):
+                    buckets.setdefault(row[column], []).append(i)
+            self.hash_index[column] = buckets
+        # column → (정렬된 값 목록, 같은 순서의 행 번호 목록)
+        self.range_index: Dict[str, Tuple[List[Any], List[int]]] = {}
+        for column in RANGE_INDEX_COLUMNS:
+            pairs = sorted((row[column], i) for i, row in enumerate(rows) if not _is_null(row[column]))
+            self.range_index[column] = ([value for value, _ in pairs], [i for _, i in pairs])
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Any, Tuple[int, ...]]" = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+    def cache_get(self, key: Any) -> Optional[Tuple[int, ...]]:
+        with self.cache_lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+            return result
+
+    def cache_put(self, key: Any, result: Tuple[int, ...]):
+        if self.cache_size <= 0:
+            return
+        with self.cache_lock:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def index_lookup(self, predicate: Predicate) -> Optional[Tuple[int, Callable[[], Sequence[int]]]]:
+        """인덱스로 처리할 수 있는 조건이면 (후보 수, 후보 행 번호를 만드는 함수)를 반환합니다."""
+        column, op, value = predicate
+        if column == 'goodsNo' and op == 'eq':
+            matched = [self.positions[value]] if value in self.positions else []
+            return len(matched), lambda: matched
+        if column in self.hash_index and op in ('eq', 'in'):
+            buckets = self.hash_index[column]
+            if op == 'eq':
+                matched = buckets.get(value, ())
+                return len(matched), lambda: matched
+            groups = [buckets.get(v, ()) for v in value]
+            return sum(map(len, groups)), lambda: [i for group in groups for i in group]
+        if column in self.range_index and op in ('eq', 'lt', 'le', 'gt', 'ge'):
+            values, row_ids = self.range_index[column]
+            try:
+                lo = bisect.bisect_right(values, value) if op == 'gt' else \
+                    bisect.bisect_left(values, value) if op in ('ge', 'eq') else 0
+                hi = bisect.bisect_left(values, value) if op == 'lt' else \
+                    bisect.bisect_right(values, value) if op in ('le', 'eq') else len(values)
+            except TypeError:  # 컬럼 타입과 비교할 수 없는 값
+                return 0, lambda: ()
+            return max(0, hi - lo), lambda: row_ids[lo:hi]
+        return None
+
+
+class MetadataQueryService:
+    """
+    car_audio_metadata.csv를 한 번 읽어 타입이 지정된 행과 보조 인덱스를 메모리에 두고 필터 질의에 답합니다.
+
+    - 해시 인덱스(HASH_INDEX_COLUMNS)와 범위 인덱스(RANGE_INDEX_COLUMNS) 중 후보가 가장 적은 조건 하나로
+      후보 행을 뽑고, 나머지 조건은 후보 행에서만 검사합니다. 값이 비어 있는 행은 어떤 조건과도 일치하지 않습니다.
+    - 같은 (필터, 정렬) 질의의 결과 행 번호는 LRU 캐시에 보관하므로 페이지만 바꾼 반복 질의는 다시 계산하지 않습니다.
+    - CSV 파일이 바뀌면(크롤링이 진행되면) 다음 질의 때 다시 읽고 인덱스와 캐시를 새로 만듭니다.
+    - make_server()로 로컬 HTTP 엔드포인트(GET /vehicles?..., GET /vehicles/{goodsNo})를 열 수 있습니다.
+    """
+
+    def __init__(self, metadata_csv_path: str, cache_size: int = 256, max_page_size: int = 500,
+                 auto_reload: bool = True):
+        self.metadata_csv_path = metadata_csv_path
+        self.cache_size = cache_size
+        self.max_page_size = max_page_size
+        self.auto_reload = auto_reload
+        self._snapshot: Optional[_Snapshot] = None
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "MetadataQueryService":
+        settings = config_loader.get('metadata_query', expected_type=dict, default={})
+        return cls(
+            data_manager.metadata_csv_path,
+            cache_size=settings.get('cache_size', 256),
+            max_page_size=settings.get('max_page_size', 500),
+        )
+
+    # --- 로드 ---
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self.metadata_csv_path)
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, stamp: Tuple[int, int]) -> _Snapshot:
+        started_at = time.monotonic()
+        rows: Dict[str, Dict[str, Any]] = {}
+        if stamp != (0, 0):
+            with open(self.metadata_csv_path, 'r', encoding='utf-8', newline='') as f:
+                for raw in csv.DictReader(f):
+                    if raw.get('goodsNo'):
+                        row = convert_row(raw)
+                        row['duplicate_group'] = raw.get('duplicate_group') or None
+                        rows[row['goodsNo']] = row  # 같은 goodsNo가 여러 번이면 마지막 행
+        snapshot = _Snapshot([rows[goods_no] for goods_no in sorted(rows)], stamp, self.cache_size)
+        metrics.observe('metadata_query_load_seconds', time.monotonic() - started_at)
+        logger.info(f"  [질의] 메타데이터 {len(rows)}행을 읽고 인덱스를 만들었습니다.")
+        return snapshot
+
+    def snapshot(self) -> _Snapshot:
+        """현재 스냅샷을 반환합니다. 처음이거나 (auto_reload일 때) 파일이 바뀌었으면 다시 읽습니다."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self.auto_reload:
+            return snapshot
+        stamp = self._file_stamp()
+        if snapshot is None or snapshot.stamp != stamp:
+            with self._load_lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.stamp != stamp:
+                    snapshot = self._snapshot = self._load(stamp)
+        return snapshot
+
+    def reload(self):
+        with self._load_lock:
+            self._snapshot = self._load(self._file_stamp())
+
+    # --- 질의 ---
+
+    def get(self, goods_no: str) -> Optional[Dict[str, Any]]:
+        snapshot = self.snapshot()
+        position = snapshot.positions.get(str(goods_no))
+        return None if position is None else dict(snapshot.rows[position])
+
+    def _execute(self, snapshot: _Snapshot, predicates: List[Predicate],
+                 order_by: Optional[str]) -> Tuple[int, ...]:
+        lookups = [(lookup, predicate) for predicate in predicates
+                   for lookup in [snapshot.index_lookup(predicate)] if lookup is not None]
+        if lookups:
+            (_, candidates), driver = min(lookups, key=lambda item: item[0][0])
+            residual = [p for p in predicates if p is not driver]
+            candidate_ids = sorted(candidates())
+        else:
+            residual = predicates
+            candidate_ids = range(len(snapshot.rows))
+
+        rows = snapshot.rows
+        matched = [i for i in candidate_ids
+                   if all(not _is_null(rows[i][column]) and _COMPARATORS[op](rows[i][column], value)
+                          for column, op, value in residual)]
+        if order_by:
+            column = order_by.lstrip('-')
+            descending = order_by.startswith('-')
+            present = [i for i in matched if not _is_null(rows[i][column])]
+            present.sort(key=lambda i: rows[i][column], reverse=descending)
+            matched = present + [i for i in matched if _is_null(rows[i][column])]  # 빈 값은 항상 마지막
+        return tuple(matched)
+
+    def query(self, filters: Optional[Mapping[str, Any]] = None, order_by: Optional[str] = None,
+              page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        """
+        필터와 일치하는 차량을 페이지 단위로 반환합니다.
+          filters : parse_filters 형식 ({'fuel_type': '디젤', 'overall_score__lt': 70, ...})
+          order_by: 정렬 컬럼. '-overall_score'처럼 앞에 '-'를 붙이면 내림차순 (기본: goodsNo 오름차순)
+        반환: {'total', 'page', 'page_size', 'pages', 'items': [행 딕셔너리...]}
+        """
+        started_at = time.monotonic()
+        predicates = parse_filters(filters or {})
+        if order_by and order_by.lstrip('-') not in METADATA_COLUMN_TYPES:
+            raise ValueError(f"알 수 없는 정렬 컬럼입니다: {order_by}")
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), self.max_page_size))
+
+        snapshot = self.snapshot()
+        key = (tuple(predicates), order_by or None)
+        result = snapshot.cache_get(key)
+        metrics.inc('metadata_queries', cache='hit' if result is not None else 'miss')
+        if result is None:
+            result = self._execute(snapshot, predicates, order_by)
+            snapshot.cache_put(key, result)
+
+        start = (page - 1) * page_size
+        items = [dict(snapshot.rows[i]) for i in result[start:start + page_size]]
+        metrics.observe('metadata_query_seconds', time.monotonic() - started_at)
+        return {'total': len(result), 'page': page, 'page_size': page_size,
+                'pages': (len(result) + page_size - 1) // page_size, 'items': items}
+
+    # --- HTTP ---
+
+    def handle_request(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        """GET 요청 경로를 처리하여 (HTTP 상태 코드, JSON 본문)을 반환합니다. (서버 없이도 호출 가능)"""
+        url = urlsplit(path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        if parts[:1] != ['vehicles'] or len(parts) > 2:
+            return 404, {'error': '지원하는 경로: /vehicles, /vehicles/{goodsNo}'}
+        if len(parts) == 2:
+            row = self.get(parts[1])
+            return (200, row) if row is not None else (404, {'error': f"goodsNo {parts[1]}이(가) 없습니다."})
+
+        params: Dict[str, Any] = {}
+        for key, values in parse_qs(url.query, keep_blank_values=True).items():
+            params[key] = ','.join(values) if key.endswith('__in') else values[-1]
+        try:
+            return 200, self.query(params, order_by=params.get('order_by') or None,
+                                   page=params.get('page', 1), page_size=params.get('page_size', 50))
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+    def make_server(self, host: str = '127.0.0.1', port: int = 8765):
+        """질의 엔드포인트용 ThreadingHTTPServer를 만듭니다. (serve_forever()로 실행)"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 서버를 쓸 때만 임포트
+
+        service = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, payload = service.handle_request(self.path)
+                body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # 요청마다 콘솔에 출력하지 않음
+                pass
+
+        return ThreadingHTTPServer((host, port), _Handler)
@@ -0,0 +1,244 @@
+# src/metrics.py
+
+import json
+import logging
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 지연시간(초) 측정용 기본 버킷
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 바이트/속도 측정용 버킷 (1KB ~ 64MB)
+DEFAULT_SIZE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(10))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    """고정 버킷 히스토그램입니다. 합계/개수/최소/최대도 함께 기록합니다."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 경계 기준의 근사 분위수를 반환합니다."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """
+    크롤러 전체에서 공유하는 카운터/게이지/히스토그램 저장소입니다.
+    스레드 안전하며, JSON-lines 파일과 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+    enabled가 False이면 inc/set_gauge/observe는 락도 잡지 않고 바로 반환합니다. (metrics.enabled: false)
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._histogram_buckets: Dict[str, Tuple[float, ...]] = {}
+        self.started_at = time.time()
+        self._server = None  # http.server.ThreadingHTTPServer (start_prometheus_server 호출 시 생성)
+
+    def reset(self):
+        """모든 측정값을 초기화하고 실행 시작 시각을 갱신합니다."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self._histogram_buckets:
+                self._histogram_buckets[name] = tuple(buckets)
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._histogram_buckets[name])
+            histogram.observe(value)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def counter_total(self, name: str) -> float:
+        """라벨에 상관없이 카운터의 합계를 반환합니다."""
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def snapshot(self) -> dict:
+        """현재 측정값 전체를 JSON 직렬화 가능한 딕셔너리로 반환합니다."""
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'elapsed_sec': time.time() - self.started_at,
+                'counters': {name: [{'labels': dict(k), 'value': v} for k, v in series.items()]
+                             for name, series in self._counters.items()},
+                'gauges': {name: [{'labels': dict(k), 'value': v} for k, v in series.items()]
+                           for name, series in self._gauges.items()},
+                'histograms': {name: [{'labels': dict(k), **h.to_dict()} for k, h in series.items()]
+                               for name, series in self._histograms.items()},
+            }
+
+    def export_jsonl(self, path: str):
+        """현재 스냅샷을 JSON-lines 파일에 한 줄로 추가합니다."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False) + "\n")
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식(text/plain; version=0.0.4)으로 변환합니다."""
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# TYPE egai_{name} counter")
+                for key, value in series.items():
+                    lines.append(f"egai_{name}{_format_labels(key)} {value}")
+            for name, series in self._gauges.items():
+                lines.append(f"# TYPE egai_{name} gauge")
+                for key, value in series.items():
+                    lines.append(f"egai_{name}{_format_labels(key)} {value}")
+            for name, series in self._histograms.items():
+                lines.append(f"# TYPE egai_{name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for upper, c in zip(h.buckets, h.counts):
+                        cumulative += c
+                        lines.append(f"egai_{name}_bucket{_format_labels(key, ('le', repr(upper)))} {cumulative}")
+                    lines.append(f"egai_{name}_bucket{_format_labels(key, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"egai_{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"egai_{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def start_prometheus_server(self, port: int, host: str = "127.0.0.1"):
+        """/metrics 경로로 Prometheus 텍스트를 제공하는 HTTP 서버를 백그라운드 스레드에서 시작합니다."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 서버를 쓸 때만 임포트
+
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # 요청마다 콘솔에 출력하지 않음
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info("Prometheus 메트릭 엔드포인트 시작: http://%s:%s/metrics", host, port)
+
+    def stop_prometheus_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def summary(self) -> dict:
+        """실행 단위 요약 리포트(주요 처리량/지연시간 지표)를 반환합니다."""
+        snapshot = self.snapshot()
+        elapsed_min = max(snapshot['elapsed_sec'], 1e-9) / 60
+        pages = self.counter_total('pages_fetched')
+        report = {
+            'elapsed_sec': round(snapshot['elapsed_sec'], 2),
+            'pages_fetched': pages,
+            'pages_per_minute': round(pages / elapsed_min, 2),
+            'fetch_retries': self.counter_total('fetch_retries'),
+            'details_processed': self.counter_total('details_processed'),
+            'audio_downloaded': self.counter_total('audio_downloads'),
+            'download_bytes': self.counter_total('download_bytes'),
+            'download_retries': self.counter_total('download_retries'),
+        }
+        for name, series in snapshot['histograms'].items():
+            for entry in series:
+                label = ",".join(f"{k}={v}" for k, v in entry['labels'].items())
+                report[f"{name}[{label}]" if label else name] = {
+                    k: (round(v, 4) if isinstance(v, float) else v)
+                    for k, v in entry.items() if k in ('count', 'mean', 'p50', 'p95', 'max')
+                }
+        return report
+
+    def format_summary(self) -> str:
+        lines = ["--- 실행 메트릭 요약 ---"]
+        for key, value in self.summary().items():
+            lines.append(f"  {key}: {value}")
+        return "\n".join(lines)
+
+
+# 프로세스 전역에서 공유하는 기본 레지스트리
+metrics = MetricsRegistry()
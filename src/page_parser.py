@@ -1,22 +1,105 @@
-from bs4 import BeautifulSoup
-from typing import Optional, Union, Type, Tuple, Any  # Type 추가
+import logging
+import time
+from typing import Optional, Union, Type, Tuple, Any, Iterable, List  # Type 추가
 import re
-from lxml import html
+from lxml import html, etree
 from lxml.cssselect import CSSSelector
 
+from src.metrics import metrics
+from src.value_converters import CONVERTERS
+from src.vehicle_record import VehicleRecord
+
+logger = logging.getLogger(__name__)
+
 
 # ConfigLoader와 WebScraper는 PageParser.py가 직접 실행될 때만 필요하므로,
 # if __name__ == "__main__": 블록 안으로 임포트 위치를 옮깁니다.
 
 
+# 목록 링크 href에서 goodsNo를 뽑는 정규식 (사이트의 함수명 오타 'goodsDeatil' 그대로)
+GOODS_NO_HREF_PATTERN = re.compile(r"common\.link\.goodsDeatil\('([^']+)'\)")
+
+# 기본 정보 리스트(base_01)의 항목 제목 → 메타데이터 컬럼명 매핑
+BASE_INFO_TITLE_MAP = {
+    "최초등록": "first_registration_date",
+    "주행거리": "current_mileage_km",
+    "연료": "fuel_type",
+    "배기량": "displacement_cc",
+    "외관컬러": "exterior_color",
+    "내장컬러": "interior_color",
+    "차종": "vehicle_type",
+    "승차인원": "seating_capacity",
+    "구동방식": "drivetrain",
+    "차량번호": "vehicle_number",
+    "연식": "year",
+    "변속기": "transmission_type",
+}
+# field_types가 지정되지 않았을 때 기본 정보 리스트 항목에 적용할 기본 output_type
+DEFAULT_BASE_INFO_FIELD_TYPES = {
+    "current_mileage_km": "int", "displacement_cc": "int", "seating_capacity": "int", "year": "int",
+}
+
+
+class _CompiledSelector:
+    """data_selectors 항목 하나를 미리 컴파일한 결과입니다. (XPath/CSS 객체와 output_type 변환 함수)"""
+
+    __slots__ = ("key", "info", "extract_method", "extract_attribute", "clean_regex", "invert_boolean",
+                 "is_iframe", "skip", "matcher", "converter", "field_converters")
+
+    def __init__(self, key: str, info: dict):
+        self.key = key
+        self.info = info
+        self.extract_method = info.get("extract_method")
+        self.extract_attribute = info.get("extract_attribute")
+        clean_regex = info.get("clean_regex")
+        self.clean_regex = re.compile(clean_regex) if clean_regex else None
+        self.invert_boolean = info.get("invert_boolean", False)
+        self.is_iframe = info.get("is_iframe", False)
+        # 필터 관련 셀렉터는 상세 페이지 추출 대상이 아님
+        self.skip = key.startswith("fuel_type_filter_") or key.startswith("applied_filter_")
+
+        selector_type = info.get("type")
+        selector_value = info.get("selector")
+        self.matcher = None
+        if not self.skip and not self.is_iframe:
+            try:
+                if selector_type == "xpath":
+                    self.matcher = etree.XPath(selector_value)
+                elif selector_type == "css":
+                    self.matcher = CSSSelector(selector_value)
+                else:
+                    logger.warning(f"경고: 지원되지 않는 셀렉터 타입 '{selector_type}' for {key}.")
+            except Exception as e:  # XPathSyntaxError, cssselect의 SelectorError 등
+                raise ValueError(f"'{key}' 셀렉터를 컴파일할 수 없습니다: {selector_value!r} ({e})") from e
+
+        self.converter = _resolve_converter(key, info.get("output_type"))
+        self.field_converters = {}
+        if self.extract_method == "list_key_value":
+            field_types = dict(DEFAULT_BASE_INFO_FIELD_TYPES, **info.get("field_types", {}))
+            self.field_converters = {field: _resolve_converter(f"{key}.{field}", output_type)
+                                     for field, output_type in field_types.items()}
+
+
+def _resolve_converter(key: str, output_type: Optional[str]):
+    if output_type is None:
+        return None
+    if output_type not in CONVERTERS:
+        raise ValueError(f"'{key}'의 output_type '{output_type}'은(는) 지원되지 않습니다. "
+                         f"(지원: {', '.join(CONVERTERS)})")
+    return CONVERTERS[output_type]
+
+
 class PageParser:
     """
     HTML 콘텐츠를 분석하여 config에 정의된 셀렉터들을 기반으로 데이터를 추출하는 클래스입니다.
-    BeautifulSoup과 lxml을 모두 사용하여 CSS Selector와 XPath를 지원합니다.
+    lxml을 사용하여 CSS Selector와 XPath를 지원합니다.
+    셀렉터는 생성 시 한 번만 컴파일되며, output_type이 지정된 값은 추출 시점에 해당 타입으로 변환됩니다.
+    (int, float, bool, date, months_from_korean_duration, str)
     """
 
     def __init__(self, data_selectors_config: dict):  # config_loader_instance 인자 제거
         self.selectors = data_selectors_config
+        self._compiled = [_CompiledSelector(key, info) for key, info in data_selectors_config.items()]
 
     def _get_lxml_tree(self, html_content: str):
         return html.fromstring(html_content)
@@ -35,6 +118,7 @@ class PageParser:
         return None
 
     def parse_list_page_goods_nos(self, html_content: str, goods_no_selector_config: dict) -> set:
+        started_at = time.monotonic()
         tree = self._get_lxml_tree(html_content)
         goods_nos = set()
 
@@ -43,7 +127,7 @@ class PageParser:
         extract_attribute = goods_no_selector_config.get("extract_attribute")
 
         if not selector_type or not selector_value:
-            print(f"오류: goods_no_selector 설정에 'type' 또는 'selector'가 누락되었습니다.")
+            logger.error(f"오류: goods_no_selector 설정에 'type' 또는 'selector'가 누락되었습니다.")
             return goods_nos
 
         elements = []
@@ -53,11 +137,11 @@ class PageParser:
             css_selector_obj = CSSSelector(selector_value)
             elements = css_selector_obj(tree)
         else:
-            print(f"오류: 지원되지 않는 셀렉터 타입: {selector_type}")
+            logger.error(f"오류: 지원되지 않는 셀렉터 타입: {selector_type}")
             return goods_nos
 
         if not elements:
-            print(f"  [파서] 셀렉터 '{selector_value}'로 아무 요소도 찾을 수 없습니다. (HTML 내용 확인 필요)")
+            logger.warning(f"  [파서] 셀렉터 '{selector_value}'로 아무 요소도 찾을 수 없습니다. (HTML 내용 확인 필요)")
             return goods_nos
 
         for element in elements:
@@ -66,15 +150,31 @@ class PageParser:
                 goods_no_info = element.get(extract_attribute)
 
             if goods_no_info:
-                match = re.search(r"common\.link\.goodsDeatil\('([^']+)'\)", goods_no_info)
-                if match:
-                    goods_nos.add(match.group(1))
-                else:
-                    print(f"경고: goodsNo를 '{goods_no_info}'에서 추출할 수 없습니다. 정규식 확인 필요. (전체 href: {goods_no_info})")
+                goods_no = self.extract_goods_no(goods_no_info)
+                if goods_no:
+                    goods_nos.add(goods_no)
             else:
-                print(f"경고: 요소에 'extract_attribute'('{extract_attribute}') 속성이 없거나 비어 있습니다. (요소: {element.tag})")
+                logger.warning(f"경고: 요소에 'extract_attribute'('{extract_attribute}') 속성이 없거나 비어 있습니다. (요소: {element.tag})")
+        metrics.observe('parse_seconds', time.monotonic() - started_at, page='list')
         return goods_nos
 
+    @staticmethod
+    def extract_goods_no(href: str) -> Optional[str]:
+        """목록 링크의 href(common.link.goodsDeatil('...'))에서 goodsNo를 추출합니다."""
+        match = GOODS_NO_HREF_PATTERN.search(href)
+        if match:
+            return match.group(1)
+        logger.warning(f"경고: goodsNo를 '{href}'에서 추출할 수 없습니다. 정규식 확인 필요. (전체 href: {href})")
+        return None
+
+    def goods_nos_from_hrefs(self, hrefs: Iterable[Optional[str]]) -> List[str]:
+        """
+        브라우저에서 직접 받은 링크 속성값 목록에서 goodsNo를 추출합니다. (page_source 파싱 없이)
+        중복을 제거하되 목록에 나타난 순서를 유지합니다. (discovery_rank 계산에 사용)
+        """
+        return list(dict.fromkeys(goods_no for goods_no in map(self.extract_goods_no, filter(None, hrefs))
+                                  if goods_no))
+
     def get_total_count(self, html_content: str, selector_info: dict) -> Optional[int]:
         tree = self._get_lxml_tree(html_content)
 
@@ -89,113 +189,59 @@ class PageParser:
                 if numbers:
                     return int(numbers[0])
                 else:
-                    print(f"  [파서] '{text}'에서 숫자를 찾을 수 없습니다.")
+                    logger.warning(f"  [파서] '{text}'에서 숫자를 찾을 수 없습니다.")
             except (ValueError, TypeError) as e:
-                print(f"  [파서] 총 대수 텍스트 파싱 중 오류 ({selector_value}): {e}")
+                logger.warning(f"  [파서] 총 대수 텍스트 파싱 중 오류 ({selector_value}): {e}")
         else:
-            print(f"  [파서] 총 대수 셀렉터 '{selector_value}'로 요소를 찾을 수 없습니다.")
+            logger.warning(f"  [파서] 총 대수 셀렉터 '{selector_value}'로 요소를 찾을 수 없습니다.")
         return None
 
-    def parse_detail_page(self, html_content: str) -> dict:
+    def parse_detail_page(self, html_content: str) -> VehicleRecord:
+        """
+        상세 페이지에서 data_selectors에 정의된 값을 추출하여 VehicleRecord로 반환합니다.
+        VehicleRecord는 딕셔너리와 같은 방식(record[key], record.get(key))으로 사용할 수 있습니다.
+        """
+        started_at = time.monotonic()
         tree = self._get_lxml_tree(html_content)
-        soup = BeautifulSoup(html_content, 'html.parser')
-        extracted_data = {}
+        extracted_data = VehicleRecord()
 
-        for key, selector_info in self.selectors.items():
-            # 필터 관련 셀렉터는 상세 페이지 디버그에서 제외 (None 나오는 원인 중 하나)
-            if key.startswith("fuel_type_filter_") or key.startswith("applied_filter_"):
+        for compiled in self._compiled:
+            key = compiled.key
+            if compiled.skip:
                 extracted_data[key] = None
                 continue
 
-            selector_type = selector_info.get("type")
-            selector_value = selector_info.get("selector")
-            extract_method = selector_info.get("extract_method")
-            extract_attribute = selector_info.get("extract_attribute")
-            clean_regex = selector_info.get("clean_regex")
-            invert_boolean = selector_info.get("invert_boolean", False)
-            is_iframe = selector_info.get("is_iframe", False)
-
-            if is_iframe:
-                print(f"경고: iframe 감지됨 ({key}). iframe 내 요소는 Selenium/Playwright가 필요합니다.")
+            if compiled.is_iframe:
+                logger.warning(f"경고: iframe 감지됨 ({key}). iframe 내 요소는 Selenium/Playwright가 필요합니다.")
                 extracted_data[key] = None
                 continue
 
             # --- 'list_key_value' 추출 방식 처리 (기본 정보 리스트) ---
-            if extract_method == "list_key_value":
-                if selector_type == "xpath":
-                    list_elements = tree.xpath(selector_value)
-                elif selector_type == "css":
-                    css_selector_obj = CSSSelector(selector_value)
-                    list_elements = css_selector_obj(tree)
-                else:
-                    print(f"경고: 'list_key_value'를 위한 지원되지 않는 셀렉터 타입: {selector_type} for {key}.")
+            if compiled.extract_method == "list_key_value":
+                if compiled.matcher is None:
                     continue
-
-                if list_elements:
-                    for li_element in list_elements:
-                        try:
-                            title_span_elements = li_element.xpath("./span[@class='tit']")
-                            value_span_elements = li_element.xpath("./span[@class='txt']")
-
-                            title = title_span_elements[0].text_content().strip() if title_span_elements else None
-                            value = value_span_elements[0].text_content().strip() if value_span_elements else None
-
-                            if title and value is not None:
-                                # 키 매핑 및 클리닝 (ConfigManager의 컬럼명과 일치하도록)
-                                mapped_key = None
-                                if title == "최초등록":
-                                    mapped_key = "first_registration_date"
-                                elif title == "주행거리":
-                                    mapped_key = "current_mileage_km"
-                                elif title == "연료":
-                                    mapped_key = "fuel_type"
-                                elif title == "배기량":
-                                    mapped_key = "displacement_cc"
-                                elif title == "외관컬러":
-                                    mapped_key = "exterior_color"
-                                elif title == "내장컬러":
-                                    mapped_key = "interior_color"
-                                elif title == "차종":
-                                    mapped_key = "vehicle_type"
-                                elif title == "승차인원":
-                                    mapped_key = "seating_capacity"
-                                elif title == "구동방식":
-                                    mapped_key = "drivetrain"
-                                elif title == "차량번호":
-                                    mapped_key = "vehicle_number"
-                                elif title == "연식":
-                                    mapped_key = "year"
-                                elif title == "변속기":
-                                    mapped_key = "transmission_type"
-                                # '압류', '저당', '내차피해', '소유자 변경' 등은 base_01 리스트에 포함되지 않으므로 여기서 매핑하지 않음.
-                                # 이들은 아래 개별 셀렉터로 처리됩니다. (경고 제거)
-
-                                if mapped_key:
-                                    if mapped_key in ["current_mileage_km", "displacement_cc", "seating_capacity",
-                                                      "year"]:
-                                        extracted_data[mapped_key] = re.sub(r'[^0-9]', '', value)
-                                    else:
-                                        extracted_data[mapped_key] = value
-                                # else:
-                                # print(f"경고: 기본 정보 리스트의 알 수 없는 항목: {title}: {value}") # 이 경고는 이제 안 나와야 함
-                            # else:
-                            # print(f"경고: 기본 정보 리스트 항목의 제목 또는 값이 누락되었습니다. (li: {li_element.text_content().strip()[:50]})")
-
-                        except Exception as e:
-                            print(f"경고: 기본 정보 리스트 파싱 중 오류 발생: {e} (요소: {li_element.text_content().strip()[:50]})")
+                for li_element in compiled.matcher(tree):
+                    try:
+                        title_span_elements = li_element.xpath("./span[@class='tit']")
+                        value_span_elements = li_element.xpath("./span[@class='txt']")
+
+                        title = title_span_elements[0].text_content().strip() if title_span_elements else None
+                        value = value_span_elements[0].text_content().strip() if value_span_elements else None
+
+                        # '압류', '저당', '내차피해', '소유자 변경' 등은 base_01 리스트에 포함되지 않으므로
+                        # 아래 개별 셀렉터로 처리됩니다.
+                        mapped_key = BASE_INFO_TITLE_MAP.get(title) if title else None
+                        if mapped_key and value is not None:
+                            converter = compiled.field_converters.get(mapped_key)
+                            extracted_data[mapped_key] = converter(value) if converter else value
+                    except Exception as e:
+                        logger.warning(f"경고: 기본 정보 리스트 파싱 중 오류 발생: {e} (요소: {li_element.text_content().strip()[:50]})")
                 continue
 
-                # --- 기존 개별 셀렉터 처리 (list_key_value에 포함되지 않는 셀렉터만) ---
-            elements_found_by_selector = []
-            if selector_type == "xpath":
-                elements_found_by_selector = tree.xpath(selector_value)
-            elif selector_type == "css":
-                css_selector_obj = CSSSelector(selector_value)
-                elements_found_by_selector = css_selector_obj(tree)
-            else:
-                print(f"경고: 지원되지 않는 셀렉터 타입 '{selector_type}' for {key}.")
-
+            # --- 개별 셀렉터 처리 (list_key_value에 포함되지 않는 셀렉터만) ---
+            elements_found_by_selector = compiled.matcher(tree) if compiled.matcher is not None else []
             element_or_value = elements_found_by_selector[0] if elements_found_by_selector else None
+            extract_method = compiled.extract_method
 
             value = None
 
@@ -206,21 +252,19 @@ class PageParser:
                     else:
                         value = str(element_or_value).strip()
 
-                    if clean_regex:
-                        value = re.sub(clean_regex, '', value).strip()
-                elif extract_method == "attribute" and extract_attribute:
+                    if compiled.clean_regex:
+                        value = compiled.clean_regex.sub('', value).strip()
+                elif extract_method == "attribute" and compiled.extract_attribute:
                     if isinstance(element_or_value, html.HtmlElement):
-                        value = element_or_value.get(extract_attribute)
+                        value = element_or_value.get(compiled.extract_attribute)
                     else:  # 이미 속성 값 (문자열)이 추출된 경우
                         value = str(element_or_value).strip() if isinstance(element_or_value, (str,
-                                                                                               html.etree._ElementUnicodeResult)) else None
-                        # print(f"경고: '{key}' ({selector_value}) 셀렉터는 속성 추출을 요구하지만, 반환된 요소는 HTML Element가 아닙니다. 값: '{value}'") # 이 경고 제거
+                                                                                               etree._ElementUnicodeResult)) else None
                 elif extract_method == "exists":
                     value = True
                 elif extract_method == "count":
                     value = len(elements_found_by_selector)
                 elif extract_method == "count_gt_zero":
-                    text_val = ""
                     if isinstance(element_or_value, html.HtmlElement):
                         text_val = element_or_value.text_content().strip()
                     else:
@@ -240,11 +284,15 @@ class PageParser:
                 else:
                     value = None
 
-            if extract_method in ["exists", "count_gt_zero"] and invert_boolean:
+            if extract_method in ["exists", "count_gt_zero"] and compiled.invert_boolean:
                 value = not value
 
+            if compiled.converter is not None and value is not None:
+                value = compiled.converter(value)
+
             extracted_data[key] = value
 
+        metrics.observe('parse_seconds', time.monotonic() - started_at, page='detail')
         return extracted_data
 
 
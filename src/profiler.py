@@ -0,0 +1,163 @@
+# src/profiler.py
+
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+
+class StageProfiler:
+    """
+    MainCrawler.run의 각 단계(stage)를 계측하는 선택적 프로파일러입니다. (main.py --profile)
+
+    - stage(name): 구간의 벽시계 시간(wall time)을 누적합니다. 중첩 가능합니다.
+    - mark(name): 순차적인 상위 단계를 전환합니다. (이전 단계를 닫고 새 단계를 엽니다)
+    - use_cprofile=True이면 단계별로 cProfile을 수행해 .prof 파일을 저장합니다.
+    - 백그라운드 스레드가 대상 스레드의 스택을 주기적으로 샘플링하여,
+      flamegraph.pl / speedscope 등에서 읽을 수 있는 collapsed-stack 파일을 생성합니다.
+
+    비활성화 상태에서는 모든 메서드가 즉시 반환되므로 기본 실행 경로에 비용이 없습니다.
+    """
+
+    def __init__(self, enabled: bool = False, use_cprofile: bool = False, sample_interval_sec: float = 0.005):
+        self.enabled = enabled
+        self.use_cprofile = use_cprofile
+        self.sample_interval_sec = sample_interval_sec
+
+        self.stage_totals: Dict[str, float] = defaultdict(float)
+        self.stage_counts: Dict[str, int] = defaultdict(int)
+        self.stage_order: List[str] = []
+        self._stack: List[str] = []
+        self._marked_stage: Optional[contextlib.AbstractContextManager] = None
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._samples: Counter = Counter()
+        self._target_thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._started_at: Optional[float] = None
+        self.total_sec = 0.0
+
+    # --- 수명 주기 ---
+    def start(self):
+        """프로파일링을 시작합니다. 호출한 스레드가 샘플링 대상이 됩니다."""
+        if not self.enabled:
+            return
+        self._started_at = time.perf_counter()
+        self._target_thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="stage-profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def finish(self):
+        """열려 있는 단계를 닫고 샘플링을 종료합니다."""
+        if not self.enabled:
+            return
+        self._close_marked_stage()
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join(timeout=1)
+            self._sampler = None
+        if self._started_at is not None:
+            self.total_sec = time.perf_counter() - self._started_at
+
+    # --- 단계 계측 ---
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        parent_profile = self._profiles.get(self._stack[-1]) if self._stack else None
+        if name not in self.stage_totals:
+            self.stage_order.append(name)
+        self._stack.append(name)
+
+        profile = None
+        if self.use_cprofile:
+            # 동시에 하나의 프로파일러만 활성화할 수 있으므로 상위 단계의 프로파일러를 잠시 멈춥니다.
+            if parent_profile:
+                parent_profile.disable()
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_totals[name] += time.perf_counter() - started_at
+            self.stage_counts[name] += 1
+            if profile:
+                profile.disable()
+                if parent_profile:
+                    parent_profile.enable()
+            self._stack.pop()
+
+    def stage(self, name: str):
+        """with 문으로 감싼 구간의 시간을 name 단계에 누적합니다."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._stage(name)
+
+    def mark(self, name: str):
+        """현재 순차 단계를 닫고 name 단계를 시작합니다."""
+        if not self.enabled:
+            return
+        self._close_marked_stage()
+        self._marked_stage = self._stage(name)
+        self._marked_stage.__enter__()
+
+    def _close_marked_stage(self):
+        if self._marked_stage is not None:
+            self._marked_stage.__exit__(None, None, None)
+            self._marked_stage = None
+
+    # --- 스택 샘플링 ---
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.sample_interval_sec):
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                stack.append(f"{module}:{code.co_name}")
+                frame = frame.f_back
+            stack.reverse()
+            # 단계 이름을 스택 최상단에 붙여 flame graph에서 단계별로 묶이도록 합니다.
+            self._samples[";".join(list(self._stack) + stack)] += 1
+
+    # --- 결과 ---
+    def report(self) -> str:
+        """단계별 시간 분석 표를 문자열로 반환합니다."""
+        total = self.total_sec or sum(self.stage_totals.values()) or 1e-9
+        lines = ["--- 단계별 시간 분석 (--profile) ---",
+                 f"  {'stage':<24}{'calls':>8}{'total(s)':>12}{'avg(ms)':>12}{'share':>9}"]
+        for name in sorted(self.stage_order, key=lambda n: -self.stage_totals[n]):
+            spent = self.stage_totals[name]
+            calls = self.stage_counts[name]
+            lines.append(f"  {name:<24}{calls:>8}{spent:>12.3f}{spent / calls * 1000:>12.1f}{spent / total:>9.1%}")
+        lines.append(f"  {'(전체 실행 시간)':<24}{'':>8}{total:>12.3f}")
+        return "\n".join(lines)
+
+    def write(self, output_dir: str) -> str:
+        """
+        결과 파일을 output_dir에 저장하고 경로를 반환합니다.
+        - stages.json: 단계별 누적 시간/호출 수
+        - collapsed_stacks.txt: 'frame;frame;frame count' 형식의 collapsed-stack
+        - <stage>.prof: 단계별 cProfile 통계 (use_cprofile일 때)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, 'stages.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'total_sec': self.total_sec,
+                'stages': {name: {'total_sec': self.stage_totals[name], 'calls': self.stage_counts[name]}
+                           for name in self.stage_order},
+            }, f, indent=2, ensure_ascii=False)
+        with open(os.path.join(output_dir, 'collapsed_stacks.txt'), 'w', encoding='utf-8') as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(output_dir, f"{name}.prof"))
+        return output_dir
@@ -0,0 +1,147 @@
+# src/proxy_pool.py
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _ProxyState:
+    """프록시 하나의 상태(지연시간 EWMA, 실패 점수, 사용 중인 워커 수, 제외 만료 시각)입니다."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self.latency_ewma: Optional[float] = None
+        self.failure_score = 0.0
+        self.in_use = 0
+        self.ejected_until = 0.0
+
+
+# 프록시 자체의 문제로 볼 HTTP 상태 코드 (407: 프록시 인증 필요, 429: 프록시 IP가 제한됨). 5xx도 포함합니다.
+PROXY_FAULT_STATUSES = {407, 429}
+
+
+class ProxyPool:
+    """
+    crawler_settings.proxy_list의 프록시들을 HTTP 요청과 Selenium 드라이버에 배정하는 풀입니다.
+
+    - 프록시별 응답 지연시간(EWMA)과 실패 점수를 추적합니다.
+    - 실패 점수가 임계값을 넘은 프록시는 일정 시간 동안 풀에서 제외(eject)됩니다.
+    - 동시에 실행되는 워커들이 한 프록시에 몰리지 않도록 사용 중인 워커 수가 적은 프록시를 우선 배정합니다.
+    """
+
+    def __init__(self, proxy_list: List[str], max_failure_score: float = 3.0, eject_sec: float = 300,
+                 latency_alpha: float = 0.3, failure_decay: float = 0.5):
+        self._proxies: Dict[str, _ProxyState] = {p: _ProxyState(p) for p in proxy_list if p}
+        self.max_failure_score = max_failure_score
+        self.eject_sec = eject_sec
+        self.latency_alpha = latency_alpha
+        self.failure_decay = failure_decay
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_loader) -> Optional["ProxyPool"]:
+        """proxy_enabled가 true이고 proxy_list가 비어 있지 않을 때만 ProxyPool을 생성합니다."""
+        if not config_loader.get('crawler_settings.proxy_enabled', expected_type=bool):
+            return None
+        proxy_list = config_loader.get('crawler_settings.proxy_list', expected_type=list)
+        if not proxy_list:
+            logger.warning("proxy_enabled가 true이지만 proxy_list가 비어 있습니다. 프록시 없이 진행합니다.")
+            return None
+        pool_cfg = config_loader.get('crawler_settings.proxy_pool', expected_type=dict, default={})
+        return cls(
+            proxy_list,
+            max_failure_score=pool_cfg.get('max_failure_score', 3.0),
+            eject_sec=pool_cfg.get('eject_sec', 300),
+        )
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def acquire(self) -> Optional[str]:
+        """
+        현재 사용 가능한 프록시 중 가장 여유 있는 것을 배정합니다.
+        우선순위: 사용 중인 워커 수 → 실패 점수 → 지연시간.
+        모든 프록시가 제외된 상태라면 가장 먼저 복귀할 프록시를 배정합니다.
+        """
+        with self._lock:
+            if not self._proxies:
+                return None
+            now = time.monotonic()
+            healthy = [s for s in self._proxies.values() if s.ejected_until <= now]
+            if healthy:
+                chosen = min(healthy, key=lambda s: (
+                    s.in_use, s.failure_score, s.latency_ewma if s.latency_ewma is not None else 0.0))
+            else:
+                chosen = min(self._proxies.values(), key=lambda s: s.ejected_until)
+            chosen.in_use += 1
+            return chosen.address
+
+    def release(self, proxy: Optional[str], success: Optional[bool], latency_sec: Optional[float] = None):
+        """acquire로 배정받은 프록시를 반납하면서 요청 결과를 기록합니다. success가 None이면 반납만 합니다."""
+        if success is not None:
+            self.record(proxy, success, latency_sec)
+        with self._lock:
+            state = self._proxies.get(proxy)
+            if state is not None and state.in_use > 0:
+                state.in_use -= 1
+
+    def record(self, proxy: Optional[str], success: bool, latency_sec: Optional[float] = None):
+        """
+        프록시를 반납하지 않고 요청 결과만 기록합니다.
+        Selenium 드라이버처럼 프록시를 장시간 점유하는 경우에 사용합니다.
+        """
+        with self._lock:
+            state = self._proxies.get(proxy)
+            if state is None:
+                return
+            if success:
+                state.failure_score *= self.failure_decay
+                if latency_sec is not None:
+                    if state.latency_ewma is None:
+                        state.latency_ewma = latency_sec
+                    else:
+                        state.latency_ewma = (self.latency_alpha * latency_sec
+                                              + (1 - self.latency_alpha) * state.latency_ewma)
+            else:
+                state.failure_score += 1.0
+                if state.failure_score >= self.max_failure_score:
+                    state.ejected_until = time.monotonic() + self.eject_sec
+                    state.failure_score = 0.0
+                    logger.warning("  [프록시] %s 실패 누적으로 %s초 동안 제외합니다.", proxy, self.eject_sec)
+
+    def is_ejected(self, proxy: Optional[str]) -> bool:
+        """프록시가 현재 풀에서 제외된 상태인지 확인합니다."""
+        with self._lock:
+            state = self._proxies.get(proxy)
+            return state is not None and state.ejected_until > time.monotonic()
+
+    @staticmethod
+    def is_proxy_fault(status_code: Optional[int]) -> bool:
+        """
+        실패한 요청을 프록시 탓으로 볼지 판단합니다. 연결 오류(상태 코드 없음), 407, 429, 5xx만 해당하며,
+        404 같은 그 밖의 4xx는 프록시는 정상이고 서버가 응답한 것이므로 프록시 실패로 세지 않습니다.
+        """
+        return status_code is None or status_code in PROXY_FAULT_STATUSES or status_code >= 500
+
+    @staticmethod
+    def requests_proxies(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+        """requests 라이브러리의 proxies 인자 형식으로 변환합니다."""
+        if not proxy:
+            return None
+        address = proxy if '://' in proxy else f"http://{proxy}"
+        return {'http': address, 'https': address}
+
+    def snapshot(self) -> List[Dict]:
+        """프록시별 현재 상태를 반환합니다. (로그/리포트용)"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'proxy': s.address,
+                'latency_ewma': s.latency_ewma,
+                'failure_score': s.failure_score,
+                'in_use': s.in_use,
+                'ejected': s.ejected_until > now,
+            } for s in self._proxies.values()]
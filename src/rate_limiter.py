@@ -0,0 +1,163 @@
+# src/rate_limiter.py
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+from urllib.parse import urlparse
+
+
+class _HostBucket:
+    """
+    호스트 하나에 대한 토큰 버킷 상태입니다.
+    rate(초당 요청 수)는 AIMD 방식으로 조정되고, blocked_until까지는 토큰이 지급되지 않습니다.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_failures = 0
+
+
+class RateLimiter:
+    """
+    모든 요청 경로(WebScraper, AudioDownloader)가 공유하는 호스트별 적응형 속도 제한기입니다.
+
+    - 호스트별 토큰 버킷으로 요청 간격을 제어합니다.
+    - 응답 지연시간과 상태 코드(429/5xx)를 관찰하여 AIMD(가산 증가/승산 감소)로 속도를 조정합니다.
+    - 재시도 대기는 지터가 포함된 지수 백오프를 사용하고, 'Retry-After' 헤더가 있으면 이를 우선합니다.
+    """
+
+    THROTTLE_STATUS_CODES = {429, 503}
+
+    def __init__(self, initial_rate: float, min_rate: float = 0.05, max_rate: float = 2.0, burst: float = 1.0,
+                 additive_increase: float = 0.05, multiplicative_decrease: float = 0.5,
+                 latency_target_sec: float = 3.0, backoff_base_sec: Union[int, float] = 5,
+                 backoff_max_sec: Union[int, float] = 120):
+        self.initial_rate = max(min_rate, min(initial_rate, max_rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.latency_target_sec = latency_target_sec
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_loader) -> "RateLimiter":
+        """ConfigLoader의 crawler_settings 값으로 RateLimiter를 생성합니다."""
+        request_delay = config_loader.get('crawler_settings.request_delay_sec', expected_type=(int, float))
+        retry_delay = config_loader.get('crawler_settings.retry_delay_sec', expected_type=(int, float))
+        rate_cfg = config_loader.get('crawler_settings.rate_limit', expected_type=dict, default={})
+
+        # 기존 request_delay_sec(고정 간격)를 초기 속도로 환산합니다.
+        initial_rate = 1.0 / request_delay if request_delay > 0 else rate_cfg.get('max_rate', 2.0)
+        return cls(
+            initial_rate=initial_rate,
+            min_rate=rate_cfg.get('min_rate', 0.05),
+            max_rate=rate_cfg.get('max_rate', 2.0),
+            burst=rate_cfg.get('burst', 1.0),
+            additive_increase=rate_cfg.get('additive_increase', 0.05),
+            multiplicative_decrease=rate_cfg.get('multiplicative_decrease', 0.5),
+            latency_target_sec=rate_cfg.get('latency_target_sec', 3.0),
+            backoff_base_sec=retry_delay,
+            backoff_max_sec=rate_cfg.get('backoff_max_sec', 120),
+        )
+
+    @staticmethod
+    def _host_of(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _HostBucket(self.initial_rate, self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url: str):
+        """
+        해당 URL의 호스트에 요청을 보낼 수 있을 때까지 대기합니다.
+        기존의 고정 time.sleep(request_delay)을 대체합니다.
+        """
+        host = self._host_of(url)
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = time.monotonic()
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                else:
+                    bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.last_refill) * bucket.rate)
+                    bucket.last_refill = now
+                    if bucket.tokens >= 1.0:
+                        bucket.tokens -= 1.0
+                        return
+                    wait = (1.0 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def record_success(self, url: str, latency_sec: Optional[float] = None):
+        """
+        성공한 요청을 기록합니다. 지연시간이 목표 이하이면 속도를 가산 증가시키고,
+        목표를 크게 넘으면 서버 부하 신호로 보고 승산 감소시킵니다.
+        """
+        with self._lock:
+            bucket = self._bucket(self._host_of(url))
+            bucket.consecutive_failures = 0
+            if latency_sec is not None and latency_sec > self.latency_target_sec * 2:
+                bucket.rate = max(self.min_rate, bucket.rate * self.multiplicative_decrease)
+            elif latency_sec is None or latency_sec <= self.latency_target_sec:
+                bucket.rate = min(self.max_rate, bucket.rate + self.additive_increase)
+
+    def record_failure(self, url: str, status_code: Optional[int] = None,
+                       retry_after: Optional[str] = None) -> float:
+        """
+        실패한 요청을 기록하고 다음 재시도까지 대기해야 할 시간(초)을 반환합니다.
+        429/503 또는 5xx 응답, 네트워크 오류 시 속도를 승산 감소시킵니다.
+        'Retry-After'가 주어지면 해당 시간 동안 호스트 전체를 차단합니다.
+        """
+        with self._lock:
+            bucket = self._bucket(self._host_of(url))
+            bucket.consecutive_failures += 1
+            if status_code is None or status_code in self.THROTTLE_STATUS_CODES or status_code >= 500:
+                bucket.rate = max(self.min_rate, bucket.rate * self.multiplicative_decrease)
+
+            delay = self.backoff_delay(bucket.consecutive_failures - 1)
+            retry_after_sec = self.parse_retry_after(retry_after)
+            if retry_after_sec is not None:
+                delay = max(delay, min(retry_after_sec, self.backoff_max_sec))
+            if status_code in self.THROTTLE_STATUS_CODES or retry_after_sec is not None:
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+            return delay
+
+    def backoff_delay(self, attempt: int) -> float:
+        """지터가 포함된 지수 백오프 대기 시간(full jitter)을 계산합니다."""
+        ceiling = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** max(0, attempt)))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """'Retry-After' 헤더 값(초 또는 HTTP-date)을 초 단위로 변환합니다."""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def current_rate(self, url: str) -> float:
+        """해당 호스트의 현재 초당 요청 수를 반환합니다."""
+        with self._lock:
+            return self._bucket(self._host_of(url)).rate
@@ -0,0 +1,78 @@
+# src/retry_policy.py
+
+import time
+from typing import Dict, Iterable, Optional
+
+# 실패 분류
+FAILURE_TRANSIENT = 'transient'  # 네트워크 오류, 타임아웃, 5xx 등: 시간이 지나면 성공할 수 있음
+FAILURE_PERMANENT = 'permanent'  # 404/410, 삭제된 차량 페이지: 다시 요청해도 결과가 같음
+FAILURE_PARSE_MISS = 'parse_miss'  # 페이지는 받았지만 필요한 정보(차량 정보, 오디오 섹션)가 없음
+FAILURE_CLASSES = (FAILURE_TRANSIENT, FAILURE_PERMANENT, FAILURE_PARSE_MISS)
+
+PERMANENT_HTTP_STATUSES = frozenset({404, 410})
+
+
+def classify_status(status_code: Optional[int]) -> str:
+    """최종 실패한 요청의 HTTP 상태 코드로 실패를 분류합니다. (상태 코드가 없으면 네트워크 오류로 보고 transient)"""
+    return FAILURE_PERMANENT if status_code in PERMANENT_HTTP_STATUSES else FAILURE_TRANSIENT
+
+
+def classify_exception(exc: BaseException) -> str:
+    """
+    처리 중 발생한 예외를 분류합니다.
+    네트워크/브라우저 계열(OSError, requests, urllib3, selenium 예외)은 transient, 그 밖의 예외는 파싱 단계의 문제로 봅니다.
+    selenium을 임포트하지 않도록 예외 클래스의 모듈 이름으로 판별합니다.
+    """
+    if isinstance(exc, (OSError, TimeoutError)):  # requests.RequestException도 OSError의 하위 클래스
+        return FAILURE_TRANSIENT
+    if type(exc).__module__.split('.')[0] in ('selenium', 'urllib3', 'requests'):
+        return FAILURE_TRANSIENT
+    return FAILURE_PARSE_MISS
+
+
+class RetryPolicy:
+    """
+    goodsNo별 재시도 예산과 다음 시도 가능 시각을 정합니다.
+
+    실패할 때마다 attempts가 1씩 늘고, 다음 시도는 base_delay_sec * 2^(attempts-1) (최대 max_delay_sec) 뒤로 미뤄집니다.
+    마지막 실패 분류의 예산(budgets)을 다 쓰면 해당 goodsNo는 dead-letter 테이블로 옮겨져 더 이상 요청하지 않습니다.
+    시각은 실행 간에 유지되어야 하므로 time.time()(epoch 초)을 사용합니다.
+    """
+
+    DEFAULT_BUDGETS = {FAILURE_TRANSIENT: 6, FAILURE_PERMANENT: 2, FAILURE_PARSE_MISS: 3}
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, base_delay_sec: float = 3600,
+                 max_delay_sec: float = 7 * 24 * 3600, removed_page_markers: Iterable[str] = ()):
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        if budgets:
+            unknown = set(budgets) - set(FAILURE_CLASSES)
+            if unknown:
+                raise ValueError(f"알 수 없는 실패 분류: {sorted(unknown)} (허용: {list(FAILURE_CLASSES)})")
+            self.budgets.update(budgets)
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+        self.removed_page_markers = tuple(marker for marker in removed_page_markers if marker)
+
+    @classmethod
+    def from_config(cls, config_loader) -> "RetryPolicy":
+        settings = config_loader.get('retry_policy', expected_type=dict, default={})
+        return cls(
+            budgets=settings.get('budgets'),
+            base_delay_sec=settings.get('base_delay_sec', 3600),
+            max_delay_sec=settings.get('max_delay_sec', 7 * 24 * 3600),
+            removed_page_markers=settings.get('removed_page_markers', ()),
+        )
+
+    def delay_for(self, attempts: int) -> float:
+        """attempts번 실패한 뒤 다음 시도까지 기다릴 시간(초)."""
+        return min(self.max_delay_sec, self.base_delay_sec * (2 ** max(0, attempts - 1)))
+
+    def next_eligible_at(self, attempts: int, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) + self.delay_for(attempts)
+
+    def is_exhausted(self, failure_class: str, attempts: int) -> bool:
+        return attempts >= self.budgets.get(failure_class, self.budgets[FAILURE_TRANSIENT])
+
+    def is_removed_page(self, html_content: str) -> bool:
+        """상세 페이지가 삭제/판매 완료 안내 페이지인지 설정된 문구(removed_page_markers)로 판별합니다."""
+        return any(marker in html_content for marker in self.removed_page_markers)
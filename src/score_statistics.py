@@ -0,0 +1,349 @@
+# src/score_statistics.py
+
+import csv
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.columnar_store import convert_value
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS = ('overall_score', 'mid_freq_score', 'low_high_freq', 'audible_range_score', 'regularity',
+                 'irregularity')
+ALL_GROUP = 'all'
+STATS_VERSION = 1
+
+
+class QuantileSketch:
+    """
+    상대 오차 relative_accuracy 이내로 분위수를 추정하는 로그 버킷 스케치입니다. (DDSketch 방식)
+    값 v는 ceil(log_γ |v|) 버킷에 세며(γ = (1+α)/(1-α)), 추가뿐 아니라 제거(remove)도 정확히 반영됩니다.
+    점수 0~5, α=0.01이면 버킷은 수백 개 이하입니다.
+    """
+
+    MIN_INDEXABLE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+
+    def _bucket(self, value: float) -> Tuple[Optional[Dict[int, int]], int]:
+        if abs(value) < self.MIN_INDEXABLE:
+            return None, 0
+        store = self.positive if value > 0 else self.negative
+        return store, math.ceil(math.log(abs(value)) / self._log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        store, key = self._bucket(value)
+        if store is None:
+            self.zero_count += count
+            return
+        remaining = store.get(key, 0) + count
+        if remaining > 0:
+            store[key] = remaining
+        else:
+            store.pop(key, None)
+
+    def remove(self, value: float):
+        self.add(value, -1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zero_count
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (1 + self._gamma)  # 버킷 (γ^(k-1), γ^k]의 대푯값
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):  # 음수는 절댓값이 큰 것부터 (작은 값부터)
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'positive': self.positive, 'negative': self.negative, 'zero': self.zero_count}
+
+    def load_dict(self, payload: Dict[str, Any]):
+        self.positive = {int(k): v for k, v in payload.get('positive', {}).items()}
+        self.negative = {int(k): v for k, v in payload.get('negative', {}).items()}
+        self.zero_count = payload.get('zero', 0)
+
+
+class RunningStats:
+    """
+    점수 컬럼 하나의 누적 통계입니다. 값 하나를 추가/제거할 때 O(1) (스케치는 O(1) 버킷 갱신)로 갱신됩니다.
+      count/mean/M2 : Welford 방식 평균·분산 (제거도 가능)
+      min/max       : 관측된 최솟값/최댓값 (값이 제거되어도 줄어들지 않음)
+      histogram     : [lo, hi]를 bins개로 나눈 고정 구간 빈도 + 범위 밖(underflow/overflow) 개수
+      sketch        : 분위수 추정용 QuantileSketch
+    """
+
+    def __init__(self, bins: int = 20, value_range: Sequence[float] = (0.0, 5.0),
+                 relative_accuracy: float = 0.01):
+        self.bins = bins
+        self.lo, self.hi = float(value_range[0]), float(value_range[1])
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.histogram = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def _bin_delta(self, value: float, delta: int):
+        if value < self.lo:
+            self.underflow += delta
+        elif value > self.hi:
+            self.overflow += delta
+        else:
+            position = min(self.bins - 1, int((value - self.lo) / (self.hi - self.lo) * self.bins))
+            self.histogram[position] += delta
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self._bin_delta(value, 1)
+        self.sketch.add(value)
+
+    def remove(self, value: float):
+        """이전에 add한 값을 뺍니다. (같은 goodsNo가 다시 저장되어 점수가 바뀐 경우)"""
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        else:
+            delta = value - self.mean
+            self.mean = (self.count * self.mean - value) / (self.count - 1)
+            self.count -= 1
+            self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+        self._bin_delta(value, -1)
+        self.sketch.remove(value)
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def bin_edges(self) -> List[float]:
+        width = (self.hi - self.lo) / self.bins
+        return [self.lo + i * width for i in range(self.bins + 1)]
+
+    def summary(self, quantiles: Iterable[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> Dict[str, Any]:
+        variance = self.variance
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else None,
+            'variance': variance,
+            'std': math.sqrt(variance) if variance is not None else None,
+            'min': self.min, 'max': self.max,
+            'histogram': {'edges': self.bin_edges(), 'counts': list(self.histogram),
+                          'underflow': self.underflow, 'overflow': self.overflow},
+            'quantiles': {f"p{round(q * 100):g}": self.sketch.quantile(q) for q in quantiles},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max,
+                'histogram': self.histogram, 'underflow': self.underflow, 'overflow': self.overflow,
+                'sketch': self.sketch.to_dict()}
+
+    def load_dict(self, payload: Dict[str, Any]):
+        self.count, self.mean, self.m2 = payload['count'], payload['mean'], payload['m2']
+        self.min, self.max = payload['min'], payload['max']
+        self.histogram = list(payload['histogram'])
+        self.underflow, self.overflow = payload['underflow'], payload['overflow']
+        self.sketch.load_dict(payload['sketch'])
+
+
+class ScoreStatistics:
+    """
+    car_audio_metadata의 엔진음 점수 컬럼(SCORE_COLUMNS)에 대한 누적 통계를 그룹별로 유지합니다.
+
+    그룹은 'all'(전체)과 group_by의 각 항목입니다. 항목은 컬럼 이름('fuel_type')이거나 '+'로 묶은 조합
+    ('fuel_type+year')이며, 그룹 키는 'fuel_type=디젤', 'fuel_type=디젤,year=2021' 형태입니다.
+
+    DataManager가 행을 저장할 때마다 record()로 갱신되고, persist_every건마다 data/score_stats.json에 저장됩니다.
+    저장 파일에는 그 시점의 CSV 크기/수정 시각을 함께 기록하며, 열 때 CSV와 맞지 않으면(저장 전에 중단된 경우 등)
+    CSV를 한 번 전체 스캔하여 다시 만듭니다. 노트북/대시보드는 load_summary()로 O(bins) 크기의 분포를 읽습니다.
+    """
+
+    def __init__(self, path: str, metadata_csv_path: str, group_by: Sequence[str] = ('fuel_type', 'year'),
+                 bins: int = 20, value_range: Sequence[float] = (0.0, 5.0), relative_accuracy: float = 0.01,
+                 persist_every: int = 20):
+        self.path = path
+        self.metadata_csv_path = metadata_csv_path
+        self.group_by = [tuple(spec.split('+')) for spec in group_by]
+        self.bins = bins
+        self.value_range = list(value_range)
+        self.relative_accuracy = relative_accuracy
+        self.persist_every = persist_every
+        self.groups: Dict[str, Dict[str, RunningStats]] = {}
+        self._pending = 0
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "ScoreStatistics":
+        settings = config_loader.get('score_stats', expected_type=dict, default={})
+        return cls(
+            os.path.join(data_manager.get_base_data_path(), 'score_stats.json'),
+            data_manager.metadata_csv_path,
+            group_by=settings.get('group_by', ['fuel_type', 'year']),
+            bins=settings.get('bins', 20),
+            value_range=settings.get('range', [0.0, 5.0]),
+            relative_accuracy=settings.get('relative_accuracy', 0.01),
+            persist_every=settings.get('persist_every', 20),
+        )
+
+    # --- 갱신 ---
+
+    def _group_keys(self, row: Dict[str, Any]) -> List[str]:
+        keys = [ALL_GROUP]
+        for columns in self.group_by:
+            values = [convert_value(column, row.get(column)) for column in columns]
+            if all(value not in (None, '') for value in values):
+                keys.append(','.join(f"{column}={value}" for column, value in zip(columns, values)))
+        return keys
+
+    def _stats(self, group: str, column: str) -> RunningStats:
+        columns = self.groups.setdefault(group, {})
+        if column not in columns:
+            columns[column] = RunningStats(self.bins, self.value_range, self.relative_accuracy)
+        return columns[column]
+
+    def _apply(self, row: Dict[str, Any], remove: bool = False):
+        keys = self._group_keys(row)
+        for column in SCORE_COLUMNS:
+            value = convert_value(column, row.get(column))
+            if value is None or math.isnan(value):
+                continue
+            for group in keys:
+                if remove:
+                    self._stats(group, column).remove(value)
+                else:
+                    self._stats(group, column).add(value)
+
+    def record(self, new_row: Dict[str, Any], old_row: Optional[Dict[str, Any]] = None):
+        """저장된 행을 반영합니다. 같은 goodsNo의 이전 행(old_row)이 있으면 그 값을 먼저 뺍니다."""
+        if old_row is not None:
+            self._apply(old_row, remove=True)
+        self._apply(new_row)
+        self._pending += 1
+        if self._pending >= self.persist_every:
+            self.persist()
+
+    # --- 저장/로드 ---
+
+    def _csv_stamp(self) -> List[int]:
+        try:
+            stat = os.stat(self.metadata_csv_path)
+        except FileNotFoundError:
+            return [0, 0]
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _settings(self) -> Dict[str, Any]:
+        return {'group_by': ['+'.join(columns) for columns in self.group_by], 'bins': self.bins,
+                'range': self.value_range, 'relative_accuracy': self.relative_accuracy}
+
+    def persist(self):
+        payload = {'version': STATS_VERSION, 'settings': self._settings(), 'csv_stamp': self._csv_stamp(),
+                   'groups': {group: {column: stats.to_dict() for column, stats in columns.items()}
+                              for group, columns in self.groups.items()}}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+    def open(self) -> "ScoreStatistics":
+        """저장된 통계를 읽습니다. 없거나 설정/CSV와 맞지 않으면 CSV를 스캔하여 다시 만듭니다."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (FileNotFoundError, ValueError):
+            payload = None
+        if (payload and payload.get('version') == STATS_VERSION and payload.get('settings') == self._settings()
+                and payload.get('csv_stamp') == self._csv_stamp()):
+            self.groups = {}
+            for group, columns in payload['groups'].items():
+                for column, state in columns.items():
+                    self._stats(group, column).load_dict(state)
+            return self
+        self.rebuild()
+        return self
+
+    def rebuild(self) -> int:
+        """car_audio_metadata.csv 전체를 한 번 읽어 통계를 새로 만들고 저장합니다. 반영한 행 수를 반환합니다."""
+        self.groups = {}
+        rows: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.metadata_csv_path):
+            with open(self.metadata_csv_path, 'r', encoding='utf-8', newline='') as f:
+                rows = {row['goodsNo']: row for row in csv.DictReader(f) if row.get('goodsNo')}
+        for row in rows.values():
+            self._apply(row)
+        self.persist()
+        logger.info(f"  [통계] 메타데이터 {len(rows)}행으로 점수 통계를 다시 만들었습니다.")
+        self._check_range()
+        return len(rows)
+
+    def _check_range(self, max_outside_ratio: float = 0.05):
+        """히스토그램 범위(range) 밖 값이 많거나 값이 일부 구간에만 몰려 있으면 설정이 맞지 않는다고 경고합니다."""
+        for column, stats in self.groups.get(ALL_GROUP, {}).items():
+            if not stats.count:
+                continue
+            outside = (stats.underflow + stats.overflow) / stats.count
+            used_bins = sum(1 for n in stats.histogram if n)
+            if outside > max_outside_ratio or (stats.count >= self.bins and used_bins <= max(1, self.bins // 10)):
+                logger.warning(f"  [통계] {column} 값(관측 {stats.min}~{stats.max})이 히스토그램 범위 "
+                               f"{self.value_range}와 맞지 않습니다. (범위 밖 {outside:.0%}, 사용된 구간 "
+                               f"{used_bins}/{self.bins}) score_stats.range 설정을 확인하세요.")
+
+    # --- 조회 ---
+
+    def summary(self, group: str = ALL_GROUP) -> Dict[str, Dict[str, Any]]:
+        """그룹의 컬럼별 요약 (count, mean, std, min/max, 히스토그램, 분위수)."""
+        return {column: stats.summary() for column, stats in self.groups.get(group, {}).items()}
+
+    def quantile(self, column: str, q: float, group: str = ALL_GROUP) -> Optional[float]:
+        stats = self.groups.get(group, {}).get(column)
+        return stats.sketch.quantile(q) if stats else None
+
+
+def load_summary(path: str, group: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    score_stats.json을 읽어 {그룹: {컬럼: 요약}}을 반환합니다. (노트북/대시보드용, CSV를 읽지 않음)
+    group을 주면 해당 그룹만 반환합니다.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    settings = payload['settings']
+    result = {}
+    for group_key, columns in payload['groups'].items():
+        if group is not None and group_key != group:
+            continue
+        result[group_key] = {}
+        for column, state in columns.items():
+            stats = RunningStats(settings['bins'], settings['range'], settings['relative_accuracy'])
+            stats.load_dict(state)
+            result[group_key][column] = stats.summary()
+    return result
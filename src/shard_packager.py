@@ -0,0 +1,273 @@
+# src/shard_packager.py
+
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import random
+import tarfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.columnar_store import convert_row
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'index.json'
+INDEX_VERSION = 1
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE  # 512
+
+
+def _padded(size: int) -> int:
+    return (size + TAR_BLOCK_SIZE - 1) // TAR_BLOCK_SIZE * TAR_BLOCK_SIZE
+
+
+class ShardPackager:
+    """
+    vehicle_assets/{goodsNo}/ 의 오디오와 car_audio_metadata.csv의 메타데이터 행을 묶어
+    data/shards/shard-NNNNNN.tar 파일로 패키징합니다. (WebDataset 방식: 샘플마다 {goodsNo}.json + {goodsNo}.mp3)
+
+    - 샤드는 shard_max_bytes를 넘으면 닫히고, 완성된 샤드만 index.json에 기록됩니다.
+      (중간에 중단되면 .tar.tmp만 남고 다음 실행에서 다시 만들어집니다)
+    - 이미 패키징된 goodsNo는 건너뛰고, 새 차량만 새 샤드에 추가합니다. 기존 샤드는 다시 쓰지 않습니다.
+    - 인덱스에는 샘플별 (샤드 번호, 메타데이터 오프셋/크기, 오디오 오프셋/크기)가 있어 개별 샘플도 바로 읽을 수 있습니다.
+    """
+
+    def __init__(self, data_manager, output_dir: str, shard_max_bytes: int = 256 * 1024 * 1024):
+        self.data_manager = data_manager
+        self.output_dir = output_dir
+        self.shard_max_bytes = shard_max_bytes
+        self.index_path = os.path.join(output_dir, INDEX_FILENAME)
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "ShardPackager":
+        settings = config_loader.get('shards', expected_type=dict, default={})
+        return cls(
+            data_manager,
+            os.path.join(data_manager.get_base_data_path(), 'shards'),
+            shard_max_bytes=int(settings.get('shard_max_mb', 256) * 1024 * 1024),
+        )
+
+    # --- 인덱스 ---
+
+    def load_index(self) -> Dict[str, Any]:
+        return load_shard_index(self.output_dir)
+
+    def _save_index(self, index: Dict[str, Any]):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    # --- 입력 수집 ---
+
+    def _pending_samples(self, packed: set) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """(goodsNo, 오디오 전체 경로, 메타데이터 행) 중 아직 패키징되지 않았고 오디오 파일이 있는 것."""
+        if not os.path.exists(self.data_manager.metadata_csv_path):
+            return []
+        with open(self.data_manager.metadata_csv_path, 'r', encoding='utf-8', newline='') as f:
+            rows = {row['goodsNo']: row for row in csv.DictReader(f)}  # 같은 goodsNo가 여러 번이면 마지막 행
+        pending = []
+        for goods_no in sorted(rows.keys() - packed):
+            row = rows[goods_no]
+            relative_path = row.get('audio_file_path') or ''
+            full_path = os.path.join(self.data_manager.get_base_data_path(), relative_path)
+            if relative_path and os.path.isfile(full_path):
+                pending.append((goods_no, full_path, row))
+        return pending
+
+    # --- 쓰기 ---
+
+    @staticmethod
+    def _add_member(tar: tarfile.TarFile, name: str, data: bytes, mtime: float) -> int:
+        """tar에 멤버 하나를 추가하고 데이터 시작 오프셋을 반환합니다."""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(mtime)
+        tar.addfile(info, io.BytesIO(data))
+        return tar.offset - _padded(len(data))  # addfile 후 tar.offset = 데이터 끝(블록 단위 패딩 포함)
+
+    def pack(self) -> Dict[str, int]:
+        """새 차량만 새 샤드로 패키징하고 통계를 반환합니다."""
+        started_at = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+        index = self.load_index()
+        pending = self._pending_samples(set(index['samples']))
+        stats = {'pending': len(pending), 'packed': 0, 'shards_written': 0, 'bytes_written': 0}
+        print(f"  [샤드] 기존 샤드 {len(index['shards'])}개, 새로 패키징할 차량 {len(pending)}개")
+
+        tar: Optional[tarfile.TarFile] = None
+        shard: Optional[Dict[str, Any]] = None
+        shard_samples: Dict[str, List[Any]] = {}
+
+        def close_shard():
+            nonlocal tar, shard
+            tar.close()
+            if shard['count'] == 0:  # 읽을 수 있는 오디오가 하나도 없었던 샤드
+                os.remove(os.path.join(self.output_dir, shard['name'] + '.tmp'))
+                tar, shard = None, None
+                return
+            final_path = os.path.join(self.output_dir, shard['name'])
+            os.replace(final_path + '.tmp', final_path)
+            shard['bytes'] = os.path.getsize(final_path)
+            index['shards'].append(shard)
+            index['samples'].update(shard_samples)
+            self._save_index(index)  # 샤드가 완성될 때마다 인덱스에 반영
+            stats['shards_written'] += 1
+            stats['bytes_written'] += shard['bytes']
+            metrics.inc('shards_written')
+            logger.info(f"  [샤드] {shard['name']} 완료: {shard['count']}개 샘플, {shard['bytes'] / 1e6:.1f}MB")
+            tar, shard = None, None
+            shard_samples.clear()
+
+        for goods_no, audio_path, row in pending:
+            if tar is None:
+                shard_number = len(index['shards'])
+                shard = {'name': f"shard-{shard_number:06d}.tar", 'count': 0}
+                tar = tarfile.open(os.path.join(self.output_dir, shard['name'] + '.tmp'), 'w',
+                                   format=tarfile.USTAR_FORMAT)
+            try:
+                with open(audio_path, 'rb') as f:
+                    audio = f.read()
+            except OSError as e:
+                logger.warning(f"  [샤드] goodsNo {goods_no} 오디오를 읽을 수 없습니다: {e}")
+                continue
+            metadata = json.dumps(convert_row(row), ensure_ascii=False, default=str).encode('utf-8')
+            audio_ext = os.path.splitext(audio_path)[1].lower() or '.mp3'
+            mtime = os.path.getmtime(audio_path)
+            metadata_offset = self._add_member(tar, f"{goods_no}.json", metadata, mtime)
+            audio_offset = self._add_member(tar, f"{goods_no}{audio_ext}", audio, mtime)
+            shard_samples[goods_no] = [len(index['shards']), metadata_offset, len(metadata),
+                                       audio_offset, len(audio), audio_ext]
+            shard['count'] += 1
+            stats['packed'] += 1
+            if tar.offset >= self.shard_max_bytes:
+                close_shard()
+        if tar is not None:
+            close_shard()
+
+        metrics.observe('shard_pack_seconds', time.monotonic() - started_at)
+        print(f"  [샤드] 패키징 완료: {stats}")
+        return stats
+
+
+def load_shard_index(shard_dir: str) -> Dict[str, Any]:
+    """
+    샤드 인덱스를 읽습니다. 없으면 빈 인덱스를 반환합니다.
+      shards: [{'name', 'count', 'bytes'}...]
+      samples: {goodsNo: [샤드 번호, 메타데이터 오프셋, 메타데이터 크기, 오디오 오프셋, 오디오 크기, 오디오 확장자]}
+    """
+    try:
+        with open(os.path.join(shard_dir, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {'version': INDEX_VERSION, 'shards': [], 'samples': {}}
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"지원하지 않는 샤드 인덱스 버전입니다: {index.get('version')} (필요: {INDEX_VERSION})")
+    return index
+
+
+class ShardDataset:
+    """
+    ShardPackager가 만든 샤드를 학습용으로 읽습니다.
+
+    iter_samples()는 샤드 순서를 섞은 뒤 백그라운드 스레드가 샤드 파일을 통째로 순차 읽기하여
+    최대 prefetch개까지 미리 준비합니다. (작은 파일 여러 개를 찾아 읽는 대신 큰 순차 읽기)
+    shuffle_buffer를 주면 샤드 경계를 넘어 샘플 순서도 섞습니다.
+    각 샘플은 {'goodsNo', 'metadata': dict, 'audio': bytes, 'audio_ext'} 딕셔너리입니다.
+    """
+
+    def __init__(self, shard_dir: str):
+        self.shard_dir = shard_dir
+        self.index = load_shard_index(shard_dir)
+
+    def __len__(self) -> int:
+        return len(self.index['samples'])
+
+    def _read_shard(self, shard_name: str) -> List[Dict[str, Any]]:
+        """샤드 하나를 처음부터 끝까지 순차로 읽어 샘플 목록으로 반환합니다."""
+        samples: Dict[str, Dict[str, Any]] = {}
+        with tarfile.open(os.path.join(self.shard_dir, shard_name), 'r|') as tar:  # 스트리밍 모드: 탐색 없음
+            for member in tar:
+                if not member.isfile():
+                    continue
+                goods_no, ext = os.path.splitext(member.name)
+                data = tar.extractfile(member).read()
+                sample = samples.setdefault(goods_no, {'goodsNo': goods_no})
+                if ext == '.json':
+                    sample['metadata'] = json.loads(data)
+                else:
+                    sample['audio'], sample['audio_ext'] = data, ext
+        return [sample for sample in samples.values() if 'audio' in sample and 'metadata' in sample]
+
+    def iter_samples(self, shuffle: bool = True, seed: Optional[int] = None, prefetch: int = 2,
+                     shuffle_buffer: int = 0) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(seed)
+        shard_names = [shard['name'] for shard in self.index['shards']]
+        if shuffle:
+            rng.shuffle(shard_names)
+
+        loaded: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+        done = object()
+
+        def producer():
+            try:
+                for name in shard_names:
+                    samples = self._read_shard(name)
+                    if shuffle:
+                        rng_local.shuffle(samples)
+                    while not stop.is_set():
+                        try:
+                            loaded.put(samples, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            except Exception as e:  # 읽기 오류는 소비자 쪽에서 다시 발생시킵니다.
+                loaded.put(e)
+                return
+            loaded.put(done)
+
+        rng_local = random.Random(rng.random())  # 생산자 스레드 전용 난수 생성기
+        thread = threading.Thread(target=producer, name='shard-prefetch', daemon=True)
+        thread.start()
+
+        buffer: List[Dict[str, Any]] = []
+        try:
+            while True:
+                item = loaded.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if not shuffle or shuffle_buffer <= 0:
+                    yield from item
+                    continue
+                for sample in item:
+                    if len(buffer) < shuffle_buffer:
+                        buffer.append(sample)
+                        continue
+                    position = rng.randrange(len(buffer))
+                    buffer[position], sample = sample, buffer[position]
+                    yield sample
+            rng.shuffle(buffer)
+            yield from buffer
+        finally:
+            stop.set()
+
+    def read_sample(self, goods_no: str) -> Dict[str, Any]:
+        """인덱스의 오프셋으로 샘플 하나를 바로 읽습니다. (전체 샤드를 읽지 않음)"""
+        shard_number, metadata_offset, metadata_size, audio_offset, audio_size, audio_ext = \
+            self.index['samples'][goods_no]
+        with open(os.path.join(self.shard_dir, self.index['shards'][shard_number]['name']), 'rb') as f:
+            f.seek(metadata_offset)
+            metadata = json.loads(f.read(metadata_size))
+            f.seek(audio_offset)
+            audio = f.read(audio_size)
+        return {'goodsNo': goods_no, 'metadata': metadata, 'audio': audio, 'audio_ext': audio_ext}
@@ -0,0 +1,299 @@
+# src/similarity_index.py
+
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.audio_features import AudioFeatureStore, summary_dim
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행마다 L2 정규화합니다. (길이 0인 행은 그대로 0)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(q, n) 점수 행렬에서 행마다 상위 k개의 (열 번호, 점수)를 점수 내림차순으로 반환합니다. argpartition O(n)"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def spherical_kmeans(matrix: np.ndarray, n_clusters: int, iterations: int = 10, sample_size: int = 20000,
+                     seed: int = 0) -> np.ndarray:
+    """
+    L2 정규화된 행렬을 코사인 유사도 기준으로 n_clusters개로 묶은 중심(정규화됨)을 반환합니다.
+    중심 학습은 최대 sample_size개 표본으로만 수행합니다. (IVF 분할용이므로 근사로 충분)
+    """
+    rng = np.random.RandomState(seed)
+    if len(matrix) > sample_size:
+        matrix = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+    centroids = matrix[rng.choice(len(matrix), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, matrix)
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]  # 비어 있는 군집은 이전 중심 유지
+        centroids = _normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+class EmbeddingIndex:
+    """
+    차량별 오디오 임베딩에 대한 코사인 유사도 최근접 이웃 인덱스입니다.
+
+    임베딩은 AudioFeatureStore의 요약 특징 벡터를 차원별로 표준화(z-score)한 뒤 L2 정규화한 것이며,
+    연속된 float32 행렬 (n, dim) 하나로 보관합니다. 코사인 유사도 = 내적이므로 질의는 행렬 곱 한 번과
+    argpartition으로 처리합니다. (여러 질의를 묶어 보내면 (q, dim) @ (dim, n) 한 번으로 계산)
+
+    partitions > 0이면 IVF 방식으로 행을 군집(파티션)별로 정렬해 두고, 질의와 가까운 nprobe개 파티션만 훑습니다.
+    정확도를 약간 잃는 대신 큰 컬렉션에서 비교 대상 수가 약 nprobe / partitions로 줄어듭니다.
+    """
+
+    def __init__(self, keys: Sequence[str], matrix: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 centroids: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None,
+                 source_stamp: int = 0):
+        self.keys: List[str] = list(keys)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.mean = mean.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+        self.centroids = centroids
+        self.offsets = offsets  # 파티션 p의 행 = matrix[offsets[p]:offsets[p + 1]]
+        self.source_stamp = source_stamp
+        self._positions: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    @property
+    def partitions(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    # --- 생성 ---
+
+    @classmethod
+    def build(cls, keys: Sequence[str], vectors: np.ndarray, partitions: int = 0,
+              source_stamp: int = 0) -> "EmbeddingIndex":
+        """원본 특징 벡터 (n, dim)로 인덱스를 만듭니다. partitions > 0이면 IVF 파티션도 만듭니다."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            dim = vectors.shape[1] if vectors.ndim == 2 else 0
+            return cls([], np.empty((0, dim), dtype=np.float32), np.zeros(dim), np.ones(dim),
+                       source_stamp=source_stamp)
+        mean = vectors.mean(axis=0)
+        scale = vectors.std(axis=0)
+        scale[scale < 1e-6] = 1.0  # 모든 행이 같은 값인 차원(예: 고정 길이 클립의 길이)은 그대로 둠
+        matrix = _normalize_rows((vectors - mean) / scale)
+        keys = list(keys)
+        partitions = min(partitions, len(keys))
+        if partitions <= 1:
+            return cls(keys, matrix, mean, scale, source_stamp=source_stamp)
+
+        centroids = spherical_kmeans(matrix, partitions)
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.zeros(partitions + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=partitions), out=offsets[1:])
+        return cls([keys[i] for i in order], matrix[order], mean, scale, centroids, offsets, source_stamp)
+
+    # --- 질의 ---
+
+    def embed(self, vectors: np.ndarray) -> np.ndarray:
+        """원본 특징 벡터를 이 인덱스의 임베딩 공간(표준화 + L2 정규화)으로 변환합니다."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        return _normalize_rows((vectors - self.mean) / self.scale)
+
+    def vector_of(self, key: str) -> Optional[np.ndarray]:
+        """인덱스에 있는 goodsNo의 임베딩(정규화된 벡터)을 반환합니다."""
+        position = self._positions.get(key)
+        return None if position is None else self.matrix[position]
+
+    def search_embeddings(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+                          exclude: Optional[Sequence[Optional[str]]] = None
+                          ) -> List[List[Tuple[str, float]]]:
+        """
+        정규화된 임베딩 (q, dim)마다 상위 k개의 (goodsNo, 코사인 유사도)를 반환합니다.
+        exclude[i]가 주어지면 i번째 결과에서 해당 goodsNo(보통 질의 차량 자신)를 뺍니다.
+        nprobe=None이면 IVF 인덱스에서도 전체를 정확히 검색합니다.
+        """
+        started_at = time.monotonic()
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        exclude = list(exclude) if exclude is not None else [None] * len(queries)
+        extra = 1 if any(key is not None for key in exclude) else 0
+        if len(self) == 0:
+            return [[] for _ in queries]
+
+        if nprobe is None or self.partitions == 0 or nprobe >= self.partitions:
+            rows, scores = _top_k(queries @ self.matrix.T, k + extra)
+            results = [self._format(rows[i], scores[i], exclude[i], k) for i in range(len(queries))]
+        else:
+            probes, _ = _top_k(queries @ self.centroids.T, nprobe)
+            results = []
+            for i, query in enumerate(queries):
+                positions = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes[i]])
+                rows, scores = _top_k((self.matrix[positions] @ query)[None, :], k + extra)
+                results.append(self._format(positions[rows[0]], scores[0], exclude[i], k))
+        metrics.observe('similarity_query_seconds', time.monotonic() - started_at)
+        return results
+
+    def _format(self, rows: np.ndarray, scores: np.ndarray, exclude: Optional[str],
+                k: int) -> List[Tuple[str, float]]:
+        result = [(self.keys[row], float(score)) for row, score in zip(rows, scores)
+                  if self.keys[row] != exclude]
+        return result[:k]
+
+    def search(self, vectors: np.ndarray, k: int = 10, nprobe: Optional[int] = None
+               ) -> List[List[Tuple[str, float]]]:
+        """원본 특징 벡터 (q, dim)와 비슷한 차량을 찾습니다."""
+        return self.search_embeddings(self.embed(vectors), k, nprobe)
+
+    def similar_to(self, goods_nos: Sequence[str], k: int = 10, nprobe: Optional[int] = None
+                   ) -> Dict[str, List[Tuple[str, float]]]:
+        """인덱스에 있는 goodsNo들과 소리가 비슷한 차량을 (자기 자신 제외) 찾습니다. 없는 goodsNo는 건너뜁니다."""
+        known = [goods_no for goods_no in goods_nos if goods_no in self._positions]
+        if not known:
+            return {}
+        queries = self.matrix[[self._positions[goods_no] for goods_no in known]]
+        return dict(zip(known, self.search_embeddings(queries, k, nprobe, exclude=known)))
+
+    # --- 저장/로드 ---
+
+    def save(self, path: str):
+        tmp_path = path + '.tmp'
+        arrays = {'version': INDEX_VERSION, 'keys': np.array(self.keys, dtype=str), 'matrix': self.matrix,
+                  'mean': self.mean, 'scale': self.scale, 'source_stamp': self.source_stamp}
+        if self.centroids is not None:
+            arrays.update(centroids=self.centroids, offsets=self.offsets)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["EmbeddingIndex"]:
+        """저장된 인덱스를 읽습니다. 파일이 없거나 버전이 다르면 None을 반환합니다."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                return None
+            return cls([str(key) for key in data['keys']], data['matrix'], data['mean'], data['scale'],
+                       data['centroids'] if 'centroids' in data else None,
+                       data['offsets'] if 'offsets' in data else None,
+                       int(data['source_stamp']))
+
+
+class SimilaritySearch:
+    """
+    AudioFeaturePipeline이 만든 특징 저장소(data/audio_features/)로 EmbeddingIndex를 만들고 질의하는 진입점입니다.
+
+    인덱스는 data/audio_features/embedding_index.npz에 저장되며, 특징 저장소의 index.json이 바뀌었으면
+    (새 특징이 추출되었으면) 다음 질의 때 자동으로 다시 만듭니다.
+    행 수가 ivf_min_rows 이상이면 IVF 파티션(기본 √n개)을 만들고 nprobe개 파티션만 검색합니다.
+    """
+
+    def __init__(self, feature_store: AudioFeatureStore, index_path: str, ivf_min_rows: int = 50000,
+                 partitions: Optional[int] = None, nprobe: int = 8):
+        self.feature_store = feature_store
+        self.index_path = index_path
+        self.ivf_min_rows = ivf_min_rows
+        self.partitions = partitions
+        self.nprobe = nprobe
+        self._index: Optional[EmbeddingIndex] = None
+
+    @classmethod
+    def from_config(cls, config_loader, data_manager) -> "SimilaritySearch":
+        from src.audio_features import AudioFeaturePipeline
+
+        settings = config_loader.get('similarity', expected_type=dict, default={})
+        feature_store = AudioFeaturePipeline.from_config(config_loader, data_manager).store
+        return cls(
+            feature_store,
+            os.path.join(feature_store.root_dir, 'embedding_index.npz'),
+            ivf_min_rows=settings.get('ivf_min_rows', 50000),
+            partitions=settings.get('partitions'),
+            nprobe=settings.get('nprobe', 8),
+        )
+
+    def _source_stamp(self) -> int:
+        try:
+            return os.stat(self.feature_store.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def build(self) -> EmbeddingIndex:
+        """특징 저장소 전체로 인덱스를 새로 만들어 저장합니다."""
+        started_at = time.monotonic()
+        stamp = self._source_stamp()
+        store = self.feature_store.open()
+        rows = sorted(store.index.items(), key=lambda item: item[1]['row'])
+        summaries = store.summary_matrix()
+        vectors = (np.asarray(summaries[[entry['row'] for _, entry in rows]]) if rows
+                   else np.empty((0, summary_dim(store.params['n_mels'])), dtype=np.float32))
+        partitions = 0
+        if len(rows) >= self.ivf_min_rows:
+            partitions = self.partitions or int(round(np.sqrt(len(rows))))
+        index = EmbeddingIndex.build([goods_no for goods_no, _ in rows], vectors, partitions, stamp)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        index.save(self.index_path)
+        metrics.observe('similarity_index_build_seconds', time.monotonic() - started_at)
+        logger.info(f"  [유사도] 인덱스 생성: {len(index)}대, 파티션 {index.partitions}개")
+        self._index = index
+        return index
+
+    def index(self, rebuild: bool = False) -> EmbeddingIndex:
+        """최신 인덱스를 반환합니다. 저장된 인덱스가 없거나 특징 저장소가 바뀌었으면 다시 만듭니다."""
+        if not rebuild and self._index is None:
+            self._index = EmbeddingIndex.load(self.index_path)
+        if rebuild or self._index is None or self._index.source_stamp != self._source_stamp():
+            return self.build()
+        return self._index
+
+    def similar_to(self, goods_nos: Sequence[str], k: int = 10, exact: bool = False
+                   ) -> Dict[str, List[Tuple[str, float]]]:
+        """goodsNo들과 엔진음이 비슷한 상위 k대를 반환합니다. exact=True면 IVF 인덱스에서도 전체를 검색합니다."""
+        return self.index().similar_to(goods_nos, k, nprobe=None if exact else self.nprobe)
+
+
+def load_metadata_rows(metadata_csv_path: str, goods_nos: Sequence[str]) -> Dict[str, Dict[str, str]]:
+    """CLI 출력용으로 car_audio_metadata.csv에서 필요한 goodsNo의 행만 읽습니다. (pandas 없이)"""
+    import csv
+
+    wanted = set(goods_nos)
+    if not wanted or not os.path.exists(metadata_csv_path):
+        return {}
+    with open(metadata_csv_path, 'r', encoding='utf-8', newline='') as f:
+        return {row['goodsNo']: row for row in csv.DictReader(f) if row.get('goodsNo') in wanted}
+
+
+def format_results(results: Dict[str, List[Tuple[str, float]]], metadata: Dict[str, Dict[str, str]],
+                   columns: Sequence[str] = ('vehicle_name', 'regularity', 'specific_anomaly')) -> str:
+    lines = []
+    for goods_no, neighbors in results.items():
+        lines.append(json.dumps({'goodsNo': goods_no, **{c: metadata.get(goods_no, {}).get(c) for c in columns}},
+                                ensure_ascii=False))
+        for rank, (other, similarity) in enumerate(neighbors, start=1):
+            fields = '  '.join(f"{c}={metadata.get(other, {}).get(c, '')}" for c in columns)
+            lines.append(f"  {rank:>3}. {other}  유사도 {similarity:.4f}  {fields}")
+    return '\n'.join(lines)
@@ -0,0 +1,118 @@
+# src/value_converters.py
+
+import datetime
+import math
+import re
+from typing import Any, Optional
+
+# 스크래핑 값은 대부분 문자열이므로, 저장/분석 단계에서 공통으로 사용할 타입 변환 함수들을 모아둡니다.
+# 모든 변환 함수는 변환할 수 없는 값에 대해 예외 대신 None을 반환합니다.
+
+# 첫 번째 숫자 (천 단위 쉼표, 소수점 허용): '1,598cc' → '1,598', '2020-06' → '2020', '12.5km' → '12.5'
+_FIRST_NUMBER_RE = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+_DIGITS_RE = re.compile(r'\d+')
+_YEARS_RE = re.compile(r'(\d+)\s*년')
+_MONTHS_RE = re.compile(r'(\d+)\s*개월')
+
+_TRUE_STRINGS = {'true', '1', 'yes', 'y', 't'}
+_FALSE_STRINGS = {'false', '0', 'no', 'n', 'f', ''}
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _first_number(value: Any) -> Optional[float]:
+    """문자열에서 첫 번째 숫자를 찾아 실수로 반환합니다. 숫자가 없거나 유한하지 않으면 None입니다."""
+    if _is_missing(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = _FIRST_NUMBER_RE.search(str(value))
+        if not match:
+            return None
+        try:
+            number = float(match.group().replace(',', ''))
+        except ValueError:
+            return None
+    return number if math.isfinite(number) else None
+
+
+def to_int(value: Any) -> Optional[int]:
+    """
+    '12,345km', '1,598cc', 2021.0 등을 정수로 변환합니다.
+    첫 번째 숫자만 사용하므로 '2020-06'은 2020, '12.5'는 12(소수점 이하 버림)가 됩니다.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    number = _first_number(value)
+    return int(number) if number is not None else None
+
+
+def to_float(value: Any) -> Optional[float]:
+    """'85.5점' 같은 점수 텍스트를 실수로 변환합니다. (첫 번째 숫자 사용)"""
+    return _first_number(value)
+
+
+def to_bool(value: Any) -> Optional[bool]:
+    """True/False, 'True'/'False', 1/0 등을 bool로 변환합니다."""
+    if _is_missing(value):
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    text = str(value).strip().lower()
+    if text in _TRUE_STRINGS:
+        return True
+    if text in _FALSE_STRINGS:
+        return False
+    return None
+
+
+def to_date(value: Any) -> Optional[datetime.date]:
+    """
+    '2021.03.15', '2021-03-15', '2021년 03월', '2021.03' 등을 날짜로 변환합니다.
+    일(day)이 없으면 1일로 간주합니다.
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    parts = _DIGITS_RE.findall(str(value))
+    if not parts or len(parts[0]) != 4:
+        return None
+    year = int(parts[0])
+    month = int(parts[1]) if len(parts) > 1 else 1
+    day = int(parts[2]) if len(parts) > 2 else 1
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def months_from_korean_duration(value: Any) -> Optional[int]:
+    """'2년 6개월' → 30, '8개월' → 8, '1년' → 12 처럼 한국어 기간 표기를 개월 수로 변환합니다."""
+    if _is_missing(value):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    text = str(value)
+    years = _YEARS_RE.search(text)
+    months = _MONTHS_RE.search(text)
+    if not years and not months:
+        return to_int(text) if _DIGITS_RE.search(text) else None
+    return (int(years.group(1)) * 12 if years else 0) + (int(months.group(1)) if months else 0)
+
+
+CONVERTERS = {
+    'int': to_int,
+    'float': to_float,
+    'bool': to_bool,
+    'date': to_date,
+    'months_from_korean_duration': months_from_korean_duration,
+    'str': lambda value: None if _is_missing(value) else str(value),
+}
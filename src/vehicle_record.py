@@ -0,0 +1,63 @@
+# src/vehicle_record.py
+
+from typing import Any, Dict, Iterator, Tuple
+
+from src.columnar_store import METADATA_COLUMN_TYPES
+
+
+class VehicleRecord:
+    """
+    상세 페이지 한 건의 추출 결과를 담는 __slots__ 기반 레코드입니다.
+
+    값은 PageParser에서 output_type에 따라 이미 변환된 타입(int/float/bool/date)으로 저장됩니다.
+    기존 코드가 딕셔너리처럼 사용하던 방식(record['goodsNo'], record.get(...), items())을 그대로 지원하며,
+    메타데이터 컬럼이 아닌 셀렉터 값(예: 필터 셀렉터)은 별도의 extra 딕셔너리에 보관합니다.
+    """
+
+    FIELDS: Tuple[str, ...] = tuple(METADATA_COLUMN_TYPES) + ("audio_url_on_page",)
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, **values: Any):
+        # 슬롯은 값을 넣기 전까지 비어 있으며, 비어 있는 필드는 딕셔너리에 없는 키처럼 동작합니다.
+        self._extra: Dict[str, Any] = {}
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def _is_field(cls, key: str) -> bool:
+        return key in cls.__slots__ and key != "_extra"
+
+    def __getitem__(self, key: str) -> Any:
+        if self._is_field(key):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if self._is_field(key):
+            setattr(self, key, value)
+        else:
+            self._extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key) if self._is_field(key) else key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field, getattr(self, field)
+        yield from self._extra.items()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"VehicleRecord(goodsNo={self.get('goodsNo')!r}, vehicle_name={self.get('vehicle_name')!r})"
@@ -1,13 +1,130 @@
+import collections
+import itertools
+import json
+import logging
+import os
 import requests
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple
+# 예외 클래스만 먼저 임포트합니다. (selenium.webdriver 본체와 webdriver_manager는 드라이버를 만들 때 임포트)
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, WebDriverException,
+                                        JavascriptException)
 
-# ChromeDriver 자동 다운로드 및 관리를 위한 라이브러리
-from webdriver_manager.chrome import ChromeDriverManager
+from src.metrics import metrics
+from src.proxy_pool import ProxyPool
+from src.rate_limiter import RateLimiter
+from src.retry_policy import PERMANENT_HTTP_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# ChromeDriverManager().install()은 실행할 때마다 네트워크로 버전을 확인하므로,
+# 한 번 확인된 드라이버 경로를 로컬에 캐시해두고 파일이 남아 있으면 그대로 사용합니다. (오프라인 빠른 경로)
+DRIVER_CACHE_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache', 'chromedriver.json'))
+
+# 목록 아이템 수가 known_count보다 커지는 순간을 MutationObserver로 감지하는 비동기 스크립트.
+# WebDriverWait 폴링(500ms 간격, 매번 WebDriver 왕복 + DOM 조회) 대신 브라우저 안에서 DOM 변경 이벤트를 기다리고,
+# 같은 호출에서 (아이템 수, 링크 수, 새로 추가된 링크의 속성값)을 돌려줍니다.
+# 인자: item_type, item_selector, link_type, link_selector, link_attribute, container_css, known_count, known_links, timeout_ms
+_WAIT_FOR_LIST_GROWTH_JS = """
+const [itemType, itemSelector, linkType, linkSelector, linkAttribute, containerCss,
+       knownCount, knownLinks, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+function select(type, selector) {
+    if (type === 'xpath') {
+        const result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+        return nodes;
+    }
+    return Array.from(document.querySelectorAll(selector));
+}
+function countItems() { return select(itemType, itemSelector).length; }
+function snapshot(timedOut) {
+    const links = linkSelector ? select(linkType, linkSelector) : [];
+    return {count: countItems(), link_count: links.length, timed_out: timedOut,
+            hrefs: links.slice(knownLinks).map(a => a.getAttribute(linkAttribute))};
+}
+if (countItems() > knownCount) { done(snapshot(false)); return; }
+const target = (containerCss && document.querySelector(containerCss)) || document.body;
+let finished = false, timer = null;
+const observer = new MutationObserver(() => { if (countItems() > knownCount) finish(false); });
+function finish(timedOut) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(snapshot(timedOut));
+}
+observer.observe(target, {childList: true, subtree: true});
+timer = setTimeout(() => finish(true), timeoutMs);
+"""
+
+# 탭 다중화(tabs_per_browser > 1)에서 탭마다 페이지 로드를 기다리지 않고 시작/확인하기 위한 스크립트.
+# 이동 전에 현재 문서에 표식(window.__egaiNav = token)을 남기고, 표식이 없는(새) 문서의 readyState가 complete이면 로드 완료입니다.
+_START_NAVIGATION_JS = "window.__egaiNav = arguments[0]; window.location.href = arguments[1];"
+_MARK_DOCUMENT_JS = "window.__egaiNav = arguments[0];"
+# 마지막 값은 브라우저가 잰 로드 시간(ms, 이동 시작 → readyState complete)이며, 알 수 없으면 0입니다.
+_DOCUMENT_STATE_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+return [document.readyState, window.__egaiNav === arguments[0], location.href, nav ? nav.domComplete : 0];
+"""
+
+# 로드 중인 탭들의 상태를 확인하는 간격(초). 모든 탭이 로드 중일 때만 쉽니다.
+TAB_POLL_INTERVAL_SEC = 0.05
+
+
+class _Tab:
+    """
+    브라우저 탭 하나의 상태. queue는 이 탭에 배정된 (key, url, attempt) 목록이며,
+    재시도와 탭 복구 후 다시 시도할 항목이 앞쪽에 들어갑니다. (새 작업은 탭이 비었을 때 공용 입력에서 가져옴)
+    """
+
+    __slots__ = ('handle', 'queue', 'item', 'token', 'started_at', 'resume_at')
+
+    def __init__(self, handle: str):
+        self.handle = handle
+        self.queue: Deque[Tuple[Any, str, int]] = collections.deque()
+        self.item: Optional[Tuple[Any, str, int]] = None  # 로드 중인 (key, url, attempt)
+        self.token = ''
+        self.started_at = 0.0
+        self.resume_at = 0.0  # 재시도 대기: 이 시각 전에는 다음 항목을 시작하지 않음
+
+
+def _load_cached_driver_path(cache_path: str = DRIVER_CACHE_PATH):
+    """캐시된 ChromeDriver 경로가 있고 실행 가능한 파일이면 반환합니다."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            driver_path = json.load(f).get('path')
+    except (OSError, ValueError):
+        return None
+    if driver_path and os.path.isfile(driver_path) and os.access(driver_path, os.X_OK):
+        return driver_path
+    return None
+
+
+def resolve_chromedriver_path(refresh: bool = False, cache_path: str = DRIVER_CACHE_PATH) -> str:
+    """
+    ChromeDriver 실행 파일 경로를 반환합니다.
+    refresh=False이면 로컬 캐시를 먼저 확인하고, 없거나 파일이 사라졌을 때만 ChromeDriverManager로 새로 받습니다.
+    """
+    if not refresh:
+        cached = _load_cached_driver_path(cache_path)
+        if cached:
+            logger.info(f"캐시된 ChromeDriver 사용: {cached}")
+            return cached
+
+    # ChromeDriver 자동 다운로드 및 관리를 위한 라이브러리
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    logger.info("ChromeDriver 자동 다운로드 및 설치 중...")
+    driver_path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'path': driver_path, 'resolved_at': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+    os.replace(tmp_path, cache_path)
+    return driver_path
 
 
 class WebScraper:
@@ -18,21 +135,16 @@ class WebScraper:
 
     def __init__(self, user_agent, request_delay, timeout, max_retries, retry_delay,
                  use_selenium=False, selenium_driver_path=None, use_auto_driver_download=False,
-                 selenium_headless=True):
-
-        # --- 디버그 시작: 전달받은 파라미터 값과 타입을 확인 ---
-        print("\n--- WebScraper __init__ 디버그 시작 ---")
-        print(f"DEBUG(WebScraper.__init__): user_agent={user_agent} ({type(user_agent)})")
-        print(f"DEBUG(WebScraper.__init__): request_delay={request_delay} ({type(request_delay)})")
-        print(f"DEBUG(WebScraper.__init__): timeout={timeout} ({type(timeout)})")
-        print(f"DEBUG(WebScraper.__init__): max_retries={max_retries} ({type(max_retries)})")
-        print(f"DEBUG(WebScraper.__init__): retry_delay={retry_delay} ({type(retry_delay)})")
-        print(f"DEBUG(WebScraper.__init__): use_selenium={use_selenium} ({type(use_selenium)})")
-        print(f"DEBUG(WebScraper.__init__): selenium_driver_path={selenium_driver_path} ({type(selenium_driver_path)})")
-        print(f"DEBUG(WebScraper.__init__): use_auto_driver_download={use_auto_driver_download} ({type(use_auto_driver_download)})")
-        print(f"DEBUG(WebScraper.__init__): selenium_headless={selenium_headless} ({type(selenium_headless)})")
-        print("--- WebScraper __init__ 디버그 끝 ---")
-        # --- 디버그 끝 ---
+                 selenium_headless=True, rate_limiter=None, proxy_pool=None, tabs_per_browser=1):
+
+        # 전달받은 파라미터 값과 타입 확인 (DEBUG 레벨에서만 출력)
+        if logger.isEnabledFor(logging.DEBUG):
+            for name, value in (("user_agent", user_agent), ("request_delay", request_delay), ("timeout", timeout),
+                                ("max_retries", max_retries), ("retry_delay", retry_delay),
+                                ("use_selenium", use_selenium), ("selenium_driver_path", selenium_driver_path),
+                                ("use_auto_driver_download", use_auto_driver_download),
+                                ("selenium_headless", selenium_headless)):
+                logger.debug("WebScraper.__init__: %s=%s (%s)", name, value, type(value))
 
         # 파라미터들을 self. 속성으로 명확하게 할당
         self.headers = {'User-Agent': user_agent}
@@ -40,51 +152,79 @@ class WebScraper:
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        # 모든 요청은 공유 RateLimiter를 거칩니다. 주어지지 않으면 request_delay 기반으로 생성합니다.
+        self.rate_limiter = rate_limiter or RateLimiter(
+            initial_rate=1.0 / request_delay if request_delay > 0 else 2.0, backoff_base_sec=retry_delay)
+
+        # 프록시 풀 (proxy_enabled가 false이면 None). Selenium 드라이버는 초기화 시 프록시 하나를 점유합니다.
+        self.proxy_pool = proxy_pool
+        self.driver_proxy = None
 
         self.use_selenium = use_selenium
         self.use_auto_driver_download = use_auto_driver_download
         self.driver = None  # Selenium WebDriver 인스턴스 초기화
+        # 마지막 get_html 실패의 HTTP 상태 코드 (네트워크 오류나 Selenium 실패면 None). 실패 분류에 사용됩니다.
+        self.last_error_status = None
+        # 브라우저 하나에서 동시에 로드할 탭 수 (fetch_many). 2 이상이면 탭 사이를 오가며 명령을 보낼 수 있도록
+        # 페이지 로드를 기다리지 않는 'none' 전략을 사용하고, navigate/get_html은 문서 로드를 직접 기다립니다.
+        self.tabs_per_browser = max(1, int(tabs_per_browser or 1))
+        self.page_load_strategy = 'none' if self.tabs_per_browser > 1 else 'normal'
+        self._nav_tokens = itertools.count(1)
 
         # max_retries가 유효한지 최종 검사 (ConfigLoader에서 처리하지만 방어적으로)
         if not isinstance(self.max_retries, int) or self.max_retries < 1:
             raise ValueError(f"WebScraper 초기화 오류: max_retries는 1 이상의 정수여야 합니다. 현재 값: {self.max_retries}")
 
+        self._driver_path = selenium_driver_path
+        self._headless = selenium_headless
         if self.use_selenium:
             self._init_selenium_driver(selenium_driver_path, selenium_headless)
 
     def _init_selenium_driver(self, driver_path, headless):
         """Selenium WebDriver를 초기화합니다."""
+        from selenium import webdriver
+
         try:
             options = webdriver.ChromeOptions()
             options.add_argument(f"user-agent={self.headers['User-Agent']}")
+            options.page_load_strategy = self.page_load_strategy
             if headless:
                 options.add_argument("--headless")  # UI 없이 백그라운드 실행
                 options.add_argument("--disable-gpu")  # Headless 모드에서 GPU 사용 안 함
             options.add_argument("--no-sandbox")  # Docker 등 리눅스 환경에서 필요
             options.add_argument("--disable-dev-shm-usage")  # Docker 등 환경에서 /dev/shm 문제 해결
+            if self.proxy_pool:
+                self.driver_proxy = self.proxy_pool.acquire()
+                if self.driver_proxy:
+                    options.add_argument(f"--proxy-server={self.driver_proxy}")
+                    logger.info(f"Selenium WebDriver 프록시 사용: {self.driver_proxy}")
 
             if self.use_auto_driver_download:
-                print("ChromeDriver 자동 다운로드 및 설치 중...")
-                # ChromeDriverManager().install()은 드라이버 경로를 반환합니다.
-                service = webdriver.ChromeService(executable_path=ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=options)
+                try:
+                    service = webdriver.ChromeService(executable_path=resolve_chromedriver_path())
+                    self.driver = webdriver.Chrome(service=service, options=options)
+                except WebDriverException as e:
+                    # Chrome이 업데이트되어 캐시된 드라이버 버전이 맞지 않는 경우 등: 새로 받아서 한 번 더 시도
+                    logger.warning(f"캐시된 ChromeDriver로 시작하지 못했습니다. 드라이버를 다시 확인합니다: {e}")
+                    service = webdriver.ChromeService(executable_path=resolve_chromedriver_path(refresh=True))
+                    self.driver = webdriver.Chrome(service=service, options=options)
             elif driver_path:
-                print(f"지정된 ChromeDriver 경로 사용: {driver_path}")
+                logger.info(f"지정된 ChromeDriver 경로 사용: {driver_path}")
                 service = webdriver.ChromeService(executable_path=driver_path)
                 self.driver = webdriver.Chrome(service=service, options=options)
             else:
                 # driver_path가 None이고 자동 다운로드도 false이면 시스템 PATH에서 찾음
-                print("시스템 PATH에서 ChromeDriver를 찾습니다.")
+                logger.info("시스템 PATH에서 ChromeDriver를 찾습니다.")
                 self.driver = webdriver.Chrome(options=options)
 
             self.driver.set_page_load_timeout(self.timeout)  # 페이지 로드 타임아웃
-            print("Selenium WebDriver 초기화 완료.")
+            logger.info("Selenium WebDriver 초기화 완료.")
         except WebDriverException as e:
-            print(f"오류: Selenium WebDriver 초기화 실패. 드라이버 경로/설치 또는 Chrome 버전 확인: {e}")
+            logger.error(f"오류: Selenium WebDriver 초기화 실패. 드라이버 경로/설치 또는 Chrome 버전 확인: {e}")
             self.use_selenium = False  # Selenium 사용 불가로 설정
             self.driver = None
 
-    def get_html(self, url, scroll_limit=0, click_selector_info=None):
+    def get_html(self, url, scroll_limit=0, click_selector_info=None, item_selector_info=None):
         """
         주어진 URL에서 HTML 내용을 가져옵니다. Selenium 사용 시 동적 로딩 콘텐츠도 처리합니다.
 
@@ -92,59 +232,441 @@ class WebScraper:
             url (str): HTML을 가져올 웹 페이지 URL.
             scroll_limit (int): '더보기' 버튼을 누르거나 스크롤할 최대 횟수 (Selenium 사용 시). 0이면 스크롤 안 함.
             click_selector_info (dict): '더보기' 버튼의 셀렉터 정보 (Selenium 사용 시).
+            item_selector_info (dict): '더보기' 클릭 후 늘어나야 할 목록 아이템 셀렉터. 클릭할 때마다 이 아이템 수가
+                늘어날 때까지 기다리며, click_selector_info를 주면 반드시 함께 지정해야 합니다.
 
         Returns:
-            str: 성공적으로 가져온 HTML 내용. 실패 시 None.
+            str: 성공적으로 가져온 HTML 내용. 실패 시 None. (실패한 HTTP 상태 코드는 self.last_error_status)
         """
+        if scroll_limit > 0 and click_selector_info and not item_selector_info:
+            raise ValueError("get_html: '더보기' 클릭(click_selector_info)에는 늘어날 목록 아이템 셀렉터"
+                             "(item_selector_info)가 필요합니다.")
+        self.last_error_status = None
         for attempt in range(self.max_retries):
             try:
-                print(f"  요청 중: {url} (시도: {attempt + 1}/{self.max_retries})")
-                time.sleep(self.request_delay)
+                logger.debug("  요청 중: %s (시도: %d/%d)", url, attempt + 1, self.max_retries)
+                if self._driver_proxy_ejected():
+                    self.restart_driver()
+                self.rate_limiter.acquire(url)
+                started_at = time.monotonic()
 
                 if self.use_selenium and self.driver:
-                    self.driver.get(url)
+                    from selenium.webdriver.common.by import By
+                    from selenium.webdriver.support.ui import WebDriverWait
+                    from selenium.webdriver.support import expected_conditions as EC
+
+                    self._load(url)
                     # 페이지 로딩 대기 (필요 시 명시적 대기 조건 추가)
                     WebDriverWait(self.driver, self.timeout).until(
                         EC.presence_of_element_located((By.TAG_NAME, "body"))
                     )
+                    self.rate_limiter.record_success(url, time.monotonic() - started_at)
+                    if self.proxy_pool:
+                        self.proxy_pool.record(self.driver_proxy, True, time.monotonic() - started_at)
+                    metrics.observe('fetch_latency_seconds', time.monotonic() - started_at, mode='selenium')
+                    metrics.inc('pages_fetched', mode='selenium')
 
                     # '더보기' 버튼 클릭을 통한 동적 로딩
                     if scroll_limit > 0 and click_selector_info:
                         click_by = getattr(By, click_selector_info['type'].upper())
+                        known_count = self.wait_for_list_growth(item_selector_info, None, -1)['count']
                         for i in range(scroll_limit):
                             try:
                                 # '더보기' 버튼이 나타날 때까지 대기
                                 more_button = WebDriverWait(self.driver, self.timeout).until(
                                     EC.element_to_be_clickable((click_by, click_selector_info['selector']))
                                 )
-                                print(f"  '더보기' 버튼 클릭 (시도 {i + 1}/{scroll_limit})...")
+                                logger.debug("  '더보기' 버튼 클릭 (시도 %d/%d)...", i + 1, scroll_limit)
+                                self.rate_limiter.acquire(url)  # 클릭마다 서버로 추가 요청이 발생함
                                 more_button.click()
-                                time.sleep(self.request_delay * 2)  # 클릭 후 데이터 로딩 대기
-                                # 추가 데이터가 로드될 때까지 기다리는 명시적 조건 추가 가능
+                                # 다음 묶음이 렌더링될 때까지 대기 (마지막 클릭 직후 page_source를 읽지 않도록)
+                                state = self.wait_for_list_growth(item_selector_info, None, known_count)
+                                if state['timed_out']:
+                                    logger.info(f"  '더보기' 클릭 후 {self.timeout}초 동안 목록이 늘지 않았습니다. 스크롤 종료.")
+                                    break
+                                known_count = state['count']
                             except (TimeoutException, NoSuchElementException):
-                                print(f"  '더보기' 버튼을 더 이상 찾을 수 없거나 클릭할 수 없습니다. 스크롤 종료.")
+                                logger.info(f"  '더보기' 버튼을 더 이상 찾을 수 없거나 클릭할 수 없습니다. 스크롤 종료.")
                                 break  # 버튼 없으면 종료
                             except WebDriverException as e:
-                                print(f"  '더보기' 버튼 클릭 중 오류 발생: {e}. 스크롤 종료.")
+                                logger.warning(f"  '더보기' 버튼 클릭 중 오류 발생: {e}. 스크롤 종료.")
                                 break
                     return self.driver.page_source  # Selenium이 렌더링한 최종 HTML 반환
 
                 else:  # requests 라이브러리 사용 (정적 HTML)
-                    response = requests.get(url, headers=self.headers, timeout=self.timeout)
-                    response.raise_for_status()
+                    proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+                    try:
+                        response = requests.get(url, headers=self.headers, timeout=self.timeout,
+                                                proxies=ProxyPool.requests_proxies(proxy))
+                        response.raise_for_status()
+                    except requests.exceptions.RequestException as e:
+                        if self.proxy_pool:
+                            failed_response = getattr(e, 'response', None)
+                            self.proxy_pool.release(proxy, not ProxyPool.is_proxy_fault(
+                                failed_response.status_code if failed_response is not None else None))
+                        raise
+                    if self.proxy_pool:
+                        self.proxy_pool.release(proxy, True, time.monotonic() - started_at)
+                    self.rate_limiter.record_success(url, time.monotonic() - started_at)
+                    metrics.observe('fetch_latency_seconds', time.monotonic() - started_at, mode='http')
+                    metrics.inc('pages_fetched', mode='http')
                     return response.text
 
             except (requests.exceptions.RequestException, WebDriverException, TimeoutException) as e:
-                print(f"  요청 실패 (시도 {attempt + 1}/{self.max_retries}) for {url}: {e}")
+                logger.warning(f"  요청 실패 (시도 {attempt + 1}/{self.max_retries}) for {url}: {e}")
+                if self.proxy_pool and self.use_selenium and self.driver:
+                    self.proxy_pool.record(self.driver_proxy, False)
+                response = getattr(e, 'response', None)
+                backoff = self.rate_limiter.record_failure(
+                    url,
+                    status_code=response.status_code if response is not None else None,
+                    retry_after=response.headers.get('Retry-After') if response is not None else None,
+                )
+                metrics.inc('fetch_errors', status=response.status_code if response is not None else 'network')
+                self.last_error_status = response.status_code if response is not None else None
+                if self.last_error_status in PERMANENT_HTTP_STATUSES:
+                    logger.error(f"  {url}: HTTP {self.last_error_status}. 재시도하지 않습니다.")
+                    return None
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
+                    metrics.inc('fetch_retries')
+                    time.sleep(backoff)
                 else:
-                    print(f"  최대 재시도 횟수 도달. {url} 가져오기 실패.")
+                    logger.error(f"  최대 재시도 횟수 도달. {url} 가져오기 실패.")
                     return None
         return None
 
+    def navigate(self, url: str):
+        """
+        RateLimiter를 거쳐 Selenium 드라이버로 URL에 이동합니다.
+        MainCrawler처럼 driver를 직접 다루는 경로도 이 메서드를 사용해야 속도 제한이 적용됩니다.
+        """
+        if self._driver_proxy_ejected():
+            self.restart_driver()
+        self.rate_limiter.acquire(url)
+        started_at = time.monotonic()
+        try:
+            self._load(url)
+        except WebDriverException:
+            self.rate_limiter.record_failure(url)
+            raise
+        self.rate_limiter.record_success(url, time.monotonic() - started_at)
+
+    def _new_token(self) -> str:
+        return f"nav-{next(self._nav_tokens)}"
+
+    def _document_state(self, token: str) -> Optional[Tuple[str, bool, str, float]]:
+        """
+        현재 탭의 (readyState, 아직 이전 문서인지, URL, 브라우저가 잰 로드 시간(초, 모르면 0)).
+        문서가 바뀌는 중이라 스크립트를 실행할 수 없으면 None.
+        """
+        try:
+            ready_state, same_document, href, load_ms = self.driver.execute_script(_DOCUMENT_STATE_JS, token)
+        except JavascriptException:
+            return None
+        return ready_state, same_document, href or '', (load_ms or 0) / 1000
+
+    def _load(self, url: str):
+        """
+        현재 탭에서 url로 이동하고 문서 로드가 끝날 때까지 기다립니다.
+        'normal' 전략에서는 driver.get이 이미 기다리므로 그대로이고, 'none' 전략에서는 새 문서가 complete가 될 때까지 기다립니다.
+        """
+        if self.page_load_strategy == 'normal':
+            self.driver.get(url)
+            return
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        token = self._new_token()
+        try:
+            self.driver.execute_script(_MARK_DOCUMENT_JS, token)
+        except JavascriptException:
+            pass  # 이전 문서가 없거나 이동 중이면 표식 없이 readyState만 확인
+        self.driver.get(url)
+
+        def loaded(_driver) -> bool:
+            state = self._document_state(token)
+            return state is not None and state[0] == 'complete' and not state[1]
+
+        WebDriverWait(self.driver, self.timeout, poll_frequency=TAB_POLL_INTERVAL_SEC).until(loaded)
+
+    # --- 탭 다중화 ---
+
+    def fetch_many(self, items: Iterable[Tuple[Any, str]], tabs: Optional[int] = None
+                   ) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        (key, url) 항목들을 브라우저 하나의 여러 탭에서 동시에 로드하고, 로드가 끝나는 순서대로 (key, HTML)을 반환합니다.
+        실패한 항목은 (key, None)이며, 그 직후 self.last_error_status는 None입니다. (브라우저에서는 HTTP 상태를 알 수 없음)
+
+        - 각 탭은 페이지 로드를 시작만 하고 바로 다음 탭으로 넘어가므로, 여러 페이지의 네트워크/렌더링 대기가 겹칩니다.
+          새 로드를 시작할 때마다 RateLimiter를 거치므로 요청 간격 제한은 탭 수와 관계없이 그대로 적용됩니다.
+        - 항목은 탭이 비었을 때 items에서 하나씩 가져옵니다. (우선순위 큐 순서 유지)
+        - 탭이 죽으면(크래시, 창 닫힘) 그 탭만 닫고 새 탭을 열어 해당 항목을 다시 시도합니다. (시도 횟수에 포함)
+        - 크롬 프로세스 하나(브라우저/GPU/네트워크 프로세스 공유)로 여러 페이지를 처리하므로,
+          같은 동시 처리 수를 브라우저 여러 개로 할 때보다 메모리를 훨씬 적게 씁니다.
+
+        tabs가 1 이하이거나 Selenium을 쓰지 않으면 get_html로 하나씩 처리합니다.
+        """
+        tabs = self.tabs_per_browser if tabs is None else tabs
+        if tabs <= 1 or not (self.use_selenium and self.driver):
+            for key, url in items:
+                yield key, self.get_html(url)
+            return
+
+        source = iter(items)
+        pool = self._open_tabs(tabs)
+        try:
+            yield from self._multiplex(source, pool)
+        finally:
+            self._close_tabs(pool)
+
+    def _open_tabs(self, count: int) -> List[_Tab]:
+        pool = [_Tab(self.driver.current_window_handle)]
+        for _ in range(count - 1):
+            try:
+                self.driver.switch_to.new_window('tab')
+            except WebDriverException as e:
+                logger.warning(f"  새 탭을 열지 못했습니다. 탭 {len(pool)}개로 진행합니다: {e}")
+                break
+            pool.append(_Tab(self.driver.current_window_handle))
+        metrics.set_gauge('browser_tabs', len(pool))
+        return pool
+
+    def _close_tabs(self, pool: List[_Tab]):
+        """첫 번째 탭만 남기고 닫은 뒤 그 탭으로 돌아갑니다."""
+        if not pool:
+            return
+        for tab in pool[1:]:
+            try:
+                self.driver.switch_to.window(tab.handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        try:
+            self.driver.switch_to.window(pool[0].handle)
+        except WebDriverException as e:
+            logger.warning(f"  원래 탭으로 돌아가지 못했습니다: {e}")
+        metrics.set_gauge('browser_tabs', 1)
+
+    def _multiplex(self, source: Iterator[Tuple[Any, str]], pool: List[_Tab]
+                   ) -> Iterator[Tuple[Any, Optional[str]]]:
+        exhausted = False
+        while True:
+            now = time.monotonic()
+            # 1. 비어 있는 탭에서 다음 항목의 로드를 시작 (자기 큐 → 공용 입력 순)
+            if self._driver_proxy_ejected():
+                # 드라이버의 프록시가 풀에서 제외됨: 진행 중/대기 중인 항목을 모아 새 프록시로 브라우저를 다시 시작
+                pending = self._drain_tabs(pool)
+                self.restart_driver()
+                if self.use_selenium and self.driver:
+                    pool[:] = self._open_tabs(len(pool))
+                    for i, item in enumerate(pending):
+                        pool[i % len(pool)].queue.append(item)
+                else:
+                    pool.clear()
+                    source = itertools.chain(((key, url) for key, url, _ in pending), source)
+            for tab in list(pool):
+                if tab.item is not None or tab.resume_at > now:
+                    continue
+                if not tab.queue and not exhausted:
+                    next_item = next(source, None)
+                    if next_item is None:
+                        exhausted = True
+                    else:
+                        tab.queue.append((next_item[0], next_item[1], 0))
+                if tab.queue:
+                    yield from self._start_tab(tab, tab.queue.popleft(), pool)
+
+            if not pool:  # 브라우저가 더 이상 탭을 열 수 없음: 남은 항목은 일반 경로(get_html)로 처리
+                logger.error("  모든 탭을 복구하지 못했습니다. 남은 항목은 하나씩 처리합니다.")
+                for key, url in source:
+                    yield key, self.get_html(url)
+                return
+
+            loading = [tab for tab in pool if tab.item is not None]
+            if not loading:
+                if exhausted and not any(tab.queue for tab in pool):
+                    return
+                time.sleep(TAB_POLL_INTERVAL_SEC)  # 재시도 대기 중인 탭만 남음
+                continue
+
+            # 2. 로드 중인 탭을 모두 확인한 뒤 끝난 탭의 결과를 반환
+            #    (결과를 넘긴 동안 소비자가 쓰는 시간이 다른 탭의 지연시간/타임아웃 판단에 섞이지 않도록 확인을 먼저 끝냄)
+            finished = []
+            for tab in loading:
+                result = self._poll_tab(tab, pool, time.monotonic())
+                if result is not None:
+                    finished.append(result)
+            if not finished:
+                time.sleep(TAB_POLL_INTERVAL_SEC)
+            for result in finished:
+                yield from result
+
+    @staticmethod
+    def _drain_tabs(pool: List[_Tab]) -> List[Tuple[Any, str, int]]:
+        """모든 탭의 진행 중인 항목과 대기 항목을 꺼냅니다. (시도 횟수는 그대로 유지)"""
+        pending = []
+        for tab in pool:
+            if tab.item is not None:
+                pending.append(tab.item)
+                tab.item = None
+            pending.extend(tab.queue)
+            tab.queue.clear()
+        return pending
+
+    def _start_tab(self, tab: _Tab, item: Tuple[Any, str, int], pool: List[_Tab]
+                   ) -> Iterator[Tuple[Any, Optional[str]]]:
+        key, url, attempt = item
+        self.rate_limiter.acquire(url)
+        tab.item, tab.token, tab.started_at = item, self._new_token(), time.monotonic()
+        try:
+            self.driver.switch_to.window(tab.handle)
+            self.driver.execute_script(_START_NAVIGATION_JS, tab.token, url)
+        except JavascriptException:
+            pass  # 이전 문서가 이동 중이어도 location 변경은 적용되므로 확인 단계에서 판단
+        except WebDriverException as e:
+            yield from self._recover_tab(tab, pool, e)
+
+    def _poll_tab(self, tab: _Tab, pool: List[_Tab], observed_at: float
+                  ) -> Optional[List[Tuple[Any, Optional[str]]]]:
+        """
+        로드 중인 탭을 확인합니다. 아직 로드 중이면 None, 끝났으면 반환할 결과 목록(성공 1개 또는 실패 0~1개).
+        지연시간은 브라우저가 잰 로드 시간을 쓰고, 없으면 확인 시각(observed_at)까지의 시간을 씁니다.
+        이전 결과를 소비자가 처리하는 동안 끝난 탭도 실제 로드 시간으로 기록되어 AIMD 속도 조절이 왜곡되지 않습니다.
+        """
+        key, url, attempt = tab.item
+        elapsed = observed_at - tab.started_at
+        try:
+            self.driver.switch_to.window(tab.handle)
+            state = self._document_state(tab.token)
+            if state is None or state[1] or state[0] != 'complete':
+                if elapsed <= self.timeout:
+                    return None
+                return list(self._tab_failed(tab, f"{self.timeout}초 안에 로드되지 않음"))
+            if state[2].startswith('chrome-error://'):
+                return list(self._tab_failed(tab, "브라우저 네트워크 오류 페이지"))
+            html = self.driver.page_source
+        except WebDriverException as e:
+            return list(self._recover_tab(tab, pool, e))
+
+        if 0 < state[3] <= elapsed:
+            elapsed = state[3]
+        tab.item = None
+        self.last_error_status = None
+        self.rate_limiter.record_success(url, elapsed)
+        if self.proxy_pool:
+            self.proxy_pool.record(self.driver_proxy, True, elapsed)
+        metrics.observe('fetch_latency_seconds', elapsed, mode='tab')
+        metrics.inc('pages_fetched', mode='tab')
+        return [(key, html)]
+
+    def _tab_failed(self, tab: _Tab, reason: str) -> Iterator[Tuple[Any, Optional[str]]]:
+        """탭의 현재 항목 실패를 기록하고, 재시도 횟수가 남았으면 같은 탭 큐의 맨 앞에 다시 넣습니다."""
+        key, url, attempt = tab.item
+        tab.item = None
+        logger.warning(f"  요청 실패 (시도 {attempt + 1}/{self.max_retries}) for {url}: {reason}")
+        backoff = self.rate_limiter.record_failure(url)
+        if self.proxy_pool:
+            self.proxy_pool.record(self.driver_proxy, False)
+        metrics.inc('fetch_errors', status='network')
+        if attempt < self.max_retries - 1:
+            metrics.inc('fetch_retries')
+            tab.queue.appendleft((key, url, attempt + 1))
+            tab.resume_at = time.monotonic() + backoff  # 다른 탭은 계속 진행
+            return
+        logger.error(f"  최대 재시도 횟수 도달. {url} 가져오기 실패.")
+        self.last_error_status = None
+        yield key, None
+
+    def _recover_tab(self, tab: _Tab, pool: List[_Tab], error: Exception) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        죽은 탭을 닫고 새 탭으로 교체합니다. 진행 중이던 항목은 실패 1회로 기록합니다.
+        새 탭을 열 수 없으면(브라우저 자체가 죽음) 탭을 풀에서 빼고, 그 탭의 대기 항목은 다른 탭으로 넘깁니다.
+        """
+        logger.warning(f"  탭 오류, 탭을 다시 엽니다: {str(error).splitlines()[0] if str(error) else error!r}")
+        metrics.inc('tab_crashes')
+        try:
+            self.driver.switch_to.window(tab.handle)
+            self.driver.close()
+        except WebDriverException:
+            pass
+        try:
+            self.driver.switch_to.new_window('tab')
+            tab.handle = self.driver.current_window_handle
+        except WebDriverException as e:
+            logger.error(f"  새 탭을 열지 못했습니다: {e}")
+            pool.remove(tab)
+            if tab.item is not None:
+                yield from self._tab_failed(tab, f"탭 오류: {type(error).__name__}")
+            orphans = list(tab.queue)
+            if pool:
+                pool[0].queue.extend(orphans)
+            else:
+                for key, url, _ in orphans:
+                    yield key, None
+            metrics.set_gauge('browser_tabs', len(pool))
+            return
+        if tab.item is not None:
+            yield from self._tab_failed(tab, f"탭 오류: {type(error).__name__}")
+
+    def wait_for_list_growth(self, item_selector: dict, link_selector: Optional[dict], known_count: int,
+                             known_links: int = 0, container_css: str = None) -> dict:
+        """
+        목록 아이템 수가 known_count보다 많아질 때까지 브라우저 안에서 MutationObserver로 기다립니다.
+        아이템이 추가되는 즉시 반환하므로 대기 시간이 실제 서버 응답 시간만큼만 걸립니다.
+        known_count=-1이면 기다리지 않고 현재 상태를 바로 반환합니다.
+
+        Args:
+            item_selector (dict): 개수를 셀 아이템 셀렉터 {'type': 'xpath'|'css', 'selector': ...}
+            link_selector (dict): 링크 셀렉터 {'type', 'selector', 'extract_attribute'}. None이면 링크를 모으지 않습니다.
+            known_count (int): 이미 알고 있는 아이템 수.
+            known_links (int): 이미 받은 링크 수. 이후에 추가된 링크의 속성값만 반환합니다.
+            container_css (str): 관찰할 목록 컨테이너의 CSS 셀렉터. 없으면 document.body 전체를 관찰합니다.
+
+        Returns:
+            dict: {'count': 아이템 수, 'link_count': 링크 수, 'hrefs': [새 링크 속성값...],
+                   'timed_out': timeout 안에 아이템이 늘지 않았으면 True}
+        """
+        # 스크립트 자체 타이머가 먼저 끝나도록 WebDriver의 스크립트 타임아웃은 여유를 둡니다.
+        self.driver.set_script_timeout(self.timeout + 5)
+        started_at = time.monotonic()
+        result = self.driver.execute_async_script(
+            _WAIT_FOR_LIST_GROWTH_JS,
+            item_selector.get('type', 'xpath'), item_selector['selector'],
+            (link_selector or {}).get('type', 'xpath'), (link_selector or {}).get('selector'),
+            (link_selector or {}).get('extract_attribute') or 'href', container_css,
+            known_count, known_links, int(self.timeout * 1000))
+        if known_count >= 0:
+            metrics.observe('list_growth_wait_seconds', time.monotonic() - started_at)
+        return result
+
+    def _driver_proxy_ejected(self) -> bool:
+        """Selenium 드라이버가 점유한 프록시가 실패 누적으로 풀에서 제외되었는지 확인합니다."""
+        return bool(self.proxy_pool and self.driver and self.driver_proxy
+                    and self.proxy_pool.is_ejected(self.driver_proxy))
+
+    def restart_driver(self):
+        """
+        Selenium 드라이버를 종료하고 다시 시작합니다. 프록시 풀을 사용하면 점유하던 프록시를 반납하고 새로 배정받습니다.
+        (드라이버의 --proxy-server는 시작 후 바꿀 수 없으므로, 제외된 프록시를 계속 쓰지 않으려면 재시작이 필요함)
+        """
+        logger.warning(f"  Selenium WebDriver를 재시작합니다. (이전 프록시: {self.driver_proxy})")
+        metrics.inc('driver_restarts')
+        if self.driver:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+            self.driver = None
+        if self.proxy_pool and self.driver_proxy:
+            self.proxy_pool.release(self.driver_proxy, None)  # 실패는 이미 기록됨
+            self.driver_proxy = None
+        self.use_selenium = True
+        self._init_selenium_driver(self._driver_path, self._headless)
+
     def close(self):
         """Selenium WebDriver를 종료합니다."""
         if self.driver:
-            print("Selenium WebDriver 종료.")
-            self.driver.quit()
\ No newline at end of file
+            logger.info("Selenium WebDriver 종료.")
+            self.driver.quit()
+        if self.proxy_pool and self.driver_proxy:
+            self.proxy_pool.release(self.driver_proxy, True)
+            self.driver_proxy = None
\ No newline at end of file
@@ -0,0 +1,123 @@
+# src/work_scheduler.py
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+SECONDS_PER_DAY = 86400.0
+
+
+class PriorityWorkQueue(Generic[T]):
+    """
+    상세 수집 작업자에게 작업을 나눠주는 스레드 안전 우선순위 큐입니다. (heapq 기반)
+    우선순위 점수가 높은 작업이 먼저 나가며, 점수가 같으면 넣은 순서를 유지합니다.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, T]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, item: T, priority: float):
+        with self._lock:
+            heapq.heappush(self._heap, (-priority, next(self._counter), item))
+
+    def pop(self) -> Optional[T]:
+        """가장 우선순위가 높은 작업을 꺼냅니다. 비어 있으면 None을 반환합니다."""
+        with self._lock:
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def peek(self, n: int) -> List[Tuple[T, float]]:
+        """꺼내지 않고 상위 n개 작업과 점수를 반환합니다. (로그/디버깅용)"""
+        with self._lock:
+            return [(item, -neg_priority) for neg_priority, _, item in heapq.nsmallest(n, self._heap)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+
+class DetailPriority:
+    """
+    상세 수집 대상 goodsNo의 우선순위 점수를 계산합니다. 점수가 높을수록 먼저 수집합니다.
+
+      discovery     : 목록에서 앞쪽에 있을수록(discovery_rank가 작을수록) 높음. 1 / (1 + rank / rank_scale)
+      recency       : 처음 발견된 지 얼마 안 됐을수록 높음. 0.5 ** (경과 일수 / recency_half_life_days)
+      missing_audio : 메타데이터는 있고 오디오만 없는 goodsNo (한 번만 더 성공하면 완전한 레코드가 됨)
+      retry         : 실패 횟수(attempts)만큼 감점
+      aging         : 오래 기다린 goodsNo가 계속 밀리지 않도록 경과 일수 * aging_per_day만큼 가산 (최대 aging_cap)
+
+    실행이 중간에 끊겨도 데이터셋에 가장 유용한 레코드가 먼저 들어가도록 하는 것이 목적입니다.
+    aging은 오래된 goodsNo끼리의 순서만 조정하며 새 매물보다 앞서면 안 되므로, aging_cap은 recency 가중치의
+    절반(MAX_AGING_RATIO)을 넘지 않도록 제한합니다.
+    first_seen_at을 모르는(이 기능 이전에 발견된) goodsNo는 recency와 aging 모두 0으로 계산합니다.
+    """
+
+    DEFAULT_WEIGHTS = {'discovery': 1.0, 'recency': 2.0, 'missing_audio': 0.5, 'retry': 1.0}
+    MAX_AGING_RATIO = 0.5  # aging_cap 상한 = recency 가중치 * MAX_AGING_RATIO
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, discovery_rank_scale: float = 50.0,
+                 recency_half_life_days: float = 3.0, aging_per_day: float = 0.05, aging_cap: float = 0.5):
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(self.DEFAULT_WEIGHTS)
+            if unknown:
+                raise ValueError(f"알 수 없는 우선순위 가중치: {sorted(unknown)} (허용: {list(self.DEFAULT_WEIGHTS)})")
+            self.weights.update(weights)
+        self.discovery_rank_scale = max(1e-9, discovery_rank_scale)
+        self.recency_half_life_days = max(1e-9, recency_half_life_days)
+        self.aging_per_day = aging_per_day
+        max_aging = self.weights['recency'] * self.MAX_AGING_RATIO
+        if aging_cap > max_aging:
+            logger.warning(f"aging_cap {aging_cap}이(가) recency 가중치에 비해 커서 새 매물이 밀리므로 "
+                           f"{max_aging}(으)로 제한합니다.")
+            aging_cap = max_aging
+        self.aging_cap = aging_cap
+
+    @classmethod
+    def from_config(cls, config_loader) -> "DetailPriority":
+        settings = config_loader.get('scheduling', expected_type=dict, default={})
+        return cls(
+            weights=settings.get('weights'),
+            discovery_rank_scale=settings.get('discovery_rank_scale', 50.0),
+            recency_half_life_days=settings.get('recency_half_life_days', 3.0),
+            aging_per_day=settings.get('aging_per_day', 0.05),
+            aging_cap=settings.get('aging_cap', 0.5),
+        )
+
+    def score(self, discovery_rank: int, first_seen_at: float, missing_audio_only: bool, attempts: int,
+              now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        score = 0.0
+        if discovery_rank >= 0:
+            score += self.weights['discovery'] / (1.0 + discovery_rank / self.discovery_rank_scale)
+        if first_seen_at > 0:
+            age_days = max(0.0, now - first_seen_at) / SECONDS_PER_DAY
+            score += self.weights['recency'] * 0.5 ** (age_days / self.recency_half_life_days)
+            score += min(self.aging_cap, self.aging_per_day * age_days)
+        if missing_audio_only:
+            score += self.weights['missing_audio']
+        score -= self.weights['retry'] * attempts
+        return score
+
+    def build_queue(self, rows: Any, now: Optional[float] = None) -> PriorityWorkQueue:
+        """
+        goods_nos 상태 DataFrame의 행들로 우선순위 큐를 만듭니다.
+        행에는 goodsNo, discovery_rank, first_seen_at, data_collected, mp3_downloaded, attempts 컬럼이 필요합니다.
+        """
+        now = time.time() if now is None else now
+        queue: PriorityWorkQueue = PriorityWorkQueue()
+        for row in rows.itertuples(index=False):
+            queue.push(str(row.goodsNo), self.score(
+                int(row.discovery_rank), float(row.first_seen_at),
+                bool(row.data_collected) and not bool(row.mp3_downloaded), int(row.attempts), now))
+        return queue